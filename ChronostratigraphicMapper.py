@@ -1,8 +1,57 @@
 import json
 import os
 import sys
-from typing import Dict, List, Tuple, Optional
+import threading
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Tuple, Optional
 from utils import get_resource_path
+from ResourcePack import get_resource_pack
+
+# Chronostratigraphic levels from the coarsest to the finest
+LEVELS = ('eras', 'periods', 'epochs', 'ages')
+LEVEL_FILES = {f"{level}.json": level for level in LEVELS}
+METADATA_FILE = "metadata.json"
+# Age ranges mapped since the last reload, cleared once it holds this many
+RANGE_CACHE_SIZE = 65536
+# Older or alternative charts, each in a folder of this name under the data folder holding the
+# files that differ from the default chart, e.g. data/timescales/2023.09/ages.json
+TIMESCALES_DIRECTORY = "timescales"
+
+# Units with the same contents are one dict, whichever mapper or timescale version loaded them
+_shared_units = {}
+_shared_units_lock = threading.Lock()
+
+def _share_unit(unit: Dict) -> Dict:
+    """The shared dict with the same contents as a unit, its names and colors interned"""
+    try:
+        key = tuple(sorted(unit.items()))
+        hash(key)
+    except TypeError:
+        # Lists or objects in a unit; keep it to this version
+        return unit
+    with _shared_units_lock:
+        shared = _shared_units.get(key)
+        if shared is None:
+            shared = {sys.intern(name): sys.intern(value) if isinstance(value, str) else value
+                      for name, value in unit.items()}
+            _shared_units[key] = shared
+        return shared
+
+class TimescaleNode:
+    """
+    One unit in the era -> period -> epoch -> age tree, with the age bounds of its whole subtree
+    so a range query can skip every branch that the range doesn't reach
+    """
+    __slots__ = ('unit', 'level', 'order', 'children', 'min_age', 'max_age')
+
+    def __init__(self, unit: Dict, level: str, order: int):
+        self.unit = unit
+        self.level = level
+        # Position of the unit in its level's data file, which is the order queries return them in
+        self.order = order
+        self.children = []
+        self.min_age = unit['start_age']
+        self.max_age = unit['end_age']
 
 class ChronostratigraphicMapper:
     """
@@ -10,42 +59,96 @@ class ChronostratigraphicMapper:
     This design makes it easy to update geological time scale data without modifying code.
     """
     
-    def __init__(self, data_directory: str = "data"):
+    def __init__(self, data_directory: str = "data", version: Optional[str] = None):
         """
-        Initialize the mapper with data from JSON files.
+        Initialize the mapper with data from JSON files, of the default chart or a named version
+        from the timescales folder.
         """
         self.data_directory = data_directory
+        # Folders read in turn for each file, so a version falls back to the default chart
+        self._directories = [data_directory]
+        if version is not None:
+            self._directories.insert(0, f"{data_directory}/{TIMESCALES_DIRECTORY}/{version}")
         self.eras = []
         self.periods = []
         self.epochs = []
         self.ages = []
         self.metadata = {}
+        # Units of each level sorted by start age, with their start ages, built on first point query
+        self._level_index = {}
+        # {level: {unit name: parent unit}}, linked when the data is loaded
+        self._parent_units = {}
+        # Eras, plus any unit whose parent isn't in the data, as roots of the timescale tree
+        self._roots = []
+        # Gaps and overlaps where a unit's children don't tile it, found when the data is loaded and
+        # left for the app to report, since batch and service workers load the same data many times
+        self.tiling_issues = []
+        # {(min age, max age): units}, shared by every layer with that age range
+        self._range_cache = {}
         
         # Load data from files
         self._load_all_data()
+        self.version = version if version is not None else self.metadata.get('version')
+        # {version name: mapper}, shared by every version loaded through get_version, None for the default
+        self._versions = {None: self, self.version: self}
     
     def _load_all_data(self):
         """Load all chronostratigraphic data from JSON files."""
         try:
-            self.eras = self._load_json_file("eras.json")
-            self.periods = self._load_json_file("periods.json")
-            self.epochs = self._load_json_file("epochs.json")
-            self.ages = self._load_json_file("ages.json")
-            self.metadata = self._load_json_file("metadata.json")
+            levels = {level: self._load_units(filename) for filename, level in LEVEL_FILES.items()}
+            self.metadata = self._load_json_file(METADATA_FILE)
+            self._install_levels(levels)
         except FileNotFoundError as e:
             # If files don't exist, use built-in data and create files
             print(f"Data files not found in '{self.data_directory}': {e}")
         except Exception as e:
             print(f"Error loading data files: {e}")
     
+    def _install_levels(self, levels: Dict[str, List[Dict]], range_cache: Optional[Dict] = None):
+        """
+        Swap in new units for the given levels, with the hierarchy built from them beforehand.
+        Export workers query the mapper while it reloads, so each structure is replaced in a
+        single assignment rather than changed in place, and the cached mappings last.
+        """
+        levels = {level: levels.get(level, getattr(self, level)) for level in LEVELS}
+        parent_units = self._link_hierarchy(levels)
+        roots = self._build_tree(levels, parent_units)
+        for level in LEVELS:
+            setattr(self, level, levels[level])
+        self._parent_units = parent_units
+        self._roots = roots
+        self._level_index = {}
+        self._range_cache = range_cache if range_cache is not None else {}
+        self.tiling_issues = self.check_tiling()
+
+    def data_file_path(self, filename: str) -> str:
+        """Path of the loose data file this mapper reads, e.g. for "ages.json" """
+        for directory in self._directories:
+            path = get_resource_path(os.path.join(directory, filename))
+            if os.path.exists(path):
+                return path
+        return get_resource_path(os.path.join(self._directories[0], filename))
+
+    def _read_json_file(self, filename: str):
+        pack = get_resource_pack()
+        if pack is not None:
+            for directory in self._directories:
+                packed_name = f"{directory}/{filename}"
+                if packed_name in pack:
+                    return json.loads(pack.read(packed_name))
+
+        with open(self.data_file_path(filename), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _load_units(self, filename: str) -> List[Dict]:
+        return [_share_unit(unit) for unit in self._load_json_file(filename)]
+
     def _load_json_file(self, filename: str) -> List[Dict]:
-        """Load data from a JSON file using resource path."""
-        # Use the resource path helper to get the correct path
-        filepath = get_resource_path(os.path.join(self.data_directory, filename))
+        """Load data from a JSON file using resource path, or from the resource pack in the built app."""
+        filepath = self.data_file_path(filename)
         
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return self._read_json_file(filename)
         except FileNotFoundError:
             print(f"File not found: {filepath}")
             return []
@@ -65,28 +168,321 @@ class ChronostratigraphicMapper:
             raise ValueError("Ages cannot be negative")
         if min_age_ma > max_age_ma:
             raise ValueError("Minimum age cannot be greater than maximum age")
-        
-        def find_overlapping_units(units_list):
-            """Helper function to find overlapping chronostratigraphic units"""
-            overlapping = []
-            for unit in units_list:
-                unit_start = unit['start_age']
-                unit_end = unit['end_age']
-                # Check if the age range overlaps with this unit
-                if min_age_ma < unit_end and max_age_ma > unit_start:
-                    overlapping.append(unit)
-            return overlapping
-        
-        # Find overlapping units for each hierarchical level
-        result = {
-            'eras': find_overlapping_units(self.eras),
-            'periods': find_overlapping_units(self.periods),
-            'epochs': find_overlapping_units(self.epochs),
-            'ages': find_overlapping_units(self.ages)
-        }
-        
+
+        # Layers are mapped on every paint, and callers only read the result, so it is shared
+        key = (min_age_ma, max_age_ma)
+        # Taken before the tree, so a result from a tree that is being replaced goes to the old cache
+        range_cache = self._range_cache
+        cached = range_cache.get(key)
+        if cached is not None:
+            return cached
+
+        result = {level: [] for level in LEVELS}
+        # Walk down from the roots, only into subtrees whose age bounds overlap the range
+        stack = list(self._roots)
+        while stack:
+            node = stack.pop()
+            if not (min_age_ma < node.max_age and max_age_ma > node.min_age):
+                continue
+            unit = node.unit
+            if min_age_ma < unit['end_age'] and max_age_ma > unit['start_age']:
+                result[node.level].append(node)
+            stack.extend(node.children)
+
+        for level, nodes in result.items():
+            nodes.sort(key=lambda node: node.order)
+            result[level] = [node.unit for node in nodes]
+
+        if len(range_cache) >= RANGE_CACHE_SIZE:
+            range_cache = self._range_cache = {}
+        range_cache[key] = result
         return result
 
+    def _get_level_index(self, level: str):
+        # Taken before the units, like the range cache
+        level_index = self._level_index
+        if level not in level_index:
+            units = sorted(getattr(self, level), key=lambda unit: unit['start_age'])
+            level_index[level] = ([unit['start_age'] for unit in units], units)
+        return level_index[level]
+
+    @staticmethod
+    def _link_hierarchy(levels: Dict[str, List[Dict]]) -> Dict:
+        """Resolve each unit's parent name to the parent unit and its level, e.g. an age to its epoch"""
+        parent_units = {}
+        for level, parent_level in zip(LEVELS[1:], LEVELS[:-1]):
+            # Precambrian periods name an era as their parent, since those eras have no epochs
+            candidates = {}
+            for ancestor_level in LEVELS[:LEVELS.index(parent_level) + 1]:
+                candidates.update((unit['name'], (ancestor_level, unit)) for unit in levels[ancestor_level])
+            parent_units[level] = {
+                unit['name']: candidates[unit['parent']]
+                for unit in levels[level] if unit.get('parent') in candidates
+            }
+        return parent_units
+
+    @staticmethod
+    def _build_tree(levels: Dict[str, List[Dict]], parent_units: Dict) -> List[TimescaleNode]:
+        """The roots of the timescale tree built from the linked parents, with each node's subtree age bounds"""
+        nodes = {}
+        for level in LEVELS:
+            nodes[level] = {unit['name']: TimescaleNode(unit, level, order)
+                            for order, unit in enumerate(levels[level])}
+
+        roots = []
+        for level in LEVELS:
+            for name, node in nodes[level].items():
+                linked = parent_units.get(level, {}).get(name)
+                if linked is None:
+                    roots.append(node)
+                else:
+                    parent_level, parent = linked
+                    nodes[parent_level][parent['name']].children.append(node)
+
+        # Finest levels first, so children's bounds are final before they widen their parents'
+        for level in reversed(LEVELS):
+            for node in nodes[level].values():
+                node.children.sort(key=lambda child: child.unit['start_age'])
+                for child in node.children:
+                    node.min_age = min(node.min_age, child.min_age)
+                    node.max_age = max(node.max_age, child.max_age)
+        return roots
+
+    def check_tiling(self) -> List[Dict]:
+        """
+        Gaps and overlaps between the children of each unit, or between them and the unit's own
+        boundaries, as dicts of kind ('gap' or 'overlap'), parent and level of the parent, the age
+        range affected, and the younger and older neighbouring units (None at the parent's boundary).
+        Units without children, like the Precambrian periods, aren't checked.
+        """
+        issues = []
+        stack = list(self._roots)
+        while stack:
+            node = stack.pop()
+            stack.extend(node.children)
+            if not node.children:
+                continue
+
+            unit = node.unit
+            younger = None
+            reached = unit['start_age']
+            for child in node.children:
+                start, end = child.unit['start_age'], child.unit['end_age']
+                if start != reached:
+                    issues.append({
+                        'kind': 'gap' if start > reached else 'overlap',
+                        'parent': unit['name'],
+                        'level': node.level,
+                        'start_age': min(start, reached),
+                        'end_age': max(start, reached),
+                        'younger': younger,
+                        'older': child.unit['name']
+                    })
+                younger = child.unit['name']
+                reached = max(reached, end)
+            if reached != unit['end_age']:
+                issues.append({
+                    'kind': 'gap' if reached < unit['end_age'] else 'overlap',
+                    'parent': unit['name'],
+                    'level': node.level,
+                    'start_age': min(reached, unit['end_age']),
+                    'end_age': max(reached, unit['end_age']),
+                    'younger': younger,
+                    'older': None
+                })
+
+        issues.sort(key=lambda issue: (issue['start_age'], LEVELS.index(issue['level'])))
+        return issues
+
+    @staticmethod
+    def describe_tiling_issue(issue: Dict) -> str:
+        younger, older = issue['younger'], issue['older']
+        if younger and older:
+            where = f"between {younger} and {older}"
+        elif older:
+            where = f"younger than {older}"
+        else:
+            where = f"older than {younger}"
+        return (f"{issue['kind']} in {issue['parent']} from {issue['start_age']:g} to {issue['end_age']:g} Ma "
+                f"{where}")
+
+    def parent_unit(self, unit: Dict, level: str) -> Optional[Dict]:
+        """Unit one or more levels up that contains a unit of the given level, or None for eras"""
+        linked = self._parent_units.get(level, {}).get(unit['name'])
+        return linked[1] if linked is not None else None
+
+    def _check_level(self, level: str):
+        if level not in LEVELS:
+            raise ValueError(f"Unknown chronostratigraphic level: {level}")
+
+    def _find_unit(self, starts: List[float], units: List[Dict], age: float) -> Optional[Dict]:
+        i = bisect_right(starts, age) - 1
+        if i >= 0 and (age < units[i]['end_age'] or (i == len(units) - 1 and age == units[i]['end_age'])):
+            return units[i]
+        return None
+
+    def unit_at(self, age_ma: float, level: str = 'periods') -> Optional[Dict]:
+        """
+        Unit of one level ('eras', 'periods', 'epochs' or 'ages') at an age in Ma, or None where
+        the level has no unit. Same boundary rule as map_ages, and a binary search per call.
+        """
+        self._check_level(level)
+        starts, units = self._get_level_index(level)
+        return self._find_unit(starts, units, age_ma)
+
+    def path_at(self, age_ma: float) -> List[Dict]:
+        """
+        Units containing an age, from the era down to the finest level defined there, e.g.
+        Cenozoic, Quaternary, Pleistocene, Calabrian. Precambrian ages stop at the period, and
+        ages outside the timescale give an empty list.
+        """
+        era = self.unit_at(age_ma, LEVELS[0])
+        if era is None:
+            return []
+
+        # The finest level whose unit chains up to the same era. Where a finer level's data stops
+        # at a boundary, like the ages at the base of the Cambrian, that age belongs to the era below
+        for level in reversed(LEVELS[1:]):
+            unit = self.unit_at(age_ma, level)
+            if unit is None:
+                continue
+            path = [unit]
+            linked = self._parent_units.get(level, {}).get(unit['name'])
+            while linked is not None:
+                level, unit = linked
+                path.append(unit)
+                linked = self._parent_units.get(level, {}).get(unit['name'])
+            if path[-1] is era:
+                path.reverse()
+                return path
+        return [era]
+
+    def map_ages(self, ages: Iterable[float], level: str = 'periods') -> List[Optional[str]]:
+        """
+        Name of the unit at each age (Ma) for one level ('eras', 'periods', 'epochs' or 'ages'),
+        or None where the level has no unit. Ages on a boundary belong to the older unit, except the
+        oldest boundary itself. Takes any iterable of numbers, e.g. a list or a numpy array, and
+        costs a binary search per age rather than a scan of the timescale.
+        """
+        self._check_level(level)
+        starts, units = self._get_level_index(level)
+        names = []
+        for age in ages:
+            unit = self._find_unit(starts, units, age)
+            names.append(unit['name'] if unit is not None else None)
+        return names
+
+    def clear_range_cache(self):
+        """Forget the mapped age ranges, e.g. to time the queries themselves"""
+        self._range_cache = {}
+
+    def reload_files(self, filenames: Iterable[str]) -> List[Dict]:
+        """
+        Re-read only the given data files, e.g. ["ages.json"], and diff each level's units by name
+        against the loaded ones. Returns the changes as dicts of kind ('added', 'removed' or
+        'changed'), level, name and the age range the unit covered before or after, which is
+        what's affected. Unchanged units keep their dicts, and only the cached mappings that
+        overlap a change are dropped. A file that can't be read leaves its level as it was.
+        """
+        changes = []
+        levels = {}
+        for filename in dict.fromkeys(filenames):
+            try:
+                data = self._read_json_file(filename)
+            except (OSError, ValueError) as e:
+                print(f"Could not reload {filename}: {e}")
+                continue
+
+            if filename == METADATA_FILE:
+                self.metadata = data
+                continue
+            level = LEVEL_FILES.get(filename)
+            if level is None:
+                continue
+
+            units = [_share_unit(unit) for unit in data]
+            level_changes, units = self._diff_units(level, getattr(self, level), units)
+            if level_changes:
+                levels[level] = units
+                changes.extend(level_changes)
+
+        if changes:
+            spans = [(change['start_age'], change['end_age']) for change in changes]
+            # A copy, since workers may add to the cache while it is filtered
+            range_cache = {
+                (min_age, max_age): units for (min_age, max_age), units in self._range_cache.copy().items()
+                if not any(min_age < end and max_age > start for start, end in spans)
+            }
+            self._install_levels(levels, range_cache)
+        return changes
+
+    @staticmethod
+    def _diff_units(level: str, old_units: List[Dict], new_units: List[Dict]):
+        """(changes, units) between two versions of a level, with unchanged units kept as the old dicts"""
+        old_by_name = {unit['name']: unit for unit in old_units}
+        new_names = {unit['name'] for unit in new_units}
+
+        def change(kind, name, *versions):
+            return {
+                'kind': kind,
+                'level': level,
+                'name': name,
+                'start_age': min(unit['start_age'] for unit in versions),
+                'end_age': max(unit['end_age'] for unit in versions)
+            }
+
+        changes = []
+        units = []
+        for unit in new_units:
+            old = old_by_name.get(unit['name'])
+            if old is None:
+                changes.append(change('added', unit['name'], unit))
+            elif old != unit:
+                changes.append(change('changed', unit['name'], old, unit))
+            else:
+                unit = old
+            units.append(unit)
+        for unit in old_units:
+            if unit['name'] not in new_names:
+                changes.append(change('removed', unit['name'], unit))
+        # A reordered file changes the order units are returned in, but not which ones
+        if not changes and [id(unit) for unit in units] != [id(unit) for unit in old_units]:
+            changes = [change('changed', unit['name'], unit) for unit in units]
+        return changes, units
+
+    def available_versions(self) -> List[str]:
+        """Names of the timescale versions that can be loaded, the default chart first"""
+        folder = f"{self.data_directory}/{TIMESCALES_DIRECTORY}"
+        pack = get_resource_pack()
+        if pack is not None:
+            names = {name[len(folder) + 1:].split('/')[0] for name in pack.names(folder)}
+        else:
+            path = get_resource_path(folder)
+            names = {name for name in os.listdir(path) if os.path.isdir(os.path.join(path, name))} \
+                if os.path.isdir(path) else set()
+        default = self._versions[None].version
+        return [default] + sorted(names - {default})
+
+    def get_version(self, version: Optional[str]) -> 'ChronostratigraphicMapper':
+        """
+        Mapper for a named timescale version, loaded on first use and sharing every unit it has in
+        common with the versions already loaded. None gives the default chart, and so does a
+        version that isn't installed, with a warning the first time.
+        """
+        mapper = self._versions.get(version)
+        if mapper is not None:
+            return mapper
+
+        default = self._versions[None]
+        if version in self.available_versions():
+            mapper = ChronostratigraphicMapper(self.data_directory, version)
+            mapper._versions = self._versions
+        else:
+            print(f"Timescale version {version} not found, using {default.version}")
+            mapper = default
+        self._versions[version] = mapper
+        return mapper
+
     def update_data_files(self):
         """Reload data from files (useful after manual edits)."""
         self._load_all_data()
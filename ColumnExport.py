@@ -0,0 +1,356 @@
+import os
+import struct
+import zlib
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from PySide6.QtGui import QImage, QPainter, QColor, QPdfWriter, QPageSize, QPageLayout, QGuiApplication
+from PySide6.QtCore import QRect, QRectF, QMarginsF
+
+from ColumnIO import OperationCancelled, atomic_open
+from ColumnRenderer import COLUMN_TOP, COLUMN_VERTICAL_SPACE
+from DisplayList import DisplayList, RecordingPainter
+from SvgPainter import SvgPainter
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+PNG_COLOR_TYPE_RGB = 2
+PNG_FILTER_NONE = b'\x00'
+PNG_COMPRESS_LEVEL = 6
+METERS_PER_INCH = 0.0254
+
+# Rows of output pixels rendered at once; one strip is the largest image held in memory
+DEFAULT_STRIP_HEIGHT = 256
+
+# Largest width QImage can paint into
+MAX_IMAGE_WIDTH = 32767
+
+DEFAULT_PDF_RESOLUTION = 96
+PDF_MARGIN_MM = 10
+
+# Page breaks move up to a layer boundary as long as the page stays at least this full
+MIN_PAGE_FILL = 0.75
+# Slack in layout units, so a pen width below the last layer doesn't start another page
+PAGE_BREAK_TOLERANCE = 2.0
+
+class PngStreamWriter:
+    """
+    Minimal PNG encoder that takes an image a few rows at a time.
+    Rows are compressed into IDAT chunks as they arrive, so the full image never has to exist in memory.
+    """
+
+    def __init__(self, f, width: int, height: int, dpi: Optional[float] = None):
+        self.f = f
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        self.compressor = zlib.compressobj(PNG_COMPRESS_LEVEL)
+
+        f.write(PNG_SIGNATURE)
+        # 8 bits per channel RGB, no interlacing
+        self.write_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, PNG_COLOR_TYPE_RGB, 0, 0, 0))
+        if dpi:
+            pixels_per_meter = round(dpi / METERS_PER_INCH)
+            self.write_chunk(b'pHYs', struct.pack('>IIB', pixels_per_meter, pixels_per_meter, 1))
+
+    def write_chunk(self, tag: bytes, data: bytes):
+        self.f.write(struct.pack('>I', len(data)))
+        self.f.write(tag)
+        self.f.write(data)
+        self.f.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(tag))))
+
+    def write_rows(self, image: QImage, row_count: Optional[int] = None):
+        """Append the first row_count rows of an image that is exactly as wide as the PNG"""
+        if row_count is None:
+            row_count = image.height()
+
+        rgb = image.convertToFormat(QImage.Format_RGB888)
+        bits = rgb.constBits()
+        stride = rgb.bytesPerLine()
+        row_bytes = self.width * 3
+
+        # Scanlines in QImage are padded to 4 bytes, PNG scanlines are prefixed with a filter type byte
+        scanlines = bytearray()
+        for y in range(row_count):
+            start = y * stride
+            scanlines += PNG_FILTER_NONE
+            scanlines += bits[start:start + row_bytes]
+
+        data = self.compressor.compress(bytes(scanlines))
+        if data:
+            self.write_chunk(b'IDAT', data)
+        self.rows_written += row_count
+
+    def finish(self):
+        if self.rows_written != self.height:
+            raise ValueError(f"PNG expects {self.height} rows but {self.rows_written} were written")
+
+        self.write_chunk(b'IDAT', self.compressor.flush())
+        self.write_chunk(b'IEND', b'')
+
+def export_png_tiled(renderer, file_path: str, width: int, height: int, scale_factor: float = 1.0,
+                     background=QColor('white'), dpi: Optional[float] = None,
+                     strip_height: int = DEFAULT_STRIP_HEIGHT,
+                     progress: Optional[Callable[[int, int], None]] = None,
+                     is_cancelled: Optional[Callable[[], bool]] = None):
+    """
+    Render the column laid out for width x height at scale_factor and stream it to a PNG file in
+    horizontal strips, keeping memory bounded by the strip size instead of the output size.
+    A renderer is recorded into a display list once, and each strip replays only what falls in it.
+    Returns the pixel size of the written image.
+    """
+    image_width = int(width * scale_factor)
+    image_height = int(height * scale_factor)
+    if image_width <= 0 or image_height <= 0:
+        raise ValueError("Image size must be positive")
+    if image_width > MAX_IMAGE_WIDTH:
+        raise ValueError(f"Image width of {image_width} pixels is larger than the maximum of {MAX_IMAGE_WIDTH}")
+
+    strip = QImage(image_width, min(strip_height, image_height), QImage.Format_RGB32)
+
+    # Laying out and painting the whole column again for every strip would cost strips x layers,
+    # while an image that fits in one strip is painted directly
+    if strip.height() < image_height and not isinstance(renderer, DisplayList):
+        renderer = record_column(renderer, width, height)
+
+    with atomic_open(file_path, 'wb', is_cancelled) as f:
+        writer = PngStreamWriter(f, image_width, image_height, dpi)
+
+        for top in range(0, image_height, strip.height()):
+            if is_cancelled is not None and is_cancelled():
+                raise OperationCancelled()
+
+            rows = min(strip.height(), image_height - top)
+            strip.fill(background)
+
+            painter = QPainter(strip)
+            try:
+                painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+                painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
+                painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+
+                # Skip everything outside this strip, then shift the strip's rows to the top of the image
+                painter.setClipRect(QRect(0, 0, image_width, rows))
+                painter.translate(0, -top)
+                painter.scale(scale_factor, scale_factor)
+                renderer.render(painter, width, height)
+            finally:
+                painter.end()
+
+            writer.write_rows(strip, rows)
+            if progress is not None:
+                progress(top + rows, image_height)
+
+        writer.finish()
+
+    return image_width, image_height
+
+def write_svg(renderer, f, width: int, height: int, background=None,
+              title: str = "Stratigraphic Column", description: str = "Vector export of stratigraphic column"):
+    """Write the column laid out for width x height as SVG text to an open file"""
+    painter = SvgPainter(width, height, title, description)
+    if background is not None:
+        painter.fillRect(QRect(0, 0, width, height), background)
+    renderer.render(painter, width, height)
+    painter.write(f)
+
+def export_svg(renderer, file_path: str, width: int, height: int, background=None,
+               title: str = "Stratigraphic Column", description: str = "Vector export of stratigraphic column"):
+    """Write the column laid out for width x height as an SVG, with each texture stored once as a pattern"""
+    with atomic_open(file_path, 'w', encoding='utf-8') as f:
+        write_svg(renderer, f, width, height, background, title, description)
+
+def record_column(renderer, width: int, height: int):
+    """Render the column laid out for width x height into a display list"""
+    painter = RecordingPainter()
+    renderer.render(painter, width, height)
+    painter.display_list.layer_extents = list(renderer.layer_extents)
+    return painter.display_list
+
+def paginate(top: float, bottom: float, page_height: float, boundaries: List[float]) -> List[Tuple[float, float]]:
+    """
+    Split the span top..bottom into pages no taller than page_height, ending each page at the
+    last layer boundary that fits. When that would leave too much of the page empty, e.g. for a
+    layer taller than a page, the page is cut where it ends instead.
+    """
+    pages = []
+    while bottom - top > PAGE_BREAK_TOLERANCE:
+        limit = top + page_height
+        if bottom <= limit + PAGE_BREAK_TOLERANCE:
+            pages.append((top, bottom))
+            break
+
+        i = bisect_right(boundaries, limit + PAGE_BREAK_TOLERANCE) - 1
+        if i >= 0 and boundaries[i] >= top + page_height * MIN_PAGE_FILL:
+            page_bottom = min(boundaries[i], limit)
+        else:
+            page_bottom = limit
+        pages.append((top, page_bottom))
+        top = page_bottom
+    return pages
+
+def _items_by_page(items, pages):
+    """Sort display items into the pages they overlap, keeping drawing order within each page"""
+    page_tops = [top for top, _ in pages]
+    page_bottoms = [bottom for _, bottom in pages]
+    by_page = [[] for _ in pages]
+
+    for item in items:
+        first = max(bisect_right(page_tops, item.bounds.top()) - 1, 0)
+        last = min(bisect_left(page_bottoms, item.bounds.bottom()), len(pages) - 1)
+        for page_index in range(first, last + 1):
+            by_page[page_index].append(item)
+    return by_page
+
+def pdf_resolution() -> int:
+    """
+    Resolution PDFs are laid out at. It matches the screen so fonts get the same size relative
+    to the layout as on screen, which also means it is part of what a PDF export looks like.
+    """
+    screen = QGuiApplication.primaryScreen()
+    return round(screen.logicalDotsPerInchY()) if screen is not None else DEFAULT_PDF_RESOLUTION
+
+def _pdf_page_layout(page_size) -> QPageLayout:
+    return QPageLayout(
+        QPageSize(page_size),
+        QPageLayout.Portrait,
+        QMarginsF(PDF_MARGIN_MM, PDF_MARGIN_MM, PDF_MARGIN_MM, PDF_MARGIN_MM),
+        QPageLayout.Millimeter
+    )
+
+def pdf_page_height(width: int, page_size=QPageSize.A4) -> float:
+    """Printable page height in layout units, once a column of the given width is scaled to fill the page width"""
+    paint_rect = _pdf_page_layout(page_size).paintRectPixels(pdf_resolution())
+    return paint_rect.height() * width / paint_rect.width()
+
+def export_pdf(renderer, file_path: str, width: int, pages: int = 1, page_size=QPageSize.A4,
+               background=None, title: str = "Stratigraphic Column",
+               progress: Optional[Callable[[int, int], None]] = None,
+               is_cancelled: Optional[Callable[[], bool]] = None) -> int:
+    """
+    Write the column as a vector PDF, laid out to fill roughly the given number of pages.
+    The renderer lays out the whole column in one pass, so it is recorded in full before the
+    first page is written; only the replay and PDF output go page by page.
+    Returns the number of pages written.
+    """
+    # Lay the column out so its layers fill the requested number of pages below the repeated header
+    body_height = pdf_page_height(width, page_size) - COLUMN_TOP
+    display_list = record_column(renderer, width, int(pages * body_height + COLUMN_VERTICAL_SPACE))
+    return write_pdf(display_list, file_path, width, page_size, background, title, progress, is_cancelled)
+
+def write_pdf(display_list, file_path: str, width: int, page_size=QPageSize.A4,
+              background=None, title: str = "Stratigraphic Column",
+              progress: Optional[Callable[[int, int], None]] = None,
+              is_cancelled: Optional[Callable[[], bool]] = None) -> int:
+    """
+    Write a recorded column as a vector PDF scaled to the page width, breaking pages at layer
+    boundaries and repeating the title band above COLUMN_TOP, which is the only header the
+    renderer draws; chrono columns have no header row of their own to repeat. Each page only
+    replays what falls on it, and every texture image is embedded a single time.
+    Returns the number of pages written.
+    """
+    temp_path = f"{file_path}.tmp"
+    writer = QPdfWriter(temp_path)
+    writer.setTitle(title)
+    writer.setCreator("Stratigraphic Column Maker")
+    writer.setResolution(pdf_resolution())
+    writer.setPageLayout(_pdf_page_layout(page_size))
+
+    # Fit the column to the page width and work in column layout units from here on
+    scale = writer.width() / width
+    page_height = writer.height() / scale
+
+    column_top = COLUMN_TOP
+    body_height = page_height - column_top
+    boundaries = sorted({edge for extent in display_list.layer_extents for edge in extent})
+    content_bottom = max(display_list.bounds().bottom(), column_top + 1)
+    page_ranges = paginate(column_top, content_bottom, body_height, boundaries)
+
+    header_rect = QRectF(0, 0, width, column_top)
+    header_items = display_list.items_in_rect(header_rect)
+    page_items = _items_by_page(display_list.items, page_ranges)
+
+    painter = QPainter()
+    try:
+        if not painter.begin(writer):
+            raise RuntimeError("Failed to begin painting on PDF")
+
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        for page_index, (top, bottom) in enumerate(page_ranges):
+            if is_cancelled is not None and is_cancelled():
+                raise OperationCancelled()
+            if page_index > 0:
+                writer.newPage()
+
+            painter.save()
+            painter.scale(scale, scale)
+            if background is not None:
+                painter.fillRect(QRectF(0, 0, width, page_height), background)
+
+            painter.setClipRect(header_rect)
+            display_list.replay(painter, header_items)
+
+            # Shift this page's slice of the column up under the header
+            painter.setClipRect(QRectF(0, column_top, width, bottom - top))
+            painter.translate(0, column_top - top)
+            display_list.replay(painter, page_items[page_index])
+            painter.restore()
+
+            if progress is not None:
+                progress(page_index + 1, len(page_ranges))
+
+        painter.end()
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if painter.isActive():
+            painter.end()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    return len(page_ranges)
+
+def export_formats(renderer, file_paths: Dict[str, str], width: int, height: int, scale_factor: float = 1.0,
+                   background=QColor('white'), dpi: Optional[float] = None, title: str = "Stratigraphic Column",
+                   parallel: bool = False,
+                   progress: Optional[Callable[[int, int], None]] = None,
+                   is_cancelled: Optional[Callable[[], bool]] = None) -> Dict[str, object]:
+    """
+    Write the column laid out for width x height to several formats at once, given as
+    {'png' | 'svg' | 'pdf': file path}. The layout and age mapping run a single time into a display
+    list that every writer replays. With parallel set, the PNG is rasterized and compressed on
+    its own thread while the vector formats are written; replaying is mostly Python work under
+    the GIL, so this only pays off when PNG encoding dominates. The PDF keeps this layout and
+    takes as many pages as it needs. Returns each writer's result by format.
+    """
+    unknown = set(file_paths) - {'png', 'svg', 'pdf'}
+    if unknown:
+        raise ValueError(f"Unsupported export formats: {', '.join(sorted(unknown))}")
+
+    display_list = record_column(renderer, width, height)
+
+    writers = {
+        'png': lambda path: export_png_tiled(display_list, path, width, height, scale_factor, background, dpi,
+                                             is_cancelled=is_cancelled),
+        'svg': lambda path: export_svg(display_list, path, width, height, background, title),
+        'pdf': lambda path: write_pdf(display_list, path, width, title=title, is_cancelled=is_cancelled)
+    }
+
+    results = {}
+
+    def finish(fmt, result):
+        results[fmt] = result
+        if progress is not None:
+            progress(len(results), len(file_paths))
+
+    raster = 'png' if parallel and 'png' in file_paths and len(file_paths) > 1 else None
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        # The display list is only read from here on, so both threads can replay it
+        future = executor.submit(writers[raster], file_paths[raster]) if raster else None
+        for fmt, path in file_paths.items():
+            if fmt != raster:
+                finish(fmt, writers[fmt](path))
+        if future is not None:
+            finish(raster, future.result())
+
+    return results
@@ -0,0 +1,510 @@
+import codecs
+import json
+import os
+import re
+import struct
+import sys
+import zlib
+from array import array
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+from Layer import Layer
+from Lithology import RockType
+from Deposition import DepositionalEnvironment
+
+DEFAULT_INTRUSION_AGE = 0.0
+READ_CHUNK_SIZE = 1024 * 1024
+# Decode errors further than this from the end of the buffer can't be a value cut by a chunk
+# boundary, the longest cuts being "-Infinity" and a "\uXXXX" escape
+TRUNCATION_MARGIN = 12
+# Characters a single value other than the layers array may take, so an unterminated string
+# fails instead of pulling the rest of the file into memory
+MAX_VALUE_SIZE = 64 * 1024 * 1024
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+BINARY_EXTENSION = '.stratcol'
+BINARY_MAGIC = b'STRATCOL'
+BINARY_VERSION = 1
+BINARY_FLAG_COMPRESSED = 0x1
+# magic, format version, flags, header length
+BINARY_PREAMBLE = struct.Struct('<8sHHI')
+
+# Value kinds stored next to each numeric and boolean column
+KIND_FLOAT = 0
+KIND_INT = 1
+KIND_NONE = 2
+NO_DEP_ENV = 255
+NUMERIC_FIELDS = ('thickness', 'formation_top', 'young_age', 'old_age', 'min_thickness', 'max_thickness')
+
+class OperationCancelled(Exception):
+    """Raised when a column read or write is cancelled part way through"""
+    pass
+
+def _report(progress: Optional[Callable[[int, int], None]], done: int, total: int):
+    if progress is not None:
+        progress(done, total)
+
+def _check_cancelled(is_cancelled: Optional[Callable[[], bool]]):
+    if is_cancelled is not None and is_cancelled():
+        raise OperationCancelled()
+
+def build_column_data(layer_dicts: List[Dict], intrusion_from_age: float, intrusion_to_age: float,
+                      timescale: Optional[str] = None) -> Dict:
+    """
+    Collect serialized layers and column settings into the column file layout.
+    The timescale version is only written for columns drawn against a chart other than the default.
+    """
+    column_data = {
+        "layers": layer_dicts,
+        "intrusion_from_age": intrusion_from_age,
+        "intrusion_to_age": intrusion_to_age,
+        "metadata": {
+            "version": "1.0",
+            "created_with": "Stratigraphic Column Maker",
+            "total_layers": len(layer_dicts),
+        }
+    }
+    if timescale is not None:
+        column_data["timescale"] = timescale
+    return column_data
+
+class JsonStreamReader:
+    """
+    Incremental JSON reader over a binary file.
+    Holds only the unread part of the current chunk, so large arrays can be consumed element
+    by element without building the whole document in memory.
+    """
+
+    def __init__(self, f, chunk_size: int = READ_CHUNK_SIZE, max_value_size: int = MAX_VALUE_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.max_value_size = max_value_size
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.bytes_read = 0
+        # Characters dropped from the front of the buffer, the line the buffer starts on and how far
+        # into that line, so errors give their position in the file rather than in the buffer
+        self.consumed = 0
+        self.line = 1
+        self.line_offset = 0
+
+    def fill(self):
+        """Drop consumed text and append the next chunk of the file"""
+        chunk = self.f.read(self.chunk_size)
+        self.bytes_read += len(chunk)
+        if not chunk:
+            self.eof = True
+
+        newlines = self.buffer.count('\n', 0, self.pos)
+        if newlines:
+            self.line += newlines
+            self.line_offset = self.pos - self.buffer.rfind('\n', 0, self.pos) - 1
+        else:
+            self.line_offset += self.pos
+        self.consumed += self.pos
+
+        self.buffer = self.buffer[self.pos:] + self.text_decoder.decode(chunk, final=self.eof)
+        self.pos = 0
+
+    def error(self, message: str, pos: int) -> json.JSONDecodeError:
+        """JSONDecodeError at a buffer position, with its line, column and character counted in the file"""
+        line_start = self.buffer.rfind('\n', 0, pos)
+        lineno = self.line + self.buffer.count('\n', 0, pos)
+        colno = pos - line_start if line_start >= 0 else self.line_offset + pos + 1
+        # doc still holds only the buffered text
+        error = json.JSONDecodeError(message, self.buffer, pos)
+        error.pos = self.consumed + pos
+        error.lineno = lineno
+        error.colno = colno
+        error.args = (f"{message}: line {lineno} column {colno} (char {error.pos})",)
+        return error
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character, or an empty string at the end of the file"""
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or self.eof:
+                break
+            self.fill()
+
+        if self.pos < len(self.buffer):
+            return self.buffer[self.pos]
+        return ""
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise self.error(f"Expecting '{char}'", self.pos)
+        self.pos += 1
+
+    def read_value(self):
+        """Decode the next complete JSON value, reading more of the file until it is complete"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                # Only a string or token running into the end of the buffer may be completed by more data
+                truncated = e.msg.startswith("Unterminated string") or e.pos >= len(self.buffer) - TRUNCATION_MARGIN
+                if self.eof or not truncated:
+                    raise self.error(e.msg, e.pos) from None
+                self.fill_value()
+                continue
+
+            # A number cut at the end of the buffer (e.g. "1." of "1.5") may continue in the next chunk,
+            # so only accept a value once a delimiter follows it
+            if not self.eof and (end == len(self.buffer) or self.buffer[end] not in ',]}: \t\n\r'):
+                self.fill_value()
+                continue
+
+            self.pos = end
+            return value
+
+    def fill_value(self):
+        """Read more of a value that isn't complete yet, unless it has outgrown max_value_size"""
+        if len(self.buffer) - self.pos > self.max_value_size:
+            raise self.error(f"Value longer than {self.max_value_size} characters", self.pos)
+        self.fill()
+
+    def iter_object(self):
+        """Yield the keys of the JSON object at the current position; the caller reads each value"""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+
+        while True:
+            key = self.read_value()
+            self.expect(':')
+            yield key
+
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.expect('}')
+            return
+
+    def iter_array(self):
+        """Yield the elements of the JSON array at the current position one at a time"""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+
+        while True:
+            yield self.read_value()
+
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.expect(']')
+            return
+
+def is_binary_column_file(file_path: str) -> bool:
+    return file_path.lower().endswith(BINARY_EXTENSION)
+
+def read_column_file(file_path: str, progress: Optional[Callable[[int, int], None]] = None,
+                     is_cancelled: Optional[Callable[[], bool]] = None) -> Dict:
+    """Read a JSON or binary column file, chosen by file extension"""
+    if is_binary_column_file(file_path):
+        return read_binary_column_file(file_path, progress, is_cancelled)
+    return read_json_column_file(file_path, progress, is_cancelled)
+
+def write_column_file(file_path: str, layers: List[Layer], intrusion_from_age: float, intrusion_to_age: float,
+                      progress: Optional[Callable[[int, int], None]] = None,
+                      is_cancelled: Optional[Callable[[], bool]] = None, timescale: Optional[str] = None):
+    """Write a JSON or binary column file, chosen by file extension"""
+    if is_binary_column_file(file_path):
+        write_binary_column_file(file_path, layers, intrusion_from_age, intrusion_to_age,
+                                 progress=progress, is_cancelled=is_cancelled, timescale=timescale)
+    else:
+        write_json_column_file(file_path, layers, intrusion_from_age, intrusion_to_age, progress, is_cancelled,
+                               timescale)
+
+@contextmanager
+def atomic_open(file_path: str, mode: str, is_cancelled: Optional[Callable[[], bool]] = None, **kwargs):
+    """
+    Open a temporary file next to the destination and move it into place once writing succeeds,
+    so a failed or cancelled save never leaves a truncated file behind.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    os.makedirs(directory, exist_ok=True)
+
+    temp_path = f"{file_path}.tmp"
+    try:
+        with open(temp_path, mode, **kwargs) as f:
+            yield f
+        _check_cancelled(is_cancelled)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def read_json_column_file(file_path: str, progress: Optional[Callable[[int, int], None]] = None,
+                          is_cancelled: Optional[Callable[[], bool]] = None) -> Dict:
+    """
+    Read a JSON column file, streaming the layers array into Layer objects one element at a time.
+    Peak memory is the Layer list plus one read chunk, instead of the whole parsed document.
+    """
+    total_bytes = max(os.path.getsize(file_path), 1)
+    column = {
+        "layers": [],
+        "intrusion_from_age": DEFAULT_INTRUSION_AGE,
+        "intrusion_to_age": DEFAULT_INTRUSION_AGE,
+        "timescale": None,
+        "metadata": {},
+    }
+
+    with open(file_path, "rb") as f:
+        reader = JsonStreamReader(f)
+        for key in reader.iter_object():
+            if key == "layers":
+                layers = column["layers"]
+                for layer_dict in reader.iter_array():
+                    layers.append(Layer.from_dict(layer_dict))
+                    if len(layers) % 256 == 0:
+                        _check_cancelled(is_cancelled)
+                        _report(progress, min(reader.bytes_read * 100 // total_bytes, 99), 100)
+            else:
+                column[key] = reader.read_value()
+
+        if reader.peek() != "":
+            raise reader.error("Extra data", reader.pos)
+
+    _report(progress, 100, 100)
+    return column
+
+def parse_column_json(data) -> Dict:
+    """Parse column JSON already in memory, e.g. received over the network, into the layout read_column_file returns"""
+    document = json.loads(data)
+    if not isinstance(document, dict) or not isinstance(document.get("layers"), list):
+        raise ValueError("Column JSON must be an object with a \"layers\" array")
+
+    column = {
+        "intrusion_from_age": DEFAULT_INTRUSION_AGE,
+        "intrusion_to_age": DEFAULT_INTRUSION_AGE,
+        "timescale": None,
+        "metadata": {},
+    }
+    column.update(document)
+    column["layers"] = [Layer.from_dict(layer_dict) for layer_dict in document["layers"]]
+    return column
+
+def _indent_json(value, level: int) -> str:
+    """Dump a value the way json.dump(indent=2) lays it out at the given nesting level"""
+    text = json.dumps(value, indent=2, ensure_ascii=False)
+    return text.replace("\n", "\n" + "  " * level)
+
+def write_json_column_file(file_path: str, layers: List[Layer], intrusion_from_age: float, intrusion_to_age: float,
+                           progress: Optional[Callable[[int, int], None]] = None,
+                           is_cancelled: Optional[Callable[[], bool]] = None, timescale: Optional[str] = None):
+    """
+    Serialize a column and stream it to disk as JSON one layer at a time.
+    The output matches json.dump(indent=2) of build_column_data.
+    """
+    column_data = build_column_data([], intrusion_from_age, intrusion_to_age, timescale)
+    column_data["metadata"]["total_layers"] = len(layers)
+
+    with atomic_open(file_path, 'w', is_cancelled, encoding='utf-8') as f:
+        if layers:
+            f.write('{\n  "layers": [')
+            for i, layer in enumerate(layers):
+                if i % 256 == 0:
+                    _check_cancelled(is_cancelled)
+                    _report(progress, i * 100 // len(layers), 100)
+                f.write(",\n    " if i else "\n    ")
+                f.write(_indent_json(layer.to_dict(), 2))
+            f.write('\n  ]')
+        else:
+            f.write('{\n  "layers": []')
+
+        for key, value in column_data.items():
+            if key != "layers":
+                f.write(f',\n  {json.dumps(key)}: {_indent_json(value, 1)}')
+        f.write('\n}')
+
+    _report(progress, 100, 100)
+
+def _little_endian_bytes(values: array) -> bytes:
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+def _array_from_little_endian(typecode: str, data) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+def _encode_numeric_column(field: str, values: List) -> Tuple[array, array]:
+    """Split a numeric field into value kinds and float64 values, keeping ints and None distinct"""
+    kinds = array('B', bytes(len(values)))
+    numbers = array('d', bytes(8 * len(values)))
+    for i, value in enumerate(values):
+        if value is None:
+            kinds[i] = KIND_NONE
+        elif isinstance(value, bool):
+            raise ValueError(f"Layer {field} must be a number, got {value!r}")
+        elif isinstance(value, int):
+            if float(value) != value:
+                raise ValueError(f"Layer {field} {value} is too large for the binary column format")
+            kinds[i] = KIND_INT
+            numbers[i] = value
+        elif isinstance(value, float):
+            numbers[i] = value
+        else:
+            raise ValueError(f"Layer {field} must be a number, got {value!r}")
+    return kinds, numbers
+
+def _decode_numeric_column(kinds: array, numbers: array) -> List:
+    return [
+        None if kind == KIND_NONE else (int(number) if kind == KIND_INT else number)
+        for kind, number in zip(kinds, numbers)
+    ]
+
+def write_binary_column_file(file_path: str, layers: List[Layer], intrusion_from_age: float, intrusion_to_age: float,
+                             compress: bool = True, progress: Optional[Callable[[int, int], None]] = None,
+                             is_cancelled: Optional[Callable[[], bool]] = None, timescale: Optional[str] = None):
+    """
+    Write a column in the compact binary format.
+    Layers are stored column by column as typed arrays: names in one UTF-8 blob with offsets,
+    rock types and depositional environments as one-byte codes into enum tables kept in the header,
+    and numeric fields as float64 values with a kind byte that preserves ints and None.
+    """
+    rock_types = [rock_type.value for rock_type in RockType]
+    dep_envs = [env.name for env in DepositionalEnvironment]
+    rock_type_codes = {value: i for i, value in enumerate(rock_types)}
+    dep_env_codes = {name: i for i, name in enumerate(dep_envs)}
+
+    name_blob = bytearray()
+    name_offsets = array('I', [0])
+    rock_type_column = array('B')
+    dep_env_column = array('B')
+    visible_column = array('B')
+
+    for i, layer in enumerate(layers):
+        if i % 4096 == 0:
+            _check_cancelled(is_cancelled)
+            _report(progress, i * 50 // max(len(layers), 1), 100)
+        name_blob += layer.name.encode('utf-8')
+        name_offsets.append(len(name_blob))
+        rock_type_column.append(rock_type_codes[layer.rock_type.value])
+        dep_env_column.append(NO_DEP_ENV if layer.dep_env is None else dep_env_codes[layer.dep_env.name])
+        visible_column.append(KIND_NONE if layer.visible is None else int(bool(layer.visible)))
+
+    columns = [
+        ('name_offsets', name_offsets),
+        ('names', bytes(name_blob)),
+        ('rock_type', rock_type_column),
+        ('dep_env', dep_env_column),
+        ('visible', visible_column),
+    ]
+    for field in NUMERIC_FIELDS:
+        kinds, numbers = _encode_numeric_column(field, [getattr(layer, field) for layer in layers])
+        columns.append((f'{field}_kind', kinds))
+        columns.append((field, numbers))
+
+    body_parts = [_little_endian_bytes(data) if isinstance(data, array) else data for _, data in columns]
+    header = {
+        "layer_count": len(layers),
+        "intrusion_from_age": intrusion_from_age,
+        "intrusion_to_age": intrusion_to_age,
+        "metadata": build_column_data([], intrusion_from_age, intrusion_to_age)["metadata"],
+        "rock_types": rock_types,
+        "dep_envs": dep_envs,
+        "columns": [[name, data.typecode if isinstance(data, array) else 'blob', len(part)]
+                    for (name, data), part in zip(columns, body_parts)],
+    }
+    header["metadata"]["total_layers"] = len(layers)
+    if timescale is not None:
+        header["timescale"] = timescale
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+
+    body = b"".join(body_parts)
+    flags = 0
+    if compress:
+        _report(progress, 60, 100)
+        body = zlib.compress(body, 6)
+        flags |= BINARY_FLAG_COMPRESSED
+
+    _check_cancelled(is_cancelled)
+    with atomic_open(file_path, 'wb', is_cancelled) as f:
+        f.write(BINARY_PREAMBLE.pack(BINARY_MAGIC, BINARY_VERSION, flags, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(body)
+
+    _report(progress, 100, 100)
+
+def read_binary_column_file(file_path: str, progress: Optional[Callable[[int, int], None]] = None,
+                            is_cancelled: Optional[Callable[[], bool]] = None) -> Dict:
+    """Read a column written by write_binary_column_file"""
+    with open(file_path, 'rb') as f:
+        data = f.read()
+
+    if len(data) < BINARY_PREAMBLE.size:
+        raise ValueError("File is too short to be a binary column file")
+    magic, version, flags, header_length = BINARY_PREAMBLE.unpack_from(data, 0)
+    if magic != BINARY_MAGIC:
+        raise ValueError("Not a binary column file")
+    if version > BINARY_VERSION:
+        raise ValueError(f"Binary column file version {version} is newer than supported version {BINARY_VERSION}")
+
+    header_start = BINARY_PREAMBLE.size
+    header = json.loads(data[header_start:header_start + header_length].decode('utf-8'))
+    body = memoryview(data)[header_start + header_length:]
+    if flags & BINARY_FLAG_COMPRESSED:
+        _check_cancelled(is_cancelled)
+        body = memoryview(zlib.decompress(body))
+    _report(progress, 30, 100)
+
+    # Slice the body into its columns without copying
+    columns = {}
+    offset = 0
+    for name, typecode, length in header["columns"]:
+        part = body[offset:offset + length]
+        columns[name] = part if typecode == 'blob' else _array_from_little_endian(typecode, part)
+        offset += length
+    if offset != len(body):
+        raise ValueError("Binary column file is truncated or corrupt")
+
+    rock_types = [RockType(value) for value in header["rock_types"]]
+    dep_envs = [DepositionalEnvironment[name] for name in header["dep_envs"]]
+    numeric = {field: _decode_numeric_column(columns[f'{field}_kind'], columns[field]) for field in NUMERIC_FIELDS}
+    _check_cancelled(is_cancelled)
+    _report(progress, 60, 100)
+
+    names = bytes(columns['names'])
+    name_offsets = columns['name_offsets']
+    visible_values = (False, True, None)
+
+    layers = []
+    for i in range(header["layer_count"]):
+        dep_env_code = columns['dep_env'][i]
+        layers.append(Layer(
+            name=names[name_offsets[i]:name_offsets[i + 1]].decode('utf-8'),
+            thickness=numeric['thickness'][i],
+            rock_type=rock_types[columns['rock_type'][i]],
+            formation_top=numeric['formation_top'][i],
+            young_age=numeric['young_age'][i],
+            old_age=numeric['old_age'][i],
+            dep_env=None if dep_env_code == NO_DEP_ENV else dep_envs[dep_env_code],
+            visible=visible_values[columns['visible'][i]],
+            min_thickness=numeric['min_thickness'][i],
+            max_thickness=numeric['max_thickness'][i]
+        ))
+    _report(progress, 100, 100)
+
+    return {
+        "layers": layers,
+        "intrusion_from_age": header.get("intrusion_from_age", DEFAULT_INTRUSION_AGE),
+        "intrusion_to_age": header.get("intrusion_to_age", DEFAULT_INTRUSION_AGE),
+        "timescale": header.get("timescale"),
+        "metadata": header.get("metadata", {}),
+    }
@@ -0,0 +1,1783 @@
+import os
+import re
+import copy
+import math
+import threading
+from collections.abc import Mapping
+
+from PySide6.QtGui import QPainter, QColor, QPen, QFont, QBrush, QImage, QPainterPath
+from PySide6.QtCore import Qt, QRectF, QRect
+from ChronostratigraphicMapper import ChronostratigraphicMapper as chronomap
+from Lithology import RockCategory, RockProperties, RockType
+from ScalingMode import ScalingMode
+from Deposition import DepositionalEnvironment
+
+from enum import Enum
+from utils import get_resource_path
+from ResourcePack import get_resource_pack
+from LayerIndex import LayerAgeIndex, LayerHitIndex
+
+DEFAULT_COLUMN_SIZE = 120
+DEFAULT_YOUNG_AGE = 0.0
+DEFAULT_OLD_AGE = 4567.0
+DEFAULT_WIDTH = 500
+DEFAULT_HEIGHT = 600
+# Space above the column for the title, and the layout height the column leaves unused
+COLUMN_TOP = 50
+COLUMN_VERTICAL_SPACE = 150
+TEXTURE_SCALE_FACTOR = 0.10
+TEXTURE_CROP_PIXELS = 16
+# Age column segments of adjacent layers closer than this many pixels, and this many Ma, are drawn as one band
+BAND_MERGE_TOLERANCE = 0.5
+BAND_AGE_TOLERANCE = 1e-6
+
+# Texture brushes are decoded once per process, on first use, and shared by every renderer
+_texture_cache = {}
+_texture_cache_lock = threading.Lock()
+
+def get_contrasting_color_from_hex(hex_color):
+    """Return white QColor for dark backgrounds, black QColor for light backgrounds"""
+    # Remove # if present
+    hex_color = hex_color.lstrip('#')
+    
+    # Convert hex to RGB
+    r = int(hex_color[0:2], 16)
+    g = int(hex_color[2:4], 16)
+    b = int(hex_color[4:6], 16)
+    
+    # Calculate luminance using standard formula
+    luminance = (0.299 * r + 0.587 * g + 0.114 * b) / 255
+    
+    # Return white for dark backgrounds (luminance < 0.5), black for light
+    return QColor(255, 255, 255) if luminance < 0.5 else QColor(0, 0, 0)
+
+class StratigraphicAgeTypes(Enum):
+    ERAS = 'eras'
+    PERIODS = 'periods'
+    EPOCHS = 'epochs'
+    AGES = 'ages'
+
+def merge_age_segments(bands, segments):
+    """
+    Add a layer's age column segments (unit, top, bottom, young, old) to the bands drawn so far,
+    extending the last band where a segment continues the same unit right below it, from the
+    age the band ends at. A hiatus between layers in the same unit starts a new band.
+    """
+    for unit, top, bottom, young, old in segments:
+        if bands:
+            last_unit, last_top, last_bottom, last_young, last_old = bands[-1]
+            if (last_unit is unit and abs(top - last_bottom) <= BAND_MERGE_TOLERANCE
+                    and abs(young - last_old) <= BAND_AGE_TOLERANCE):
+                bands[-1] = (unit, last_top, bottom, last_young, old)
+                continue
+        bands.append((unit, top, bottom, young, old))
+
+def _find_texture_files(pack=None):
+    """Texture image paths in assets/patterns, or names in the resource pack, by texture number"""
+    if pack is not None:
+        # Numbered when the pack was built, so there is nothing to scan
+        return dict(pack.textures)
+
+    texture_files = {}
+    
+    patterns_dir = get_resource_path("assets/patterns")
+    
+    if not os.path.exists(patterns_dir):
+        print(f"Directory {patterns_dir} not found")
+        return texture_files
+
+    # Get all PNG files in the directory
+    for filename in os.listdir(patterns_dir):
+        if filename.lower().endswith('.png') and 'texture_' in filename:
+            # Extract number from filename using regex
+            match = re.search(r'texture_(\d+)\.png', filename)
+            if match:
+                texture_files[match.group(1)] = os.path.join(patterns_dir, filename)
+
+    return texture_files
+
+def _load_texture_brush(texture_path, scale_factor, crop_pixels, pack=None):
+    """Load one texture brush with scaling and cropping, or None if the image can't be read"""
+    if pack is not None:
+        texture_image = QImage.fromData(pack.read(texture_path))
+    else:
+        texture_image = QImage(texture_path)
+    if texture_image.isNull():
+        print(f"Failed to load {os.path.basename(texture_path)}")
+        return None
+
+    # Crop pixels from each border
+    cropped_image = texture_image.copy(
+        crop_pixels,  # x offset
+        crop_pixels,  # y offset
+        texture_image.width() - (crop_pixels * 2),   # new width
+        texture_image.height() - (crop_pixels * 2)   # new height
+    )
+    
+    if scale_factor != 1.0:
+        # Scale the cropped texture
+        cropped_image = cropped_image.scaled(
+            int(cropped_image.width() * scale_factor),
+            int(cropped_image.height() * scale_factor),
+            Qt.KeepAspectRatio,
+            Qt.SmoothTransformation
+        )
+
+    print(f"Loaded {os.path.basename(texture_path)}")
+    return QBrush(cropped_image)
+
+class TextureBrushes(Mapping):
+    """
+    Texture brushes by texture number, each decoded the first time it is used.
+    Decoding every pattern takes over a second, while a column usually shows a handful of them,
+    so nothing is decoded at startup.
+    """
+
+    def __init__(self, scale_factor, crop_pixels):
+        self.scale_factor = scale_factor
+        self.crop_pixels = crop_pixels
+        self._pack = get_resource_pack()
+        self._texture_files = _find_texture_files(self._pack)
+        self._brushes = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, texture_id):
+        brush = self._brushes.get(texture_id)
+        if brush is None:
+            with self._lock:
+                if texture_id not in self._brushes:
+                    texture_path = self._texture_files[texture_id]
+                    self._brushes[texture_id] = _load_texture_brush(texture_path, self.scale_factor, self.crop_pixels, self._pack)
+                brush = self._brushes[texture_id]
+            if brush is None:
+                raise KeyError(texture_id)
+        return brush
+
+    def __iter__(self):
+        return iter(self._texture_files)
+
+    def __len__(self):
+        return len(self._texture_files)
+
+    def preload(self):
+        """Decode every texture now, e.g. in a long running worker before its first request"""
+        for texture_id in self._texture_files:
+            self.get(texture_id)
+
+    def decoded_size(self):
+        """Number of textures decoded so far and the bytes their images take"""
+        images = [brush.textureImage() for brush in list(self._brushes.values()) if brush is not None]
+        return len(images), sum(image.sizeInBytes() for image in images)
+
+def shared_texture_brushes():
+    """Every TextureBrushes created by load_texture_brushes so far"""
+    with _texture_cache_lock:
+        return list(_texture_cache.values())
+
+def load_texture_brushes(scale_factor=TEXTURE_SCALE_FACTOR, crop_pixels=TEXTURE_CROP_PIXELS):
+    """
+    Get the shared texture brushes for a scale and crop.
+    Textures are decoded into QImage rather than QPixmap so brushes also work off the GUI thread
+    and without a window system.
+    """
+    key = (scale_factor, crop_pixels)
+    with _texture_cache_lock:
+        if key not in _texture_cache:
+            _texture_cache[key] = TextureBrushes(scale_factor, crop_pixels)
+        return _texture_cache[key]
+
+class ColumnRenderer:
+    """
+    Draws a stratigraphic column onto any QPainter, independent of a widget.
+    Holds the layers and display options; render() paints them into a width x height area of
+    any paint device, so columns can be drawn onto a QImage, QSvgGenerator or QPdfWriter
+    under the offscreen platform without a main window.
+    """
+
+    def __init__(self, chronostratigraphic_mapper=None, texture_brushes=None):
+        self.layers = []
+        self.chronomap = chronostratigraphic_mapper if chronostratigraphic_mapper is not None else chronomap()
+        self.texture_brushes = texture_brushes if texture_brushes is not None else load_texture_brushes()
+        self.max_depth = 0.0
+        self.max_age = 0.0
+        self.display_options = {
+            'show_eras': True,
+            'show_periods': True,
+            'show_epochs': True,
+            'show_ages': True
+        }
+        self.scaling_mode = ScalingMode.CHRONOLOGY
+        # Name of the timescale version the column is drawn against, None for the default chart
+        self.timescale_version = None
+        self.show_formation_gap = True
+        self.display_age_range = (DEFAULT_YOUNG_AGE, DEFAULT_OLD_AGE)
+        self.intrusion_age_range = (DEFAULT_YOUNG_AGE, DEFAULT_YOUNG_AGE)
+        self.viewport = QRect(0, 0, DEFAULT_WIDTH, DEFAULT_HEIGHT)
+        # Where the last render placed the top of the column and each layer, e.g. for choosing page breaks,
+        # the layer drawn at each extent and each column's (x, width), e.g. for hit testing
+        self.column_top = 0
+        self.layer_extents = []
+        self.extent_layers = []
+        self.column_layout = {}
+        self._hit_index = None
+        self._layer_age_index = None
+        self._visible_layers_cache = None
+        # Optional PaintProfiler timing the phases of each render
+        self.paint_profiler = None
+
+    def rect(self):
+        """Area being painted, in the same role as QWidget.rect()"""
+        return self.viewport
+
+    def width(self):
+        return self.viewport.width()
+
+    def height(self):
+        return self.viewport.height()
+
+    def snapshot(self):
+        """Copy of the render state that later edits won't affect, for painting on another thread"""
+        renderer = copy.copy(self)
+        renderer.layers = [copy.copy(layer) for layer in self.layers]
+        renderer.display_options = dict(self.display_options)
+        renderer.viewport = QRect(self.viewport)
+        renderer.paint_profiler = None
+        renderer.invalidate_layer_cache()
+        return renderer
+
+    def check_layer_overlap(self, new_layer, existing_layers=None):
+        """Check if a new layer would overlap with existing layers"""
+        if existing_layers is None:
+            existing_layers = self.layers
+
+        new_top = new_layer.formation_top
+        new_bottom = new_layer.formation_top + new_layer.thickness
+        
+        for existing_layer in existing_layers:
+            existing_top = existing_layer.formation_top
+            existing_bottom = existing_layer.formation_top + existing_layer.thickness
+            
+            # Check for overlap
+            if (new_top < existing_bottom and new_bottom > existing_top):
+                return True, existing_layer
+        
+        return False, None
+
+    def set_layers(self, layers):
+        """Replace all layers at once, returning any layers rejected for overlapping"""
+        rejected_layers = []
+        accepted_layers = []
+
+        if self.scaling_mode == ScalingMode.FORMATION_TOP_THICKNESS:
+            # Check overlaps against the layers accepted so far, same as adding them one by one
+            for layer in layers:
+                has_overlap, _ = self.check_layer_overlap(layer, accepted_layers)
+                if has_overlap:
+                    rejected_layers.append(layer)
+                else:
+                    accepted_layers.append(layer)
+        else:
+            accepted_layers = list(layers)
+
+        self.layers = accepted_layers
+        self.invalidate_layer_cache()
+        return rejected_layers
+
+    def invalidate_layer_cache(self):
+        """Drop the age index and visible layer cache after layers are added, removed or edited"""
+        self._layer_age_index = None
+        self._visible_layers_cache = None
+        # Its layer positions would be stale, though the extents stay right until the next render
+        self._hit_index = None
+
+    def _query_visible_layers(self):
+        """
+        Query the age index for the display age range, caching the result until the range or layers
+        change. Code that edits, hides or reorders layers in place calls invalidate_layer_cache().
+        """
+        # The layer list can also be replaced wholesale, so guard the cache with its identity and size
+        key = (self.display_age_range, id(self.layers), len(self.layers))
+        if self._visible_layers_cache is not None and self._visible_layers_cache[0] == key:
+            return self._visible_layers_cache
+
+        if self._layer_age_index is None or self._layer_age_index.layers is not self.layers:
+            self._layer_age_index = LayerAgeIndex(self.layers)
+
+        from_age, to_age = self.display_age_range
+        indices = [i for i in self._layer_age_index.query_full(from_age, to_age) if self.layers[i].visible]
+        by_age = [self.layers[i] for i in indices]
+        positions = sorted(indices)
+        in_order = [self.layers[i] for i in positions]
+
+        self._visible_layers_cache = (key, by_age, in_order, positions)
+        return self._visible_layers_cache
+
+    def get_visible_layers(self):
+        """Visible layers fully inside the display age range, in their original order"""
+        return self._query_visible_layers()[2]
+
+    def get_visible_layers_by_age(self):
+        """Visible layers fully inside the display age range, sorted by young age"""
+        return self._query_visible_layers()[1]
+
+    def _lap(self, phase):
+        """End a paint phase for the profiler, if one is attached"""
+        if self.paint_profiler is not None:
+            self.paint_profiler.lap(phase)
+
+    def _record_column_layout(self, columns):
+        """Remember where the columns shown in this render went, as {name: (x, width)}"""
+        self.column_layout = {name: (x, width) for name, (x, width) in columns.items() if x is not None}
+
+    def layer_position(self, layer):
+        """Index in self.layers of a layer drawn in the last render, or -1, from the hit index"""
+        return self.get_hit_index().position_of(layer)
+
+    def get_hit_index(self):
+        """Index of the layer extents from the last render, built on the first lookup after it"""
+        if self._hit_index is None:
+            _, _, in_order, positions = self._query_visible_layers()
+            visible_positions = {id(layer): position for layer, position in zip(in_order, positions)}
+            self._hit_index = LayerHitIndex(self.layer_extents, self.extent_layers,
+                                            [visible_positions.get(id(layer), -1) for layer in self.extent_layers])
+        return self._hit_index
+
+    def hit_test(self, x, y):
+        """
+        Layer and column under a point of the last render, as (layer, column name, top, bottom),
+        or None. Column names are the keys of column_layout, e.g. 'periods' or 'pattern'.
+        """
+        hit = self.get_hit_index().layer_at(y)
+        if hit is None:
+            return None
+        layer, top, bottom = hit
+
+        for name, (column_x, column_width) in self.column_layout.items():
+            if column_x <= x < column_x + column_width:
+                return layer, name, top, bottom
+        return None
+
+    def unit_at(self, layer, level, y, top, bottom):
+        """
+        Chronostratigraphic unit of a level ('eras', 'periods', ...) drawn at y within a layer's
+        extent, or None
+        """
+        if layer.young_age is None or layer.old_age is None or bottom <= top:
+            return None
+        # Units are drawn in proportion to the part of the layer's age span they cover
+        age = layer.young_age + (y - top) / (bottom - top) * (layer.old_age - layer.young_age)
+        return self.get_timescale().unit_at(age, level)
+
+    def get_timescale(self):
+        """Mapper for the column's timescale version"""
+        return self.chronomap.get_version(self.timescale_version)
+
+    def layers_affected_by(self, changes):
+        """Layers whose age range overlaps any timescale change from ChronostratigraphicMapper.reload_files()"""
+        affected = []
+        for layer in self.layers:
+            if layer.young_age is None or layer.old_age is None:
+                continue
+            if any(layer.young_age < change['end_age'] and layer.old_age > change['start_age'] for change in changes):
+                affected.append(layer)
+        return affected
+
+    def get_texture_brush(self, texture_id):
+        """Get a specific texture brush by ID"""
+        return self.texture_brushes.get(texture_id, None)
+
+    def load_texture(self, scale_factor=1.0, crop_pixels=5):
+        """Load and cache the texture brush with scaling and cropping"""
+        self.texture_brushes = load_texture_brushes(scale_factor, crop_pixels)
+
+    def get_depth_range(self, visible_layers):
+        """Calculate the total depth range needed for display"""
+        if not self.layers:
+            return 0, 0
+        
+        min_depth = min(layer.formation_top for layer in visible_layers)
+        max_depth = max(layer.formation_top + layer.thickness for layer in visible_layers)
+        
+        return min_depth, max_depth
+    
+    def get_age_range(self, visible_layers):
+        """Calculate the total age range needed for display"""
+        if not self.layers:
+            return 0.0, 0.0
+        
+        all_ages = []
+        for layer in visible_layers:
+            all_ages.extend([layer.young_age, layer.old_age])
+        
+        return min(all_ages), max(all_ages)
+    
+    def layer_intersects_age_range_partial(self, layer, from_age, to_age):
+        # Layer intersects if:
+        # - Layer's young age is less than display range's old age AND
+        # - Layer's old age is greater than display range's young age
+        return layer.young_age < to_age and layer.old_age > from_age
+    
+    def layer_intersects_age_range_full(self, layer, from_age, to_age):     
+        # Layer must be completely within the age range
+        return layer.young_age >= from_age and layer.old_age <= to_age
+    
+    def paint_scaling_mode_0(self, painter):       
+        # Filter for only visible layers AND layers within the display age range
+        visible_layers = self.get_visible_layers()
+        self._lap("filtering")
+
+        # If no visible layers, don't render anything
+        if not visible_layers:
+            return
+        
+        # Check if any layer lacks formation_top information
+        layers_without_formation_top = [layer for layer in visible_layers if layer.formation_top is None]
+        if layers_without_formation_top:
+            # Draw error message
+            painter.setPen(QPen(Qt.black, 1))
+            painter.drawText(self.rect().center(), "No formation top information in layers")
+            return
+    
+        # Column dimensions
+        era_col_width = DEFAULT_COLUMN_SIZE  # Width for era column
+        period_col_width = DEFAULT_COLUMN_SIZE # Width for period column
+        epoch_col_width = DEFAULT_COLUMN_SIZE # Width for epoch column
+        age_col_width = DEFAULT_COLUMN_SIZE # Width for age column
+        col_width = DEFAULT_COLUMN_SIZE      # Width for main column
+        pattern_col_width = DEFAULT_COLUMN_SIZE # Width for pattern column
+        depositional_col_width = DEFAULT_COLUMN_SIZE # Width for depositional environment column
+        
+        # Check if we should show depositional environment column
+        # Only show if at least one layer has something other than UNKNOWN_NONE
+        show_depositional_column = any(
+            hasattr(layer, 'dep_env') and 
+            layer.dep_env is not None and
+            layer.dep_env != DepositionalEnvironment.UNKNOWN_NONE
+            for layer in visible_layers
+        )
+
+        # Calculate x positions based on enabled options
+        current_x = 0
+
+        # Era column
+        if self.display_options['show_eras']:
+            era_col_x = current_x
+            current_x += era_col_width
+        else:
+            era_col_x = None
+
+        # Period column
+        if self.display_options['show_periods']:
+            period_col_x = current_x
+            current_x += period_col_width
+        else:
+            period_col_x = None
+
+        # Epoch column
+        if self.display_options['show_epochs']:
+            epoch_col_x = current_x
+            current_x += epoch_col_width
+        else:
+            epoch_col_x = None
+
+        # Age column
+        if self.display_options['show_ages']:
+            age_col_x = current_x
+            current_x += age_col_width
+        else:
+            age_col_x = None
+
+        # Main column always comes after all geological time columns
+        col_x = current_x
+
+        # Pattern column comes after main column
+        pattern_col_x = col_x + col_width
+
+        # Depositional column comes after pattern column
+        if show_depositional_column:
+            depoitional_col_x = pattern_col_x + pattern_col_width
+        else:
+            depoitional_col_x = None
+
+        self._record_column_layout({
+            'eras': (era_col_x, era_col_width),
+            'periods': (period_col_x, period_col_width),
+            'epochs': (epoch_col_x, epoch_col_width),
+            'ages': (age_col_x, age_col_width),
+            'layer': (col_x, col_width),
+            'pattern': (pattern_col_x, pattern_col_width),
+            'dep_env': (depoitional_col_x, depositional_col_width)
+        })
+
+        start_y = COLUMN_TOP
+        available_height = self.height() - COLUMN_VERTICAL_SPACE
+        self.column_top = start_y
+        
+        # Get depth range and calculate scaling
+        min_depth, max_depth = self.get_depth_range(visible_layers)
+        total_depth_range = max_depth - min_depth
+        
+        if total_depth_range <= 0:
+            total_depth_range = 1  # Avoid division by zero
+        
+        scale = available_height / total_depth_range
+        
+        # Draw title
+        painter.setPen(QPen(Qt.black, 1))
+        title_font = QFont()
+        title_font.setPointSize(14)
+        title_font.setBold(True)
+        painter.setFont(title_font)
+        painter.drawText(0, 30, "Stratigraphic Column")
+
+        self._lap("layout")
+        # Sort layers by formation_top to ensure proper order
+        sorted_layers = sorted(visible_layers, key=lambda l: l.formation_top)
+        self._lap("sorting")
+        
+        # Draw column backgrounds (empty spaces)
+        painter.setPen(QPen(Qt.black, 1))
+        painter.setBrush(QBrush(Qt.white))
+        
+        # Draw background for all columns
+        column_positions = []
+        if era_col_x is not None:
+            column_positions.append((era_col_x, era_col_width))
+        if period_col_x is not None:
+            column_positions.append((period_col_x, period_col_width))
+        if epoch_col_x is not None:
+            column_positions.append((epoch_col_x, epoch_col_width))
+        if age_col_x is not None:
+            column_positions.append((age_col_x, age_col_width))
+        column_positions.append((col_x, col_width))
+        column_positions.append((pattern_col_x, pattern_col_width))
+        if depoitional_col_x is not None:
+            column_positions.append((depoitional_col_x, depositional_col_width))
+        
+        # Calculate total height based on show_formation_gap setting
+        if self.show_formation_gap:
+            # Use actual depth range for scaling
+            total_display_height = available_height
+            scale = available_height / total_depth_range
+        else:
+            # Use cumulative thickness for scaling (no gaps)
+            total_thickness = sum(layer.thickness for layer in sorted_layers)
+            if total_thickness <= 0:
+                total_thickness = 1  # Avoid division by zero
+            scale = available_height / total_thickness
+            total_display_height = available_height
+        
+        for col_x_pos, col_width_pos in column_positions:
+            painter.drawRect(col_x_pos, start_y, col_width_pos, total_display_height)
+
+        self._lap("layout")
+
+        # Age columns shown, whose bands continue across layers until the unit changes or there's a gap
+        age_columns = [(age_name, age_col_x_pos, age_col_width_pos) for age_name, age_col_x_pos, age_col_width_pos in (
+            (StratigraphicAgeTypes.ERAS.value, era_col_x, era_col_width),
+            (StratigraphicAgeTypes.PERIODS.value, period_col_x, period_col_width),
+            (StratigraphicAgeTypes.EPOCHS.value, epoch_col_x, epoch_col_width),
+            (StratigraphicAgeTypes.AGES.value, age_col_x, age_col_width)
+        ) if age_col_x_pos is not None]
+        age_bands = {age_name: [] for age_name, _, _ in age_columns}
+
+        # Draw each layer at its correct position
+        current_sequential_y = start_y  # For sequential positioning when show_formation_gap is False
+        
+        for layer in sorted_layers:
+            if self.show_formation_gap:
+                # Calculate layer position based on formation_top (with gaps for formation gaps)
+                layer_top_y = start_y + ((layer.formation_top - min_depth) * scale)
+                layer_height = layer.thickness * scale
+            else:
+                # Position layers sequentially without gaps
+                layer_top_y = current_sequential_y
+                layer_height = layer.thickness * scale
+                current_sequential_y += layer_height
+            self.layer_extents.append((layer_top_y, layer_top_y + layer_height))
+            self.extent_layers.append(layer)
+            
+            # Get layer data
+            layer_name = layer.name
+            layer_thickness = layer.thickness
+            layer_rock_type = layer.rock_type
+            layer_formation_top = layer.formation_top
+            layer_young_age = layer.young_age
+            layer_old_age = layer.old_age
+            layer_strat_ages = self.get_timescale().map_age_to_chronostratigraphy(layer_young_age, layer_old_age)
+            
+            # Add this layer's part of each age column to the bands, drawn once all layers are placed
+            for age_name, _, _ in age_columns:
+                merge_age_segments(age_bands[age_name], self.age_column_segments(
+                    layer, layer_strat_ages, layer_top_y, layer_height, age_name))
+            self._lap("chrono mapping")
+            
+            # Draw main layer rectangle
+            painter.setPen(QPen(Qt.black, 1))
+            painter.setBrush(QBrush(Qt.white))
+            painter.drawRect(col_x, layer_top_y, col_width, layer_height)
+            self._lap("fills")
+            
+            # Draw layer label
+            painter.setPen(QPen(Qt.black, 1))
+            font = QFont()
+            font.setPointSize(10)
+            painter.setFont(font)
+            
+            text_rect = QRect(col_x + 5, layer_top_y + 5, col_width - 10, layer_height - 10)
+            
+            if self.scaling_mode == ScalingMode.FORMATION_TOP_THICKNESS:
+                painter.drawText(text_rect, Qt.AlignLeft | Qt.AlignTop | Qt.TextWordWrap,
+                        f"{layer_name}\n{layer.rock_type_display_name}\n{layer_thickness}m\nTop: {layer_formation_top}m")
+            else:
+                painter.drawText(text_rect, Qt.AlignLeft | Qt.AlignTop | Qt.TextWordWrap,
+                        f"{layer_name}\n{layer.rock_type_display_name}\n{layer_thickness}m")
+            
+            self._lap("text")
+
+            # Draw pattern column for this layer
+            self.draw_pattern_column(painter, layer, 
+                                pattern_col_x, layer_top_y, pattern_col_width, layer_height, RockProperties.get_pattern(layer_rock_type))
+            
+            # Draw the depositional environment for this layer
+            if depoitional_col_x is not None:
+                self.draw_depositional_environment_column(painter, layer, depoitional_col_x, layer_top_y, depositional_col_width, layer_height)
+            self._lap("fills")
+
+        self.draw_age_bands(painter, age_columns, age_bands)
+        self._lap("age columns")
+        
+        self.overlay_igneous_intrusion_column(painter)
+        self._lap("intrusion overlay")
+
+        if self.scaling_mode == ScalingMode.FORMATION_TOP_THICKNESS:
+            # Draw depth scale (position it after the pattern column)
+            painter.setPen(QPen(Qt.black, 1))
+
+            if depoitional_col_x is not None:
+                scale_x = depoitional_col_x + depositional_col_width + 20
+            else:
+                scale_x = pattern_col_x + pattern_col_width + 20
+
+            painter.drawLine(scale_x, start_y, scale_x, start_y + total_display_height)
+            
+            # Add scale markers showing actual formation depths for each layer
+            painter.setPen(QPen(Qt.black, 1))
+            font = QFont()
+            font.setPointSize(9)
+            painter.setFont(font)
+            
+            # Draw depth markers for each layer individually
+            current_sequential_y_for_markers = start_y  # Track sequential position for markers
+            
+            if self.show_formation_gap:
+                # When showing formation gaps, use actual positions
+                for layer in sorted_layers:
+                    layer_top_y_marker = start_y + ((layer.formation_top - min_depth) * scale)
+                    layer_height_marker = layer.thickness * scale
+                    layer_bottom_depth = layer.formation_top + layer.thickness
+                    layer_bottom_y_marker = layer_top_y_marker + layer_height_marker
+                    
+                    # Draw marker at top of layer (formation_top)
+                    painter.drawLine(scale_x, layer_top_y_marker, scale_x + 10, layer_top_y_marker)
+                    painter.drawText(scale_x + 15, layer_top_y_marker + 5, f"{layer.formation_top:.0f}m")
+                    
+                    # Draw marker at bottom of layer (formation_top + thickness)
+                    painter.drawLine(scale_x, layer_bottom_y_marker, scale_x + 10, layer_bottom_y_marker)
+                    painter.drawText(scale_x + 15, layer_bottom_y_marker + 5, f"{layer_bottom_depth:.0f}m")
+            else:
+                # When not showing formation gaps, position markers at sequential positions
+                # but ensure no overlap by using minimum spacing
+                min_text_spacing = 15  # Minimum pixels between text labels
+                last_text_y = start_y - min_text_spacing  # Track last text position
+                
+                for layer in sorted_layers:
+                    layer_height_marker = layer.thickness * scale
+                    layer_bottom_depth = layer.formation_top + layer.thickness
+                    
+                    # Draw marker at top of layer
+                    painter.drawLine(scale_x, current_sequential_y_for_markers, scale_x + 10, current_sequential_y_for_markers)
+                    
+                    # Position text to avoid overlap
+                    desired_text_y = current_sequential_y_for_markers + 5
+                    if desired_text_y < last_text_y + min_text_spacing:
+                        text_y = last_text_y + min_text_spacing
+                    else:
+                        text_y = desired_text_y
+                    
+                    painter.drawText(scale_x + 15, text_y, f"{layer.formation_top:.0f}m")
+                    last_text_y = text_y
+                    
+                    # Move to bottom of current layer
+                    current_sequential_y_for_markers += layer_height_marker
+                    
+                    # Draw marker at bottom of layer
+                    painter.drawLine(scale_x, current_sequential_y_for_markers, scale_x + 10, current_sequential_y_for_markers)
+                    
+                    # Position bottom text to avoid overlap
+                    desired_text_y = current_sequential_y_for_markers + 5
+                    if desired_text_y < last_text_y + min_text_spacing:
+                        text_y = last_text_y + min_text_spacing
+                    else:
+                        text_y = desired_text_y
+                    
+                    painter.drawText(scale_x + 15, text_y, f"{layer_bottom_depth:.0f}m")
+                    last_text_y = text_y
+            self._lap("depth scale")
+
+    def paint_scaling_mode_2(self, painter):       
+        # Filter for only visible layers AND layers within the display age range
+        visible_layers = self.get_visible_layers_by_age()
+        self._lap("filtering")
+
+        # If no visible layers, don't render anything
+        if not visible_layers:
+            return
+
+        # Column dimensions
+        era_col_width = DEFAULT_COLUMN_SIZE  # Width for era column
+        period_col_width = DEFAULT_COLUMN_SIZE # Width for period column
+        epoch_col_width = DEFAULT_COLUMN_SIZE # Width for epoch column
+        age_col_width = DEFAULT_COLUMN_SIZE # Width for age column
+        col_width = DEFAULT_COLUMN_SIZE      # Width for main column
+        pattern_col_width = DEFAULT_COLUMN_SIZE # Width for pattern column
+        depositional_col_width = DEFAULT_COLUMN_SIZE # Width for depositional environment column
+        
+        # Check if we should show depositional environment column
+        # Only show if at least one layer has something other than UNKNOWN_NONE
+        show_depositional_column = any(
+            hasattr(layer, 'dep_env') and 
+            layer.dep_env is not None and
+            layer.dep_env != DepositionalEnvironment.UNKNOWN_NONE
+            for layer in visible_layers
+        )
+
+        # Calculate x positions based on enabled options
+        current_x = 0
+
+        # Era column
+        if self.display_options['show_eras']:
+            era_col_x = current_x
+            current_x += era_col_width
+        else:
+            era_col_x = None
+
+        # Period column
+        if self.display_options['show_periods']:
+            period_col_x = current_x
+            current_x += period_col_width
+        else:
+            period_col_x = None
+
+        # Epoch column
+        if self.display_options['show_epochs']:
+            epoch_col_x = current_x
+            current_x += epoch_col_width
+        else:
+            epoch_col_x = None
+
+        # Age column
+        if self.display_options['show_ages']:
+            age_col_x = current_x
+            current_x += age_col_width
+        else:
+            age_col_x = None
+
+        # Main column always comes after all geological time columns
+        col_x = current_x
+
+        # Pattern column comes after main column
+        pattern_col_x = col_x + col_width
+
+        # Depositional column comes after pattern column
+        if show_depositional_column:
+            depoitional_col_x = pattern_col_x + pattern_col_width
+        else:
+            depoitional_col_x = None
+
+        self._record_column_layout({
+            'eras': (era_col_x, era_col_width),
+            'periods': (period_col_x, period_col_width),
+            'epochs': (epoch_col_x, epoch_col_width),
+            'ages': (age_col_x, age_col_width),
+            'layer': (col_x, col_width),
+            'pattern': (pattern_col_x, pattern_col_width),
+            'dep_env': (depoitional_col_x, depositional_col_width)
+        })
+
+        start_y = COLUMN_TOP
+        available_height = self.height() - COLUMN_VERTICAL_SPACE
+        self.column_top = start_y
+        
+        # Draw title
+        painter.setPen(QPen(Qt.black, 1))
+        title_font = QFont()
+        title_font.setPointSize(14)
+        title_font.setBold(True)
+        painter.setFont(title_font)
+        painter.drawText(0, 30, "Stratigraphic Column")
+
+        # Layers are already sorted by age to ensure proper chronological order
+        sorted_layers = visible_layers
+        
+        # Calculate total thickness for scaling
+        total_thickness = sum(layer.thickness for layer in sorted_layers)
+        if total_thickness <= 0:
+            total_thickness = 1  # Avoid division by zero
+        
+        # Scale based on thickness only
+        scale = available_height / total_thickness
+        total_display_height = available_height
+        
+        # Draw column backgrounds (empty spaces)
+        painter.setPen(QPen(Qt.black, 1))
+        painter.setBrush(QBrush(Qt.white))
+        
+        # Draw background for all columns
+        column_positions = []
+        if era_col_x is not None:
+            column_positions.append((era_col_x, era_col_width))
+        if period_col_x is not None:
+            column_positions.append((period_col_x, period_col_width))
+        if epoch_col_x is not None:
+            column_positions.append((epoch_col_x, epoch_col_width))
+        if age_col_x is not None:
+            column_positions.append((age_col_x, age_col_width))
+        column_positions.append((col_x, col_width))
+        column_positions.append((pattern_col_x, pattern_col_width))
+        
+        if depoitional_col_x is not None:
+            column_positions.append((depoitional_col_x, depositional_col_width))
+        
+        for col_x_pos, col_width_pos in column_positions:
+            painter.drawRect(col_x_pos, start_y, col_width_pos, total_display_height)
+
+        self._lap("layout")
+
+        # Age columns shown, whose bands continue across layers until the unit changes or there's a gap
+        age_columns = [(age_name, age_col_x_pos, age_col_width_pos) for age_name, age_col_x_pos, age_col_width_pos in (
+            (StratigraphicAgeTypes.ERAS.value, era_col_x, era_col_width),
+            (StratigraphicAgeTypes.PERIODS.value, period_col_x, period_col_width),
+            (StratigraphicAgeTypes.EPOCHS.value, epoch_col_x, epoch_col_width),
+            (StratigraphicAgeTypes.AGES.value, age_col_x, age_col_width)
+        ) if age_col_x_pos is not None]
+        age_bands = {age_name: [] for age_name, _, _ in age_columns}
+
+        # Draw each layer sequentially based on chronological order
+        current_y = start_y
+        
+        for layer in sorted_layers:
+            # Calculate layer height based on thickness only
+            layer_height = layer.thickness * scale
+            layer_top_y = current_y
+            self.layer_extents.append((layer_top_y, layer_top_y + layer_height))
+            self.extent_layers.append(layer)
+            
+            # Get layer data
+            layer_name = layer.name
+            layer_thickness = layer.thickness
+            layer_rock_type = layer.rock_type
+            layer_young_age = layer.young_age
+            layer_old_age = layer.old_age
+            layer_strat_ages = self.get_timescale().map_age_to_chronostratigraphy(layer_young_age, layer_old_age)
+            
+            # Add this layer's part of each age column to the bands, drawn once all layers are placed
+            for age_name, _, _ in age_columns:
+                merge_age_segments(age_bands[age_name], self.age_column_segments(
+                    layer, layer_strat_ages, layer_top_y, layer_height, age_name))
+            self._lap("chrono mapping")
+            
+            # Draw main layer rectangle
+            painter.setPen(QPen(Qt.black, 1))
+            painter.setBrush(QBrush(Qt.white))
+            painter.drawRect(col_x, layer_top_y, col_width, layer_height)
+            self._lap("fills")
+            
+            # Draw layer label
+            painter.setPen(QPen(Qt.black, 1))
+            font = QFont()
+            font.setPointSize(10)
+            painter.setFont(font)
+            
+            text_rect = QRect(col_x + 5, layer_top_y + 5, col_width - 10, layer_height - 10)
+            
+            # Display layer info with age information instead of formation depth
+            painter.drawText(text_rect, Qt.AlignLeft | Qt.AlignTop | Qt.TextWordWrap,
+                    f"{layer_name}\n{layer.rock_type_display_name}\n{layer_thickness}m\nAge: {layer_young_age}-{layer_old_age} Ma")
+            
+            self._lap("text")
+
+            # Draw pattern column for this layer
+            self.draw_pattern_column(painter, layer, 
+                                pattern_col_x, layer_top_y, pattern_col_width, layer_height, RockProperties.get_pattern(layer_rock_type))
+            
+            # Draw the depositional environment for this layer
+            if depoitional_col_x is not None:
+                self.draw_depositional_environment_column(painter, layer, depoitional_col_x, layer_top_y, depositional_col_width, layer_height)
+            self._lap("fills")
+            
+            # Move to next layer position
+            current_y += layer_height
+
+        self.draw_age_bands(painter, age_columns, age_bands)
+        self._lap("age columns")
+        
+        self.overlay_igneous_intrusion_column(painter)
+        self._lap("intrusion overlay")
+
+    def paint_scaling_mode_1(self, painter):
+        # Filter for only visible layers AND layers within the display age range
+        visible_layers = self.get_visible_layers_by_age()
+        self._lap("filtering")
+        
+        # If no visible layers, don't render anything
+        if not visible_layers:
+            return
+        
+        # Column dimensions
+        era_col_width = DEFAULT_COLUMN_SIZE  # Width for era column
+        period_col_width = DEFAULT_COLUMN_SIZE # Width for period column
+        epoch_col_width = DEFAULT_COLUMN_SIZE # Width for epoch column
+        age_col_width = DEFAULT_COLUMN_SIZE # Width for age column
+        col_width = DEFAULT_COLUMN_SIZE      # Width for main column
+        pattern_col_width = DEFAULT_COLUMN_SIZE # Width for pattern column
+        depositional_col_width = DEFAULT_COLUMN_SIZE # Width for depositional environment column
+        
+        # Helper function to check if a layer has valid depositional environment
+        def has_valid_depositional_env(layer):
+            if not hasattr(layer, 'dep_env'):
+                return False
+            dep_env = layer.dep_env
+            if dep_env is None:
+                return False
+            # Handle both enum instances and string/dict representations
+            if isinstance(dep_env, DepositionalEnvironment):
+                return dep_env != DepositionalEnvironment.UNKNOWN_NONE
+            elif isinstance(dep_env, str):
+                return dep_env != 'UNKNOWN_NONE' and dep_env != 'Unknown/None'
+            elif isinstance(dep_env, dict):
+                return dep_env.get('name') != 'UNKNOWN_NONE' and dep_env.get('display_name') != 'Unknown/None'
+            return False
+        
+        # Check if we should show depositional environment column
+        # Only show if at least one layer has something other than UNKNOWN_NONE
+        show_depositional_column = any(has_valid_depositional_env(layer) for layer in visible_layers)
+
+        # Calculate x positions based on enabled options
+        current_x = 0
+
+        # Era column
+        if self.display_options['show_eras']:
+            era_col_x = current_x
+            current_x += era_col_width
+        else:
+            era_col_x = None
+
+        # Period column
+        if self.display_options['show_periods']:
+            period_col_x = current_x
+            current_x += period_col_width
+        else:
+            period_col_x = None
+
+        # Epoch column
+        if self.display_options['show_epochs']:
+            epoch_col_x = current_x
+            current_x += epoch_col_width
+        else:
+            epoch_col_x = None
+
+        # Age column
+        if self.display_options['show_ages']:
+            age_col_x = current_x
+            current_x += age_col_width
+        else:
+            age_col_x = None
+
+        # Main column always comes after all geological time columns
+        col_x = current_x
+
+        # Pattern column comes after main column
+        pattern_col_x = col_x + col_width
+
+        # Depositional column comes after pattern column (only if we're showing it)
+        if show_depositional_column:
+            depoitional_col_x = pattern_col_x + pattern_col_width
+        else:
+            depoitional_col_x = None
+
+        self._record_column_layout({
+            'eras': (era_col_x, era_col_width),
+            'periods': (period_col_x, period_col_width),
+            'epochs': (epoch_col_x, epoch_col_width),
+            'ages': (age_col_x, age_col_width),
+            'layer': (col_x, col_width),
+            'pattern': (pattern_col_x, pattern_col_width),
+            'dep_env': (depoitional_col_x, depositional_col_width)
+        })
+
+        start_y = COLUMN_TOP
+        available_height = self.height() - COLUMN_VERTICAL_SPACE
+        self.column_top = start_y
+        
+        # Layers are already sorted by age - youngest (lowest age value) at top, oldest at bottom
+        sorted_layers = visible_layers
+        
+        # Calculate total age span across all layers (ignoring gaps)
+        total_age_span = sum(layer.old_age - layer.young_age for layer in sorted_layers)
+        
+        if total_age_span <= 0:
+            total_age_span = 1  # Avoid division by zero
+        
+        scale = available_height / total_age_span
+        
+        # Draw title
+        painter.setPen(QPen(Qt.black, 1))
+        title_font = QFont()
+        title_font.setPointSize(14)
+        title_font.setBold(True)
+        painter.setFont(title_font)
+        painter.drawText(0, 30, "Stratigraphic Column")
+        
+        # Draw column backgrounds (empty spaces)
+        painter.setPen(QPen(Qt.black, 1))
+        painter.setBrush(QBrush(Qt.white))
+        
+        # Draw background for all columns
+        column_positions = []
+        if era_col_x is not None:
+            column_positions.append((era_col_x, era_col_width))
+        if period_col_x is not None:
+            column_positions.append((period_col_x, period_col_width))
+        if epoch_col_x is not None:
+            column_positions.append((epoch_col_x, epoch_col_width))
+        if age_col_x is not None:
+            column_positions.append((age_col_x, age_col_width))
+        column_positions.append((col_x, col_width))
+        column_positions.append((pattern_col_x, pattern_col_width))
+        if depoitional_col_x is not None:
+            column_positions.append((depoitional_col_x, depositional_col_width))
+        
+        for col_x_pos, col_width_pos in column_positions:
+            painter.drawRect(col_x_pos, start_y, col_width_pos, available_height)
+
+        # Pre-calculate which layers have unconformities (age gaps)
+        gap_threshold = 1.0  # Million years - adjust as needed
+        layers_with_gaps = set()  # Will contain indices of layers that have gaps above them
+        wavy_boundaries = []  # Store positions where wavy boundaries should be drawn
+        
+        for i in range(1, len(sorted_layers)):
+            previous_layer = sorted_layers[i - 1]
+            current_layer = sorted_layers[i]
+            age_gap = current_layer.young_age - previous_layer.old_age
+            
+            if age_gap > gap_threshold:
+                layers_with_gaps.add(i)
+
+        # Calculate layer positions and store wavy boundary positions
+        current_y = start_y
+        layer_positions = []
+        
+        for i, layer in enumerate(sorted_layers):
+            # Calculate layer height based on age span (old_age - young_age)
+            layer_age_span = layer.old_age - layer.young_age
+            layer_height = layer_age_span * scale
+            
+            # Ensure minimum height for visibility
+            if layer_height < 5:
+                layer_height = 5
+            
+            layer_top_y = current_y
+            self.layer_extents.append((layer_top_y, layer_top_y + layer_height))
+            self.extent_layers.append(layer)
+            
+            # Store layer position info
+            has_gap_above = i in layers_with_gaps
+            has_gap_below = (i + 1) in layers_with_gaps
+            
+            layer_positions.append({
+                'layer': layer,
+                'index': i,
+                'top_y': layer_top_y,
+                'height': layer_height,
+                'has_gap_above': has_gap_above,
+                'has_gap_below': has_gap_below
+            })
+            
+            # Move to next position
+            current_y += layer_height
+            
+            # Store wavy boundary position if there's a gap below
+            if has_gap_below:
+                age_gap = sorted_layers[i + 1].young_age - layer.old_age
+                wavy_boundaries.append({
+                    'y_position': current_y,
+                    'age_gap': age_gap
+                })
+
+        self._lap("layout")
+
+        # First pass: Draw all layer contents (fills, age columns, text)
+        for layer_info in layer_positions:
+            layer = layer_info['layer']
+            layer_top_y = layer_info['top_y']
+            layer_height = layer_info['height']
+            has_gap_above = layer_info['has_gap_above']
+            has_gap_below = layer_info['has_gap_below']
+            
+            # Get layer data
+            layer_name = layer.name
+            layer_rock_type = layer.rock_type
+            layer_young_age = layer.young_age
+            layer_old_age = layer.old_age
+            layer_min_thickness = layer.min_thickness
+            layer_max_thickness = layer.max_thickness
+            layer_strat_ages = self.get_timescale().map_age_to_chronostratigraphy(layer_young_age, layer_old_age)
+            self._lap("chrono mapping")
+            
+            # Helper function to draw age column content
+            def draw_age_column_content(col_x, col_width, age_type_name):
+                if col_x is None:
+                    return []
+                
+                ages = layer_strat_ages.get(age_type_name, [])
+                if not ages:
+                    return []
+                
+                layer_age_range = layer_old_age - layer_young_age
+                if layer_age_range <= 0:
+                    return []
+                
+                age_rectangles = []
+                for age in ages:
+                    age_name_text = age.get('name', 'Unknown')
+                    age_young = age.get('start_age', layer_young_age)
+                    age_old = age.get('end_age', layer_old_age)
+                    
+                    overlap_young = max(layer_young_age, age_young)
+                    overlap_old = min(layer_old_age, age_old)
+                    
+                    if overlap_old <= overlap_young:
+                        continue
+                    
+                    top_proportion = (overlap_young - layer_young_age) / layer_age_range
+                    bottom_proportion = (overlap_old - layer_young_age) / layer_age_range
+                    
+                    age_y = layer_top_y + (top_proportion * layer_height)
+                    age_height = (bottom_proportion - top_proportion) * layer_height
+                    
+                    age_rectangles.append({
+                        'name': age_name_text,
+                        'y': age_y,
+                        'height': age_height,
+                        'color': age.get('color', '#c8c8c8'),
+                        'overlap_young': overlap_young,
+                        'overlap_old': overlap_old
+                    })
+                    
+                    # Fill age rectangle with color
+                    color = QColor(age.get('color', '#c8c8c8'))
+                    painter.setBrush(QBrush(color))
+                    painter.setPen(Qt.NoPen)
+                    painter.drawRect(QRectF(col_x, age_y, col_width, age_height))
+                
+                return age_rectangles
+            
+            # Draw all age columns content
+            era_rects = draw_age_column_content(era_col_x, era_col_width, StratigraphicAgeTypes.ERAS.value)
+            period_rects = draw_age_column_content(period_col_x, period_col_width, StratigraphicAgeTypes.PERIODS.value)
+            epoch_rects = draw_age_column_content(epoch_col_x, epoch_col_width, StratigraphicAgeTypes.EPOCHS.value)
+            age_rects = draw_age_column_content(age_col_x, age_col_width, StratigraphicAgeTypes.AGES.value)
+            
+            # Store age rectangles for text drawing
+            layer_info['era_rects'] = era_rects
+            layer_info['period_rects'] = period_rects
+            layer_info['epoch_rects'] = epoch_rects
+            layer_info['age_rects'] = age_rects
+            
+            # Fill main layer rectangle (no borders yet)
+            painter.setBrush(QBrush(Qt.white))
+            painter.setPen(Qt.NoPen)
+            painter.drawRect(col_x, layer_top_y, col_width, layer_height)
+            
+            # Fill pattern column rectangle (no borders yet)
+            texture_brush = self.get_texture_brush(RockProperties.get_pattern(layer_rock_type))
+            if texture_brush:
+                painter.setBrush(texture_brush)
+            else:
+                painter.setBrush(QBrush(Qt.NoBrush))
+            painter.drawRect(pattern_col_x, layer_top_y, pattern_col_width, layer_height)
+            
+            # Fill depositional environment rectangle (no borders yet) - only if column is shown and layer has valid dep env
+            if depoitional_col_x is not None and has_valid_depositional_env(layer):
+                layer_dep_env_color = layer.dep_env.color
+                painter.setBrush(QBrush(QColor(layer_dep_env_color)))
+                painter.drawRect(depoitional_col_x, layer_top_y, depositional_col_width, layer_height)
+            
+            self._lap("fills")
+
+            # Draw layer label
+            painter.setPen(QPen(Qt.black, 1))
+            font = QFont()
+            font.setPointSize(10)
+            painter.setFont(font)
+            
+            text_rect = QRect(col_x + 5, layer_top_y + 5, col_width - 10, layer_height - 10)
+            
+            # Display age information instead of depth/thickness
+            age_span_text = f"{layer_young_age:.1f} - {layer_old_age:.1f} Ma"
+
+            if layer_min_thickness is not None and layer_max_thickness is not None:
+                thickness_span_text = f"{layer_min_thickness}m - {layer_max_thickness}m"
+            else:
+                thickness_span_text = ""
+                
+            painter.drawText(text_rect, Qt.AlignLeft | Qt.AlignTop | Qt.TextWordWrap,
+                        f"{layer_name}\n{layer.rock_type_display_name}\n{thickness_span_text}\n{age_span_text}")
+            
+            # Draw depositional environment text - only if column is shown and layer has valid dep env
+            if depoitional_col_x is not None and has_valid_depositional_env(layer):
+                layer_dep_env_name = layer.dep_env.display_name
+                layer_dep_env_color = layer.dep_env.color
+
+                text_color = get_contrasting_color_from_hex(layer_dep_env_color) 
+                painter.setPen(QPen(text_color, 1))  
+                dep_text_rect = QRect(depoitional_col_x + 5, layer_top_y + 5, depositional_col_width - 10, layer_height - 10)
+                painter.drawText(dep_text_rect, Qt.AlignLeft | Qt.AlignTop | Qt.TextWordWrap,
+                                    f"{layer_dep_env_name.upper()}")
+
+            # Draw age column text labels
+            def draw_age_text_labels(age_rectangles, col_x, col_width):
+                if not age_rectangles or col_x is None:
+                    return
+                
+                painter.setPen(QPen(Qt.black, 1))
+                for age_rect in age_rectangles:
+                    age_y = age_rect['y']
+                    age_height = age_rect['height']
+                    age_name_text = age_rect['name']
+                    overlap_young = age_rect['overlap_young']
+                    overlap_old = age_rect['overlap_old']
+
+                    bg_color = age_rect.get('color', '#c8c8c8')
+
+                    # Calculate contrasting text color
+                    text_color = get_contrasting_color_from_hex(bg_color)
+                    painter.setPen(QPen(text_color, 1))
+                    
+                    if age_height > 15 and age_height <= 45:
+                        font = QFont()
+                        font.setPointSize(9)
+                        painter.setFont(font)
+                        text_rect = QRectF(col_x + 5, age_y + 2, col_width - 10, age_height - 4)
+                        painter.drawText(text_rect, Qt.AlignCenter, age_name_text)
+                    elif age_height > 45:
+                        font = QFont()
+                        third_height = age_height / 3
+                        top_rect = QRectF(col_x + 5, age_y + 2, col_width - 10, third_height)
+                        middle_rect = QRectF(col_x + 5, age_y + third_height, col_width - 10, third_height)
+                        bottom_rect = QRectF(col_x + 5, age_y + 2*third_height, col_width - 10, third_height)
+
+                        font.setPointSize(8)
+                        painter.setFont(font)
+                        age_text = f"{overlap_young} Ma"
+                        painter.drawText(top_rect, Qt.AlignCenter, age_text)
+
+                        font.setPointSize(9)
+                        painter.setFont(font)
+                        painter.drawText(middle_rect, Qt.AlignCenter, age_name_text)
+                        
+                        font.setPointSize(8)
+                        painter.setFont(font)
+                        age_text = f"{overlap_old} Ma"
+                        painter.drawText(bottom_rect, Qt.AlignCenter, age_text)
+            
+            # Draw text for all age columns
+            draw_age_text_labels(era_rects, era_col_x, era_col_width)
+            draw_age_text_labels(period_rects, period_col_x, period_col_width)
+            draw_age_text_labels(epoch_rects, epoch_col_x, epoch_col_width)
+            draw_age_text_labels(age_rects, age_col_x, age_col_width)
+            self._lap("text")
+
+        # Second pass: Draw all wavy boundaries
+        for boundary in wavy_boundaries:
+            self.draw_wavy_boundary(painter, boundary['y_position'], column_positions, boundary['age_gap'])
+        self._lap("wavy boundaries")
+
+        # Third pass: Draw all borders (avoiding wavy boundary areas)
+        for layer_info in layer_positions:
+            layer = layer_info['layer']
+            layer_top_y = layer_info['top_y']
+            layer_height = layer_info['height']
+            has_gap_above = layer_info['has_gap_above']
+            has_gap_below = layer_info['has_gap_below']
+            
+            # Helper function to draw age column borders
+            def draw_age_column_borders(col_x, col_width, age_rectangles):
+                if col_x is None:
+                    return
+                
+                painter.setPen(QPen(Qt.black, 1))
+                
+                # Always draw left and right borders for the full height
+                painter.drawLine(col_x, layer_top_y, col_x, layer_top_y + layer_height)
+                painter.drawLine(col_x + col_width, layer_top_y, col_x + col_width, layer_top_y + layer_height)
+                
+                # Draw top border only if there's no gap above
+                if not has_gap_above:
+                    painter.drawLine(col_x, layer_top_y, col_x + col_width, layer_top_y)
+                
+                # Draw bottom border only if there's no gap below
+                if not has_gap_below:
+                    painter.drawLine(col_x, layer_top_y + layer_height, col_x + col_width, layer_top_y + layer_height)
+                
+                # Draw internal horizontal borders between age periods only if there are no gaps
+                if not has_gap_above and not has_gap_below and len(age_rectangles) > 1:
+                    sorted_rects = sorted(age_rectangles, key=lambda r: r['y'])
+                    for i in range(len(sorted_rects) - 1):
+                        current_rect = sorted_rects[i]
+                        boundary_y = current_rect['y'] + current_rect['height']
+                        painter.drawLine(col_x, boundary_y, col_x + col_width, boundary_y)
+            
+            # Draw borders for all age columns
+            draw_age_column_borders(era_col_x, era_col_width, layer_info['era_rects'])
+            draw_age_column_borders(period_col_x, period_col_width, layer_info['period_rects'])
+            draw_age_column_borders(epoch_col_x, epoch_col_width, layer_info['epoch_rects'])
+            draw_age_column_borders(age_col_x, age_col_width, layer_info['age_rects'])
+            
+            # Draw main column borders selectively
+            painter.setPen(QPen(Qt.black, 1))
+            
+            # Always draw left and right borders
+            painter.drawLine(col_x, layer_top_y, col_x, layer_top_y + layer_height)
+            painter.drawLine(col_x + col_width, layer_top_y, col_x + col_width, layer_top_y + layer_height)
+            
+            # Draw top border only if there's no gap above
+            if not has_gap_above:
+                painter.drawLine(col_x, layer_top_y, col_x + col_width, layer_top_y)
+            
+            # Draw bottom border only if there's no gap below
+            if not has_gap_below:
+                painter.drawLine(col_x, layer_top_y + layer_height, col_x + col_width, layer_top_y + layer_height)
+            
+            # Draw pattern column borders selectively
+            painter.setPen(QPen(Qt.black, 1))
+            
+            # Always draw left and right borders
+            painter.drawLine(pattern_col_x, layer_top_y, pattern_col_x, layer_top_y + layer_height)
+            painter.drawLine(pattern_col_x + pattern_col_width, layer_top_y, pattern_col_x + pattern_col_width, layer_top_y + layer_height)
+            
+            # Draw top border only if there's no gap above
+            if not has_gap_above:
+                painter.drawLine(pattern_col_x, layer_top_y, pattern_col_x + pattern_col_width, layer_top_y)
+            
+            # Draw bottom border only if there's no gap below
+            if not has_gap_below:
+                painter.drawLine(pattern_col_x, layer_top_y + layer_height, pattern_col_x + pattern_col_width, layer_top_y + layer_height)
+            
+            # Draw depositional environment column borders selectively - only if column is shown
+            if depoitional_col_x is not None:
+                # Always draw left and right borders
+                painter.drawLine(depoitional_col_x, layer_top_y, depoitional_col_x, layer_top_y + layer_height)
+                painter.drawLine(depoitional_col_x + depositional_col_width, layer_top_y, depoitional_col_x + depositional_col_width, layer_top_y + layer_height)
+                
+                # Always draw top and bottom borders for depositional environment column
+                painter.drawLine(depoitional_col_x, layer_top_y, depoitional_col_x + depositional_col_width, layer_top_y)
+                painter.drawLine(depoitional_col_x, layer_top_y + layer_height, depoitional_col_x + depositional_col_width, layer_top_y + layer_height)
+
+        self._lap("borders")
+
+        self.overlay_igneous_intrusion_column(painter)
+        self._lap("intrusion overlay")
+
+    def draw_wavy_boundary(self, painter, y_position, column_positions, age_gap):
+        """
+        Draw a wavy line across all columns to indicate an unconformity (age gap).
+    
+        """
+        
+        # Save current painter state
+        painter.save()
+        
+        # Set pen for wavy line
+        painter.setPen(QPen(Qt.black, 1))
+        painter.setBrush(Qt.NoBrush)
+        
+        # Calculate total width across all columns
+        if not column_positions:
+            painter.restore()
+            return
+        
+        leftmost_x = min(pos[0] for pos in column_positions)
+        rightmost_x = max(pos[0] + pos[1] for pos in column_positions)
+        total_width = rightmost_x - leftmost_x
+        
+        # Wave parameters
+        wave_amplitude = 4 
+        wave_frequency = 0.05 
+        
+        # Create the wavy path
+        path = QPainterPath()
+        
+        # Start the path
+        start_x = leftmost_x
+        start_y = y_position
+        path.moveTo(start_x, start_y)
+        
+        # Create wavy line by adding small line segments
+        num_points = int(total_width / 2) 
+        for i in range(1, num_points + 1):
+            x = start_x + (i * total_width / num_points)
+            # Create sine wave
+            wave_offset = wave_amplitude * math.sin(2 * math.pi * wave_frequency * (x - start_x))
+            y = start_y + wave_offset
+            path.lineTo(x, y)
+        
+        # Draw the wavy path
+        painter.strokePath(path, painter.pen())
+        
+        # Restore painter state
+        painter.restore()
+    
+    def render(self, painter, width, height):
+        """Draw the stratigraphic column with era display and formation tops into a width x height area"""
+        self.viewport = QRect(0, 0, width, height)
+        self.column_top = 0
+        self.layer_extents = []
+        self.extent_layers = []
+        self.column_layout = {}
+        self._hit_index = None
+        painter.setRenderHint(QPainter.Antialiasing)
+        
+        if not self.layers:
+            painter.drawText(self.rect().center(), "No layers added")
+            return
+        
+        if self.paint_profiler is not None:
+            self.paint_profiler.begin_frame()
+        try:
+            if self.scaling_mode == ScalingMode.FORMATION_TOP_THICKNESS:
+                self.paint_scaling_mode_0(painter)
+            elif self.scaling_mode == ScalingMode.CHRONOLOGY:
+                self.paint_scaling_mode_1(painter)
+            elif self.scaling_mode == ScalingMode.THICKNESS:
+                self.paint_scaling_mode_2(painter)
+            else:
+                pass
+        finally:
+            if self.paint_profiler is not None:
+                self.paint_profiler.end_frame()
+
+    def render_to_device(self, device, width=None, height=None, background=None):
+        """Paint the column onto any QPaintDevice, filling the background first if a color is given"""
+        width = width if width is not None else device.width()
+        height = height if height is not None else device.height()
+
+        painter = QPainter()
+        if not painter.begin(device):
+            raise RuntimeError("Failed to begin painting on device")
+
+        try:
+            painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
+            if background is not None:
+                painter.fillRect(QRect(0, 0, width, height), background)
+            self.render(painter, width, height)
+        finally:
+            painter.end()
+
+    def render_image(self, width, height, scale_factor=1.0, background=Qt.white):
+        """Render the column laid out for width x height into a QImage scaled by scale_factor"""
+        image = QImage(int(width * scale_factor), int(height * scale_factor), QImage.Format_ARGB32_Premultiplied)
+        image.fill(background)
+
+        painter = QPainter(image)
+        try:
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+            painter.scale(scale_factor, scale_factor)
+            self.render(painter, width, height)
+        finally:
+            painter.end()
+
+        return image
+
+    def draw_pattern_column(self, painter, layer, x, y, width, height, texture_id=0):
+        """Draw the pattern column for a single layer"""
+        painter.setPen(QPen(Qt.black, 1))
+
+        # Get the specific texture brush
+        texture_brush = self.get_texture_brush(texture_id)
+        
+        if texture_brush:
+            painter.setBrush(texture_brush)
+        else:
+            painter.setBrush(QBrush(Qt.NoBrush))
+        
+        painter.drawRect(x, y, width, height)
+        
+    def age_column_segments(self, layer, layer_strat_ages, y, height, age_name):
+        """
+        (unit, top, bottom, young, old) of each unit in a layer's age column, from the top down,
+        where young and old are the part of the unit's age range the layer covers
+        """
+        segments = []
+        # Get ages from the layer's stratigraphic ages
+        ages = layer_strat_ages.get(age_name, [])
+        
+        if not ages:
+            return segments
+        
+        # Layer's age range
+        layer_young = layer.young_age
+        layer_old = layer.old_age
+        layer_age_range = layer_old - layer_young
+        
+        if layer_age_range <= 0:
+            return segments
+        
+        # Place each age proportionally
+        for age in ages:
+            age_young = age.get('start_age', layer_young)
+            age_old = age.get('end_age', layer_old)
+            
+            # Calculate the overlap between layer and age
+            overlap_young = max(layer_young, age_young)
+            overlap_old = min(layer_old, age_old)
+            
+            if overlap_old <= overlap_young:
+                continue
+            
+            # Calculate proportional position and height within the layer
+            # Position from top of layer 
+            top_proportion = (overlap_young - layer_young) / layer_age_range
+            bottom_proportion = (overlap_old - layer_young) / layer_age_range
+            
+            age_y = y + (top_proportion * height)
+            age_height = (bottom_proportion - top_proportion) * height
+            segments.append((age, age_y, age_y + age_height, overlap_young, overlap_old))
+        return segments
+
+    def draw_age_bands(self, painter, age_columns, age_bands):
+        """Draw the merged bands of each (age name, x, width) age column"""
+        for age_name, x, width in age_columns:
+            for age, top, bottom, overlap_young, overlap_old in age_bands[age_name]:
+                self.draw_age_band(painter, age, x, top, width, bottom - top, overlap_young, overlap_old)
+
+    def draw_age_band(self, painter, age, x, age_y, width, age_height, overlap_young, overlap_old):
+        """Draw one unit's band in an age column, labelled when it is tall enough"""
+        age_name = age.get('name', 'Unknown')
+
+        # Draw age rectangle with color
+        color = QColor(age.get('color', '#c8c8c8'))
+        
+        painter.setBrush(QBrush(color))
+        painter.setPen(QPen(Qt.black, 1))
+        painter.drawRect(QRectF(x, age_y, width, age_height))
+        
+        # Draw age label if there's enough space
+        if age_height > 15 and age_height <= 45:
+            font = QFont()
+            font.setPointSize(9)
+            painter.setFont(font)
+
+            bg_color = age.get('color', '#c8c8c8')
+
+            # Calculate contrasting text color
+            text_color = get_contrasting_color_from_hex(bg_color)
+            painter.setPen(QPen(text_color, 1))
+            
+            # Center the text in the age rectangle
+            text_rect = QRectF(x + 5, age_y + 2, width - 10, age_height - 4)
+            painter.drawText(text_rect, Qt.AlignCenter, age_name)
+        elif age_height > 45:
+            font = QFont()
+            
+            # Center the text in the age rectangle
+            third_height = age_height / 3
+            top_rect = QRectF(x + 5, age_y + 2, width - 10, third_height)
+            middle_rect = QRectF(x + 5, age_y + third_height, width - 10, third_height)
+            bottom_rect = QRectF(x + 5, age_y + 2*third_height, width - 10, third_height)
+
+            bg_color = age.get('color', '#c8c8c8')
+
+            # Calculate contrasting text color
+            text_color = get_contrasting_color_from_hex(bg_color)
+            painter.setPen(QPen(text_color, 1))
+
+            # Add age labels if space permits
+            font.setPointSize(8)
+            painter.setFont(font)
+            age_text = f"{overlap_young} Ma"
+            painter.drawText(top_rect, Qt.AlignCenter, age_text)
+
+            font.setPointSize(9)
+            painter.setFont(font)
+            painter.drawText(middle_rect, Qt.AlignCenter, age_name)
+            
+            # Add age labels if space permits
+            font.setPointSize(8)
+            painter.setFont(font)
+            age_text = f"{overlap_old} Ma"
+            painter.drawText(bottom_rect, Qt.AlignCenter, age_text)
+        else:
+            pass
+
+    def draw_depositional_environment_column(self, painter, layer, x, y, width, height):
+        layer_dep_env_name = layer.dep_env.display_name
+        layer_dep_env_color = layer.dep_env.color
+
+        # Calculate contrasting text color
+        
+        painter.setBrush(QBrush(QColor(layer_dep_env_color)))
+        painter.setPen(QPen(Qt.black, 1))
+        painter.drawRect(x, y, width, height)
+
+        text_color = get_contrasting_color_from_hex(layer_dep_env_color) 
+        painter.setPen(QPen(text_color, 1))  
+        text_rect = QRect(x + 5, y + 5, width - 10, height - 10)
+        painter.drawText(text_rect, Qt.AlignLeft | Qt.AlignTop | Qt.TextWordWrap,
+                            f"{layer_dep_env_name.upper()}")
+    
+    def overlay_igneous_intrusion_column(self, painter):
+        """
+        Overlay an igneous intrusion column over the pattern column.
+        Only implemented for CHRONOLOGY scaling mode (paint_scaling_mode_1).
+        The column is half the width of the pattern column and positioned based on intrusion_age_range.
+        """
+        # Get intrusion age range
+        intrusion_young_age, intrusion_old_age = self.intrusion_age_range
+        
+        # Skip if intrusion ages are the same (no intrusion to display)
+        if intrusion_young_age >= intrusion_old_age:
+            return
+        
+        # Filter for visible layers within display age range, already sorted by age (youngest first)
+        sorted_layers = self.get_visible_layers_by_age()
+        
+        if not sorted_layers:
+            return
+        
+        # Calculate total age span and scaling
+        total_age_span = sum(layer.old_age - layer.young_age for layer in sorted_layers)
+        if total_age_span <= 0:
+            total_age_span = 1
+        
+        start_y = COLUMN_TOP
+        available_height = self.height() - COLUMN_VERTICAL_SPACE
+        scale = available_height / total_age_span
+        
+        # Calculate pattern column x position (same logic as in paint_scaling_mode_1)
+        current_x = 0
+        if self.display_options['show_eras']:
+            current_x += DEFAULT_COLUMN_SIZE
+        if self.display_options['show_periods']:
+            current_x += DEFAULT_COLUMN_SIZE
+        if self.display_options['show_epochs']:
+            current_x += DEFAULT_COLUMN_SIZE
+        if self.display_options['show_ages']:
+            current_x += DEFAULT_COLUMN_SIZE
+        
+        # Pattern column position
+        col_x = current_x
+        col_width = DEFAULT_COLUMN_SIZE
+        pattern_col_x = col_x + col_width
+        pattern_col_width = DEFAULT_COLUMN_SIZE
+        
+        # Intrusion column is half the width of pattern column
+        intrusion_col_width = pattern_col_width / 2
+
+        intrusion_col_x = pattern_col_x
+        
+        # Find the y-position for the intrusion based on the age range
+        # We need to find where intrusion_young_age and intrusion_old_age fall in the column
+        
+        # Calculate cumulative positions for each layer
+        current_y = start_y
+        intrusion_top_y = None
+        intrusion_bottom_y = None
+        
+        for layer in sorted_layers:
+            layer_age_span = layer.old_age - layer.young_age
+            layer_height = layer_age_span * scale
+            
+            if layer_height < 5:
+                layer_height = 5
+            
+            layer_top_y = current_y
+            layer_bottom_y = current_y + layer_height
+            
+            # Check if intrusion young age falls within this layer
+            if intrusion_top_y is None and layer.young_age <= intrusion_young_age <= layer.old_age:
+                # Calculate proportional position within this layer
+                proportion = (intrusion_young_age - layer.young_age) / layer_age_span
+                intrusion_top_y = layer_top_y + (proportion * layer_height)
+            
+            # Check if intrusion old age falls within this layer
+            if intrusion_bottom_y is None and layer.young_age <= intrusion_old_age <= layer.old_age:
+                # Calculate proportional position within this layer
+                proportion = (intrusion_old_age - layer.young_age) / layer_age_span
+                intrusion_bottom_y = layer_top_y + (proportion * layer_height)
+            
+            current_y += layer_height
+            
+            # If we've found both boundaries, we can stop
+            if intrusion_top_y is not None and intrusion_bottom_y is not None:
+                break
+        
+        # If intrusion extends beyond visible layers, clamp to visible range
+        if intrusion_top_y is None:
+            intrusion_top_y = start_y
+        if intrusion_bottom_y is None:
+            intrusion_bottom_y = start_y + available_height
+        
+        # Calculate intrusion height
+        intrusion_height = intrusion_bottom_y - intrusion_top_y
+        
+        # Ensure minimum height for visibility
+        if intrusion_height < 5:
+            intrusion_height = 5
+        
+        # Draw the intrusion column
+        painter.save()
+        
+        # Draw background for intrusion
+        intrusion_color = QColor(255, 255, 255)  
+        painter.setBrush(QBrush(intrusion_color))
+        painter.setPen(QPen(Qt.black, 2))  
+        painter.drawRect(QRectF(intrusion_col_x, intrusion_top_y, intrusion_col_width, intrusion_height))
+
+        painter.setPen(QPen(Qt.black, 1))
+
+        # Get the specific texture brush
+        texture_brush = self.get_texture_brush(RockProperties.get_pattern(RockType.IGNEOUS_INTRUSION))
+        
+        if texture_brush:
+            painter.setBrush(texture_brush)
+        else:
+            painter.setBrush(QBrush(Qt.NoBrush))
+        
+        painter.drawRect(QRectF(intrusion_col_x, intrusion_top_y, intrusion_col_width, intrusion_height))
+        
+        # Draw label if there's enough space
+        if intrusion_height > 30:
+            painter.setPen(QPen(Qt.black, 1))
+            font = QFont()
+            font.setPointSize(12)
+            font.setBold(True)
+            painter.setFont(font)
+            
+            text_rect = QRectF(intrusion_col_x + 5, intrusion_top_y + 5, 
+                            intrusion_col_width - 10, intrusion_height - 10)
+            
+            # Draw rotated text for igneous intrusion
+            painter.save()
+            painter.translate(intrusion_col_x + intrusion_col_width / 2, 
+                            intrusion_top_y + intrusion_height / 2)
+            painter.rotate(90)
+            painter.drawText(QRectF(-intrusion_height / 2, -intrusion_col_width / 4,
+                                    intrusion_height, intrusion_col_width / 2),
+                            Qt.AlignCenter, "Igneous Intrusion")
+            painter.restore()
+        
+        painter.restore()
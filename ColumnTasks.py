@@ -0,0 +1,78 @@
+import threading
+
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+import ColumnIO
+from ColumnIO import OperationCancelled
+
+class ColumnTaskSignals(QObject):
+    """Signals emitted by column tasks, delivered to the GUI thread through queued connections"""
+    progress = Signal(int, int)
+    finished = Signal(object)
+    failed = Signal(object)
+    cancelled = Signal()
+
+class ColumnTask(QRunnable):
+    """
+    Base class for column file work that runs on a QThreadPool worker.
+    Subclasses implement run_task and return their result, which is handed to the
+    GUI thread in a single finished signal.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.signals = ColumnTaskSignals()
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """Request cancellation; the worker stops at its next checkpoint"""
+        self._cancel_event.set()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def report_progress(self, done, total):
+        self.signals.progress.emit(done, total)
+
+    def run_task(self):
+        raise NotImplementedError
+
+    def run(self):
+        try:
+            result = self.run_task()
+        except OperationCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(e)
+        else:
+            if self.is_cancelled():
+                self.signals.cancelled.emit()
+            else:
+                self.signals.finished.emit(result)
+
+class LoadColumnTask(ColumnTask):
+    """Read and parse a column file and convert its layers off the GUI thread"""
+
+    def __init__(self, file_path):
+        super().__init__()
+        self.file_path = file_path
+
+    def run_task(self):
+        return ColumnIO.read_column_file(self.file_path, self.report_progress, self.is_cancelled)
+
+class SaveColumnTask(ColumnTask):
+    """Serialize and write a column file off the GUI thread"""
+
+    def __init__(self, file_path, layers, intrusion_from_age, intrusion_to_age, timescale=None):
+        super().__init__()
+        self.file_path = file_path
+        # Take a snapshot so later edits to the column list don't race with the worker
+        self.layers = list(layers)
+        self.intrusion_from_age = intrusion_from_age
+        self.intrusion_to_age = intrusion_to_age
+        self.timescale = timescale
+
+    def run_task(self):
+        ColumnIO.write_column_file(self.file_path, self.layers, self.intrusion_from_age, self.intrusion_to_age,
+                                   self.report_progress, self.is_cancelled, self.timescale)
+        return self.file_path
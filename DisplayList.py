@@ -0,0 +1,183 @@
+from collections import namedtuple
+
+from PySide6.QtGui import QPainter, QPen, QBrush, QColor, QFont, QFontMetricsF, QTransform, QPainterPath
+from PySide6.QtCore import Qt, QRect, QRectF, QPoint, QPointF, QLineF
+
+# Painter state a draw call was made with; consecutive calls share one instance until the state changes
+DisplayState = namedtuple('DisplayState', ['pen', 'brush', 'font', 'transform'])
+
+# One recorded draw call, with its bounds in the recording's device coordinates
+DisplayItem = namedtuple('DisplayItem', ['method', 'args', 'state', 'bounds'])
+
+# Qt value types that a caller might keep modifying after handing them to the painter
+VALUE_TYPES = (QPen, QBrush, QColor, QFont, QRect, QRectF, QPoint, QPointF, QPainterPath)
+
+def _copy_arg(arg):
+    return type(arg)(arg) if isinstance(arg, VALUE_TYPES) else arg
+
+def _flag_value(flags):
+    return flags.value if hasattr(flags, 'value') else int(flags)
+
+class DisplayList:
+    """
+    Column drawing recorded once and replayed onto any number of painters.
+    Every item carries its own painter state and bounds, so a replay can skip items outside
+    the area being painted, e.g. everything that falls on other pages of a paginated export.
+    """
+
+    def __init__(self):
+        self.items = []
+        # Top and bottom of each layer as laid out when recorded, e.g. for choosing page breaks
+        self.layer_extents = []
+
+    def __len__(self):
+        return len(self.items)
+
+    def bounds(self):
+        """Bounding rectangle of everything drawn"""
+        rect = QRectF()
+        for item in self.items:
+            rect = rect.united(item.bounds)
+        return rect
+
+    def items_in_rect(self, rect):
+        """Items that could paint inside rect, in drawing order"""
+        return [item for item in self.items if item.bounds.intersects(rect)]
+
+    def replay(self, painter, items=None):
+        """Draw items (by default all of them) onto painter, on top of the painter's current transform"""
+        base_transform = painter.worldTransform()
+        current_state = None
+
+        for item in self.items if items is None else items:
+            state = item.state
+            if state is not current_state:
+                painter.setPen(state.pen)
+                painter.setBrush(state.brush)
+                painter.setFont(state.font)
+                painter.setWorldTransform(state.transform * base_transform)
+                current_state = state
+
+            getattr(painter, item.method)(*item.args)
+
+        painter.setWorldTransform(base_transform)
+
+    def render(self, painter, width, height):
+        """
+        Stand-in for ColumnRenderer.render, so exporters can take a recording in place of a renderer.
+        The layout was fixed when recording; only items inside the painter's clip are replayed.
+        """
+        items = None
+        if isinstance(painter, QPainter) and painter.hasClipping():
+            items = self.items_in_rect(painter.clipBoundingRect())
+        self.replay(painter, items)
+
+class RecordingPainter:
+    """Painter that records the calls the column renderer makes into a DisplayList"""
+
+    def __init__(self, display_list=None):
+        self.display_list = display_list if display_list is not None else DisplayList()
+
+        self._pen = QPen(Qt.black, 1)
+        self._brush = QBrush(Qt.NoBrush)
+        self._font = QFont()
+        self._transform = QTransform()
+        self._state = None
+        self._state_stack = []
+
+    # State
+
+    def setRenderHint(self, hint, on=True):
+        pass
+
+    def pen(self):
+        return QPen(self._pen)
+
+    def setPen(self, pen):
+        self._pen = QPen(pen)
+        self._state = None
+
+    def brush(self):
+        return QBrush(self._brush)
+
+    def setBrush(self, brush):
+        self._brush = QBrush(brush)
+        self._state = None
+
+    def font(self):
+        return QFont(self._font)
+
+    def setFont(self, font):
+        self._font = QFont(font)
+        self._state = None
+
+    def save(self):
+        self._state_stack.append((self._pen, self._brush, self._font, QTransform(self._transform)))
+
+    def restore(self):
+        if self._state_stack:
+            self._pen, self._brush, self._font, self._transform = self._state_stack.pop()
+            self._state = None
+
+    def worldTransform(self):
+        return QTransform(self._transform)
+
+    def translate(self, dx, dy=None):
+        if dy is None:
+            dx, dy = dx.x(), dx.y()
+        self._transform.translate(dx, dy)
+        self._state = None
+
+    def rotate(self, angle):
+        self._transform.rotate(angle)
+        self._state = None
+
+    def scale(self, sx, sy):
+        self._transform.scale(sx, sy)
+        self._state = None
+
+    # Recording
+
+    def _record(self, method, args, local_bounds, stroked=True, pen=None):
+        if self._state is None:
+            self._state = DisplayState(self._pen, self._brush, self._font, QTransform(self._transform))
+
+        # Leave room for the pen, which is centered on the outline
+        pen = self._pen if pen is None else pen
+        if stroked and pen.style() != Qt.NoPen:
+            margin = max(pen.widthF(), 1.0)
+            local_bounds = local_bounds.adjusted(-margin, -margin, margin, margin)
+
+        bounds = self._transform.mapRect(local_bounds)
+        self.display_list.items.append(DisplayItem(method, tuple(_copy_arg(arg) for arg in args), self._state, bounds))
+
+    def drawRect(self, *args):
+        rect = QRectF(*args) if len(args) == 4 else QRectF(args[0])
+        self._record('drawRect', args, rect)
+
+    def fillRect(self, rect, color):
+        self._record('fillRect', (rect, color), QRectF(rect), stroked=False)
+
+    def drawLine(self, *args):
+        line = QLineF(*args) if len(args) == 4 else QLineF(QPointF(args[0]), QPointF(args[1]))
+        self._record('drawLine', args, QRectF(line.p1(), line.p2()).normalized())
+
+    def strokePath(self, path, pen):
+        self._record('strokePath', (path, pen), path.boundingRect(), pen=pen)
+
+    def drawText(self, *args):
+        metrics = QFontMetricsF(self._font)
+
+        if len(args) == 3 and isinstance(args[0], (QRect, QRectF)):
+            rect, flags, text = QRectF(args[0]), args[1], str(args[2])
+            bounds = rect
+            if _flag_value(flags) & _flag_value(Qt.TextDontClip):
+                bounds = rect.united(metrics.boundingRect(rect, _flag_value(flags), text))
+        else:
+            if len(args) == 2:
+                x, y, text = args[0].x(), args[0].y(), str(args[1])
+            else:
+                x, y, text = args[0], args[1], str(args[2])
+            bounds = metrics.boundingRect(text).translated(x, y)
+
+        self._record('drawText', args, bounds, stroked=False)
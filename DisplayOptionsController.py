@@ -0,0 +1,51 @@
+from PySide6.QtCore import QObject, QTimer
+
+FRAME_INTERVAL_MS = 16
+
+class DisplayOptionsController(QObject):
+    """
+    Coalesces display option changes into one state transition per frame.
+    Spinbox arrow ticks and checkbox toggles are collected while a single-shot timer runs,
+    then applied to the column together so it relayouts and repaints once.
+    """
+
+    def __init__(self, strat_column, parent=None):
+        super().__init__(parent)
+        self.strat_column = strat_column
+        self.pending_changes = {}
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(FRAME_INTERVAL_MS)
+        self.timer.timeout.connect(self.flush)
+
+    def queue_change(self, name, value):
+        """Record a change and schedule a flush at the end of the current frame"""
+        # Later changes to the same option within a frame replace earlier ones
+        self.pending_changes[name] = value
+
+        # Don't restart a running timer, otherwise continuous dragging would never flush
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def set_age_display_options(self, options):
+        self.queue_change('display_options', dict(options))
+
+    def set_formation_gap(self, show_formation_gap):
+        self.queue_change('show_formation_gap', show_formation_gap)
+
+    def set_display_age_range(self, from_age, to_age):
+        self.queue_change('display_age_range', (from_age, to_age))
+
+    def set_intrusion_age_range(self, from_age, to_age):
+        self.queue_change('intrusion_age_range', (from_age, to_age))
+
+    def flush(self):
+        """Apply all pending changes to the column as one update"""
+        self.timer.stop()
+        if not self.pending_changes:
+            return
+
+        changes = self.pending_changes
+        self.pending_changes = {}
+        self.strat_column.apply_display_state(**changes)
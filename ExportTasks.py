@@ -0,0 +1,102 @@
+import ColumnExport
+from ColumnTasks import ColumnTask
+from RenderCache import render_key
+from SvgPainter import screen_dpi
+
+class ExportPngTask(ColumnTask):
+    """Render and encode a PNG in strips off the GUI thread"""
+
+    def __init__(self, file_path, renderer, width, height, scale_factor, background, dpi, cache=None):
+        super().__init__()
+        self.file_path = file_path
+        # Paint from a copy so the column can't change under the worker
+        self.renderer = renderer.snapshot()
+        self.width = width
+        self.height = height
+        self.scale_factor = scale_factor
+        self.background = background
+        self.dpi = dpi
+        self.cache = cache
+
+    def write(self, file_path):
+        return ColumnExport.export_png_tiled(self.renderer, file_path, self.width, self.height,
+                                             self.scale_factor, self.background, self.dpi,
+                                             progress=self.report_progress, is_cancelled=self.is_cancelled)
+
+    def run_task(self):
+        if self.cache is None:
+            return self.write(self.file_path)
+
+        params = {'width': self.width, 'height': self.height, 'scale_factor': self.scale_factor,
+                  'background': self.background, 'dpi': self.dpi}
+        return self.cache.export(self.renderer, self.file_path, 'png', params, self.write)
+
+class ExportPdfTask(ColumnTask):
+    """Write a multi-page PDF off the GUI thread, one page at a time"""
+
+    def __init__(self, file_path, renderer, width, pages, cache=None):
+        super().__init__()
+        self.file_path = file_path
+        self.renderer = renderer.snapshot()
+        self.width = width
+        self.pages = pages
+        self.cache = cache
+
+    def write(self, file_path):
+        return ColumnExport.export_pdf(self.renderer, file_path, self.width, self.pages,
+                                       progress=self.report_progress, is_cancelled=self.is_cancelled)
+
+    def run_task(self):
+        if self.cache is None:
+            return self.write(self.file_path)
+
+        params = {'width': self.width, 'pages': self.pages, 'resolution': ColumnExport.pdf_resolution()}
+        return self.cache.export(self.renderer, self.file_path, 'pdf', params, self.write)
+
+class ExportFormatsTask(ColumnTask):
+    """Write PNG, SVG and PDF of the column from a single layout pass off the GUI thread"""
+
+    def __init__(self, file_paths, renderer, width, height, scale_factor, background, dpi, cache=None):
+        super().__init__()
+        self.file_paths = file_paths
+        self.renderer = renderer.snapshot()
+        self.width = width
+        self.height = height
+        self.scale_factor = scale_factor
+        self.background = background
+        self.dpi = dpi
+        self.cache = cache
+
+    def cache_params(self, fmt):
+        """Same parameters as the single format exports, except the PDF keeps the on-screen layout"""
+        if fmt == 'png':
+            return {'width': self.width, 'height': self.height, 'scale_factor': self.scale_factor,
+                    'background': self.background, 'dpi': self.dpi}
+        if fmt == 'svg':
+            return {'width': self.width, 'height': self.height, 'background': self.background, 'dpi': screen_dpi()}
+        return {'width': self.width, 'height': self.height, 'resolution': ColumnExport.pdf_resolution()}
+
+    def run_task(self):
+        results = {}
+        pending = dict(self.file_paths)
+        keys = {}
+
+        if self.cache is not None:
+            for fmt, file_path in self.file_paths.items():
+                keys[fmt] = render_key(self.renderer, fmt, **self.cache_params(fmt))
+                hit, result = self.cache.fetch(keys[fmt], '.' + fmt, file_path)
+                if hit:
+                    results[fmt] = result
+                    del pending[fmt]
+
+        if pending:
+            written = ColumnExport.export_formats(self.renderer, pending, self.width, self.height,
+                                                  self.scale_factor, self.background, self.dpi,
+                                                  progress=self.report_progress, is_cancelled=self.is_cancelled)
+            results.update(written)
+
+            if self.cache is not None:
+                for fmt, file_path in pending.items():
+                    self.cache.store(keys[fmt], '.' + fmt, file_path, written[fmt])
+
+        return results
@@ -0,0 +1,87 @@
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Tuple
+
+class LayerAgeIndex:
+    """
+    Age-sorted index over a list of layers.
+    Answers display age range queries with bisect on young ages instead of testing every layer.
+    Assumes young_age <= old_age for every layer, as enforced by the layer input forms.
+    """
+
+    def __init__(self, layers: List):
+        self.layers = layers
+
+        # Layers without ages can never fall inside a display age range
+        entries = sorted(
+            (layer.young_age, i) for i, layer in enumerate(layers)
+            if layer.young_age is not None and layer.old_age is not None
+        )
+        self.order = [i for _, i in entries]
+        self.young_ages = [young_age for young_age, _ in entries]
+        self.old_ages = [layers[i].old_age for i in self.order]
+
+    def query_full(self, from_age: float, to_age: float) -> List[int]:
+        """
+        Return indices of layers lying completely within the age range, ordered by young age.
+        Ties keep the original layer order, matching a stable sort on young_age.
+        """
+        # Candidates start at the first young age >= from_age and stop once young ages pass to_age
+        start = bisect_left(self.young_ages, from_age)
+        end = bisect_right(self.young_ages, to_age)
+
+        old_ages = self.old_ages
+        order = self.order
+        return [order[i] for i in range(start, end) if old_ages[i] <= to_age]
+
+class LayerHitIndex:
+    """
+    Index of where a render placed each layer, sorted by top edge.
+    Finds the layer under a y coordinate with a bisect on the tops instead of testing every layer.
+    Extents only overlap when overlapping formations are drawn by formation top; the layer drawn
+    last, and so on top, wins then.
+    """
+
+    def __init__(self, extents: List[Tuple[float, float]], layers: List, positions: Optional[List[int]] = None):
+        entries = sorted(range(len(extents)), key=lambda i: extents[i][0])
+        self.tops = [extents[i][0] for i in entries]
+        self.bottoms = [extents[i][1] for i in entries]
+        self.order = entries
+        self.layers = [layers[i] for i in entries]
+        # Where each layer is in the column's layer list, -1 if unknown
+        self.positions = [positions[i] for i in entries] if positions is not None else [-1] * len(entries)
+        # Furthest bottom edge of the extents up to each position, to know when to stop looking back
+        self.max_bottoms = []
+        furthest = float('-inf')
+        for bottom in self.bottoms:
+            furthest = max(furthest, bottom)
+            self.max_bottoms.append(furthest)
+        self._positions = None
+
+    def layer_at(self, y: float) -> Optional[Tuple[object, float, float]]:
+        """(layer, top, bottom) of the layer drawn at y, or None"""
+        found = None
+        i = bisect_right(self.tops, y) - 1
+        while i >= 0 and self.max_bottoms[i] > y:
+            if y < self.bottoms[i] and (found is None or self.order[i] > self.order[found]):
+                found = i
+            i -= 1
+        if found is None:
+            return None
+        return self.layers[found], self.tops[found], self.bottoms[found]
+
+    def _find(self, layer) -> Optional[int]:
+        if self._positions is None:
+            self._positions = {id(indexed): i for i, indexed in enumerate(self.layers)}
+        return self._positions.get(id(layer))
+
+    def extent_of(self, layer) -> Optional[Tuple[float, float]]:
+        """(top, bottom) where a layer was drawn, or None if it wasn't"""
+        i = self._find(layer)
+        if i is None:
+            return None
+        return self.tops[i], self.bottoms[i]
+
+    def position_of(self, layer) -> int:
+        """Position of a drawn layer in the column's layer list, or -1"""
+        i = self._find(layer)
+        return -1 if i is None else self.positions[i]
@@ -0,0 +1,188 @@
+import os
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+MEMORY_PROFILE_ENV = "STRATCOL_MEMORY_PROFILE"
+# Enough frames to get from the json or Qt internals back to our own code, few enough to keep
+# tracing and grouping the traces fast
+TRACEBACK_FRAMES = 10
+REPORT_QT_CLASS_COUNT = 12
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Python allocations are charged to the innermost frame in one of these files
+SUBSYSTEM_FILES = {
+    'Layer.py': "Layer objects",
+    'Lithology.py': "Layer objects",
+    'Deposition.py': "Layer objects",
+    'ColumnIO.py': "Column loading",
+    'ColumnTasks.py': "Column loading",
+    'ChronostratigraphicMapper.py': "Chrono mapping",
+    'LayerIndex.py': "Layer index and render caches",
+    'ColumnRenderer.py': "Layer index and render caches",
+    'StratColumn.py': "Layer index and render caches",
+    'DisplayList.py': "Exports",
+    'ColumnExport.py': "Exports",
+    'ExportTasks.py': "Exports",
+    'SvgPainter.py': "Exports",
+    'RenderCache.py': "Exports",
+    'StratColumnMaker.py': "Layer table and widgets",
+    'DisplayOptionsController.py': "Layer table and widgets",
+}
+OTHER_SUBSYSTEM = "Other"
+
+_tracing_started = None
+
+def enabled_by_environment() -> bool:
+    return os.environ.get(MEMORY_PROFILE_ENV, "") not in ("", "0")
+
+def start(frames=TRACEBACK_FRAMES):
+    """Start tracing Python allocations; only allocations made after this show up in reports"""
+    global _tracing_started
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+        _tracing_started = time.localtime()
+
+def _format_bytes(size):
+    for unit in ("B", "KB", "MB"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.2f} GB"
+
+def _file_subsystem(filename):
+    """Subsystem of one of our source files, or None for the standard library and packages"""
+    if os.path.dirname(os.path.abspath(filename)) != SOURCE_DIR:
+        return None
+    return SUBSYSTEM_FILES.get(os.path.basename(filename), OTHER_SUBSYSTEM)
+
+def python_memory_by_subsystem(snapshot):
+    """{subsystem: (bytes, blocks)} of the Python allocations still alive in a tracemalloc snapshot"""
+    file_subsystems = {}
+    usage = {}
+    for stat in snapshot.statistics('traceback'):
+        name = OTHER_SUBSYSTEM
+        # Frames run from the oldest to the most recent, so look from the allocation outwards
+        for frame in reversed(stat.traceback):
+            filename = frame.filename
+            if filename not in file_subsystems:
+                file_subsystems[filename] = _file_subsystem(filename)
+            if file_subsystems[filename] is not None:
+                name = file_subsystems[filename]
+                break
+        size, count = usage.get(name, (0, 0))
+        usage[name] = (size + stat.size, count + stat.count)
+    return usage
+
+def process_memory():
+    """(current, peak) resident set size in bytes, either None where the platform doesn't say"""
+    current = peak = None
+    try:
+        with open("/proc/self/status", 'r') as f:
+            for line in f:
+                if line.startswith(("VmRSS:", "VmHWM:")):
+                    value = int(line.split()[1]) * 1024
+                    if line.startswith("VmRSS:"):
+                        current = value
+                    else:
+                        peak = value
+    except OSError:
+        pass
+
+    if peak is None:
+        try:
+            import resource
+        except ImportError:
+            return current, peak
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        if sys.platform != "darwin":
+            peak *= 1024
+    return current, peak
+
+def qt_object_counts():
+    """Live QObjects by class: every widget, plus the non-widget children of top level widgets"""
+    from PySide6.QtCore import QObject
+    from PySide6.QtWidgets import QApplication
+
+    counts = Counter()
+    seen = set()
+    for widget in QApplication.allWidgets():
+        seen.add(id(widget))
+        counts[widget.metaObject().className()] += 1
+    for window in QApplication.topLevelWidgets():
+        for child in window.findChildren(QObject):
+            if id(child) not in seen:
+                seen.add(id(child))
+                counts[child.metaObject().className()] += 1
+    return counts
+
+def table_usage(table):
+    """(rows, items, cell widgets including their descendants) of a QTableWidget"""
+    from PySide6.QtWidgets import QWidget
+
+    items = cell_widgets = 0
+    for row in range(table.rowCount()):
+        for column in range(table.columnCount()):
+            if table.item(row, column) is not None:
+                items += 1
+            widget = table.cellWidget(row, column)
+            if widget is not None:
+                cell_widgets += 1 + len(widget.findChildren(QWidget))
+    return table.rowCount(), items, cell_widgets
+
+def memory_report(window=None) -> str:
+    """Text report of memory by subsystem, for the main window if given"""
+    lines = ["Memory report", ""]
+
+    current, peak = process_memory()
+    if current is not None:
+        lines.append(f"  Process resident memory   {_format_bytes(current):>12}")
+    if peak is not None:
+        lines.append(f"  Peak resident memory      {_format_bytes(peak):>12}")
+
+    if window is not None:
+        column = window.strat_column
+        lines.append(f"  Layers                    {len(column.layers):>12}")
+        rows, items, cell_widgets = table_usage(window.layer_table)
+        lines.append(f"  Layer table               {rows:>12} rows, {items} items, {cell_widgets} cell widgets")
+
+    from ColumnRenderer import shared_texture_brushes
+    decoded = texture_bytes = 0
+    for brushes in shared_texture_brushes():
+        count, size = brushes.decoded_size()
+        decoded += count
+        texture_bytes += size
+    lines.append(f"  Texture brushes           {_format_bytes(texture_bytes):>12} in {decoded} decoded images")
+    lines.append("")
+
+    if tracemalloc.is_tracing():
+        snapshot = tracemalloc.take_snapshot()
+        traced, traced_peak = tracemalloc.get_traced_memory()
+        since = time.strftime("%H:%M:%S", _tracing_started) if _tracing_started else "startup"
+        # Grouping a large snapshot is about twenty times faster when its own allocations aren't
+        # traced, so tracing restarts and the next report covers what is allocated from now on
+        frames = tracemalloc.get_traceback_limit()
+        tracemalloc.stop()
+        usage = python_memory_by_subsystem(snapshot)
+        start(frames)
+
+        lines.append(f"  Python allocations made since {since} and still alive, by subsystem")
+        lines.append(f"  (traced {_format_bytes(traced)}, peak {_format_bytes(traced_peak)})")
+        for name, (size, count) in sorted(usage.items(), key=lambda item: item[1][0], reverse=True):
+            lines.append(f"    {name:<32} {_format_bytes(size):>12} {count:>10} blocks")
+    else:
+        lines.append(f"  Python allocations are not traced; set {MEMORY_PROFILE_ENV}=1 before starting the app")
+        lines.append("  to trace them from startup, or report again now that tracing has started.")
+        start()
+    lines.append("")
+
+    from PySide6.QtWidgets import QApplication
+    if QApplication.instance() is not None:
+        counts = qt_object_counts()
+        lines.append(f"  Qt objects ({sum(counts.values())} live)")
+        for name, count in counts.most_common(REPORT_QT_CLASS_COUNT):
+            lines.append(f"    {name:<32} {count:>10}")
+
+    return "\n".join(lines)
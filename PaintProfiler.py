@@ -0,0 +1,145 @@
+import time
+from collections import deque
+
+from PySide6.QtGui import QColor, QFont, QFontMetrics
+from PySide6.QtCore import Qt, QRect
+
+FRAME_BUDGET_MS = 16.0
+HISTORY_FRAMES = 240
+# Upper edges of the histogram buckets in ms, the last bucket holds everything slower
+HISTOGRAM_BUCKETS_MS = (1, 2, 4, 8, 16, 32, 64, 128)
+TOTAL_PHASE = "total"
+OTHER_PHASE = "other"
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+class PaintProfiler:
+    """
+    Times the phases of each column paint (filtering, sorting, chrono mapping, fills, text,
+    borders, wavy boundaries, intrusion overlay, ...) and keeps the last history frames of each.
+    The renderer calls lap(phase) when a phase ends, so phases that are interleaved per layer,
+    like fills and text, add up over the whole frame. Time not claimed by any phase is "other".
+    """
+
+    def __init__(self, budget_ms=FRAME_BUDGET_MS, history=HISTORY_FRAMES, log_slow_frames=False, show_overlay=False):
+        self.budget_ms = budget_ms
+        self.log_slow_frames = log_slow_frames
+        self.show_overlay = show_overlay
+        self.frame_count = 0
+        self.slow_frame_count = 0
+        self.last_frame = {}
+        self._history_size = history
+        self._history = {}
+        self._frame = None
+        self._frame_start = 0.0
+        self._last_lap = 0.0
+
+    def begin_frame(self):
+        self._frame = {}
+        self._frame_start = self._last_lap = time.perf_counter()
+
+    def lap(self, phase):
+        """Add the time since the previous lap, or the start of the frame, to phase"""
+        if self._frame is None:
+            return
+        now = time.perf_counter()
+        self._frame[phase] = self._frame.get(phase, 0.0) + (now - self._last_lap) * 1000
+        self._last_lap = now
+
+    def end_frame(self):
+        if self._frame is None:
+            return
+        self.lap(OTHER_PHASE)
+        frame = self._frame
+        self._frame = None
+        frame[TOTAL_PHASE] = sum(frame.values())
+
+        for phase, ms in frame.items():
+            if phase not in self._history:
+                self._history[phase] = deque(maxlen=self._history_size)
+            self._history[phase].append(ms)
+        self.last_frame = frame
+        self.frame_count += 1
+
+        if frame[TOTAL_PHASE] > self.budget_ms:
+            self.slow_frame_count += 1
+            if self.log_slow_frames:
+                breakdown = ", ".join(f"{phase} {ms:.1f}" for phase, ms in self._phases_by_time(frame))
+                print(f"Slow paint: {frame[TOTAL_PHASE]:.1f} ms (budget {self.budget_ms:g} ms): {breakdown}")
+
+    @staticmethod
+    def _phases_by_time(frame):
+        return sorted(((phase, ms) for phase, ms in frame.items() if phase != TOTAL_PHASE),
+                      key=lambda item: item[1], reverse=True)
+
+    def phases(self):
+        return [phase for phase in self._history if phase != TOTAL_PHASE]
+
+    def histogram(self, phase=TOTAL_PHASE):
+        """Counts of the recent frames in each HISTOGRAM_BUCKETS_MS bucket, plus one for slower frames"""
+        counts = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+        for ms in self._history.get(phase, ()):
+            bucket = 0
+            while bucket < len(HISTOGRAM_BUCKETS_MS) and ms > HISTOGRAM_BUCKETS_MS[bucket]:
+                bucket += 1
+            counts[bucket] += 1
+        return counts
+
+    def summary(self):
+        """{phase: (mean, median, 95th percentile, max)} in ms over the recent frames"""
+        stats = {}
+        for phase, values in self._history.items():
+            ordered = sorted(values)
+            stats[phase] = (sum(ordered) / len(ordered), _percentile(ordered, 0.5),
+                            _percentile(ordered, 0.95), ordered[-1])
+        return stats
+
+    def report(self):
+        stats = self.summary()
+        if not stats:
+            print("Paint profile: no frames painted")
+            return
+
+        frames = len(self._history[TOTAL_PHASE])
+        print(f"Paint profile ({self.frame_count} frames, {self.slow_frame_count} over {self.budget_ms:g} ms, "
+              f"last {frames} shown)")
+        print()
+        print(f"  {'phase':<20} {'mean':>8} {'median':>8} {'p95':>8} {'max':>8}")
+        ordered = sorted(self.phases(), key=lambda phase: stats[phase][0], reverse=True) + [TOTAL_PHASE]
+        for phase in ordered:
+            mean, median, p95, longest = stats[phase]
+            print(f"  {phase:<20} {mean:8.2f} {median:8.2f} {p95:8.2f} {longest:8.2f}")
+        print()
+
+        labels = [f"<={edge}" for edge in HISTOGRAM_BUCKETS_MS] + [f">{HISTOGRAM_BUCKETS_MS[-1]}"]
+        print("  Frame time histogram (ms)")
+        for label, count in zip(labels, self.histogram()):
+            print(f"  {label:>6} {count:5d} {'#' * round(40 * count / frames)}")
+
+    def draw_overlay(self, painter, rect):
+        """Draw the last frame's phase times in the top right corner of rect"""
+        if not self.last_frame:
+            return
+
+        total = self.last_frame[TOTAL_PHASE]
+        lines = [f"paint {total:.1f} ms  ({self.slow_frame_count}/{self.frame_count} over {self.budget_ms:g} ms)"]
+        lines += [f"{phase:<18} {ms:6.2f}" for phase, ms in self._phases_by_time(self.last_frame)]
+
+        painter.save()
+        font = QFont("monospace")
+        font.setStyleHint(QFont.Monospace)
+        font.setPointSize(8)
+        painter.setFont(font)
+        metrics = QFontMetrics(font)
+        width = max(metrics.horizontalAdvance(line) for line in lines) + 12
+        height = metrics.height() * len(lines) + 8
+        box = QRect(rect.right() - width - 4, rect.top() + 4, width, height)
+
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(0, 0, 0, 170))
+        painter.drawRect(box)
+        painter.setPen(QColor(255, 120, 120) if total > self.budget_ms else QColor(255, 255, 255))
+        painter.drawText(box.adjusted(6, 4, -6, -4), Qt.AlignLeft | Qt.AlignTop, "\n".join(lines))
+        painter.restore()
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import shutil
+from typing import Callable, Optional
+
+from PySide6.QtGui import QColor
+from PySide6.QtCore import QStandardPaths
+
+from ColumnIO import atomic_open
+
+# Bump whenever the drawing code changes what gets rendered, so old entries stop matching
+CACHE_VERSION = 2
+DEFAULT_CACHE_SIZE = 512 * 1024 * 1024
+RESULT_EXTENSION = '.json'
+
+def default_cache_dir() -> str:
+    """Per-user cache folder shared by the app and batch exports"""
+    base = QStandardPaths.writableLocation(QStandardPaths.GenericCacheLocation)
+    if not base:
+        base = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "stratcol", "renders")
+
+def _encode_value(value):
+    if isinstance(value, QColor):
+        return value.name(QColor.HexArgb)
+    if hasattr(value, 'value'):
+        # Enums, including Qt ones
+        return value.value
+    raise TypeError(f"Cannot use {type(value).__name__} in a render key")
+
+def render_key(renderer, fmt: str, **params) -> str:
+    """
+    Stable hash of everything that decides how an export looks: the layers, display options,
+    scaling mode, age ranges, the timescale units the layers span, the output format and its
+    parameters (size, scale, pages, ...).
+    """
+    # Only the units the column can draw, so editing the timescale elsewhere keeps its entries
+    ages = [age for layer in renderer.layers for age in (layer.young_age, layer.old_age) if age is not None]
+    timescale = renderer.get_timescale().map_age_to_chronostratigraphy(min(ages), max(ages)) if ages else {}
+    state = {
+        'cache_version': CACHE_VERSION,
+        'format': fmt,
+        'params': params,
+        'layers': [layer.to_dict() for layer in renderer.layers],
+        'display_options': renderer.display_options,
+        'scaling_mode': renderer.scaling_mode.value,
+        'show_formation_gap': renderer.show_formation_gap,
+        'display_age_range': list(renderer.display_age_range),
+        'intrusion_age_range': list(renderer.intrusion_age_range),
+        'timescale': timescale
+    }
+    data = json.dumps(state, sort_keys=True, separators=(',', ':'), default=_encode_value)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+class RenderCache:
+    """
+    On-disk store of finished exports keyed by render_key().
+    Each entry is the exported file plus a small JSON file with the export's return value.
+    Hits refresh the entry's modification time, and the least recently used entries are
+    removed once the folder grows past max_bytes. Entries are written through a temporary
+    file and replaced atomically, so several processes can share one folder.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = DEFAULT_CACHE_SIZE):
+        self.directory = directory if directory else default_cache_dir()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_path(self, key: str, extension: str) -> str:
+        return os.path.join(self.directory, key + extension)
+
+    def get(self, key: str, extension: str):
+        """Path of the cached file and the stored export result, or None on a miss"""
+        file_path = self._entry_path(key, extension)
+        result_path = self._entry_path(key, RESULT_EXTENSION)
+        try:
+            with open(result_path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+            # Mark the entry as recently used
+            os.utime(file_path)
+            os.utime(result_path)
+        except (OSError, ValueError):
+            return None
+        return file_path, result
+
+    def put(self, key: str, extension: str, source_path: str, result=None):
+        """Store a copy of an exported file, then trim the cache back under its size limit"""
+        os.makedirs(self.directory, exist_ok=True)
+
+        with open(source_path, 'rb') as src, atomic_open(self._entry_path(key, extension), 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        # The result file goes last, since get() treats it as the marker of a complete entry
+        with atomic_open(self._entry_path(key, RESULT_EXTENSION), 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits in max_bytes"""
+        entries = {}
+        total = 0
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue  # Removed by another process
+            key = name.split('.', 1)[0]
+            size, mtime, paths = entries.get(key, (0, 0.0, []))
+            entries[key] = (size + stat.st_size, max(mtime, stat.st_mtime), paths + [path])
+            total += stat.st_size
+
+        for size, _, paths in sorted(entries.values(), key=lambda entry: entry[1]):
+            if total <= self.max_bytes:
+                break
+            for path in paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def fetch(self, key: str, extension: str, file_path: str):
+        """Copy a cached export to file_path, returning (True, result) on a hit and (False, None) on a miss"""
+        cached = self.get(key, extension)
+        if cached is not None:
+            cached_path, result = cached
+            try:
+                with open(cached_path, 'rb') as src, atomic_open(file_path, 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+            except FileNotFoundError:
+                pass  # Evicted by another process in the meantime, render it instead
+            else:
+                self.hits += 1
+                return True, result
+
+        self.misses += 1
+        return False, None
+
+    def store(self, key: str, extension: str, file_path: str, result=None):
+        """put(), except that a full or read-only cache folder doesn't fail the export itself"""
+        try:
+            self.put(key, extension, file_path, result)
+        except OSError as e:
+            print(f"Could not store render in cache: {e}")
+
+    def export(self, renderer, file_path: str, fmt: str, params: dict, write: Callable[[str], object]):
+        """
+        Write an export through the cache. On a hit the cached file is copied to file_path; on a
+        miss write(file_path) renders it and a copy is kept. Returns what write returned (JSON
+        round-tripped on a hit, so tuples come back as lists).
+        """
+        key = render_key(renderer, fmt, **params)
+        extension = '.' + fmt
+
+        hit, result = self.fetch(key, extension, file_path)
+        if not hit:
+            result = write(file_path)
+            self.store(key, extension, file_path, result)
+        return result
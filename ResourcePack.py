@@ -0,0 +1,118 @@
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+from typing import Dict, List, Optional
+
+from utils import get_resource_path
+
+RESOURCE_PACK_NAME = 'resources.pack'
+PACK_MAGIC = b'STRATRES'
+PACK_VERSION = 1
+# magic, format version, flags, manifest length
+PACK_PREAMBLE = struct.Struct('<8sHHI')
+# Folders, relative to the sources, that the app reads at runtime
+PACKED_DIRECTORIES = ('assets/patterns', 'data')
+TEXTURE_NAME = re.compile(r'texture_(\d+)\.png$', re.IGNORECASE)
+
+_pack = None
+_pack_lock = threading.Lock()
+_pack_checked = False
+
+class ResourcePack:
+    """
+    Read-only archive of the textures and timescale data, memory mapped in one open.
+    The file is a preamble, a JSON manifest with the offset and size of every file and the
+    texture numbers, then the file contents back to back, so nothing is scanned or parsed
+    beyond the manifest and each file is read straight out of the mapping when first used.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._map) < PACK_PREAMBLE.size:
+            raise ValueError("File is too short to be a resource pack")
+        magic, version, flags, manifest_length = PACK_PREAMBLE.unpack_from(self._map, 0)
+        if magic != PACK_MAGIC:
+            raise ValueError("Not a resource pack")
+        if version > PACK_VERSION:
+            raise ValueError(f"Resource pack version {version} is newer than supported version {PACK_VERSION}")
+
+        manifest_start = PACK_PREAMBLE.size
+        manifest = json.loads(self._map[manifest_start:manifest_start + manifest_length].decode('utf-8'))
+        self._data_start = manifest_start + manifest_length
+        self._files = manifest['files']
+        self.textures = manifest['textures']
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._files
+
+    def names(self, directory: str = '') -> List[str]:
+        """Names of the packed files under a folder such as "data", or all of them"""
+        prefix = directory.rstrip('/') + '/' if directory else ''
+        return [name for name in self._files if name.startswith(prefix)]
+
+    def read(self, name: str) -> bytes:
+        """Contents of a packed file, by its path relative to the sources with forward slashes"""
+        offset, size = self._files[name]
+        start = self._data_start + offset
+        return self._map[start:start + size]
+
+def build_resource_pack(source_dir: str, output_path: str, directories=PACKED_DIRECTORIES) -> Dict[str, int]:
+    """Pack every file in directories under source_dir into output_path, returning {name: size}"""
+    files = []
+    for directory in directories:
+        folder = os.path.join(source_dir, directory)
+        # Subfolders too, such as the older timescale versions under data/
+        for root, subfolders, filenames in os.walk(folder):
+            subfolders.sort()
+            relative = os.path.relpath(root, folder).replace(os.sep, '/')
+            prefix = directory if relative == '.' else f"{directory}/{relative}"
+            for filename in sorted(filenames):
+                files.append((f"{prefix}/{filename}", os.path.join(root, filename)))
+
+    entries = {}
+    textures = {}
+    offset = 0
+    for name, path in files:
+        size = os.path.getsize(path)
+        entries[name] = [offset, size]
+        offset += size
+        match = TEXTURE_NAME.search(name)
+        if match:
+            textures[match.group(1)] = name
+
+    manifest = json.dumps({'files': entries, 'textures': textures}, separators=(',', ':')).encode('utf-8')
+
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(output_path, 'wb') as out:
+        out.write(PACK_PREAMBLE.pack(PACK_MAGIC, PACK_VERSION, 0, len(manifest)))
+        out.write(manifest)
+        for _, path in files:
+            with open(path, 'rb') as f:
+                out.write(f.read())
+
+    return {name: size for name, (_, size) in entries.items()}
+
+def get_resource_pack() -> Optional[ResourcePack]:
+    """
+    The resource pack bundled with the app, or None when running from the sources, where the
+    loose files in assets/ and data/ are read instead.
+    """
+    global _pack, _pack_checked
+    with _pack_lock:
+        if not _pack_checked:
+            _pack_checked = True
+            path = get_resource_path(RESOURCE_PACK_NAME)
+            if os.path.exists(path):
+                try:
+                    _pack = ResourcePack(path)
+                except (OSError, ValueError) as e:
+                    print(f"Could not open {path}: {e}")
+        return _pack
@@ -0,0 +1,6 @@
+from enum import Enum
+
+class ScalingMode(Enum):
+    FORMATION_TOP_THICKNESS = "Formation top & thickness"
+    THICKNESS = "Thickness"
+    CHRONOLOGY = "Chronology"
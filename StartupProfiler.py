@@ -0,0 +1,89 @@
+import builtins
+import sys
+import time
+
+REPORT_IMPORT_COUNT = 15
+
+class StartupProfiler:
+    """
+    Times module imports and the startup phases up to the first paint of the column.
+    Installed before anything heavy is imported, it wraps __import__ and records how long each
+    module took to load for the first time, both in total and excluding the modules it imported.
+    """
+
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.last_mark = self.start_time
+        self.phases = []
+        self.imports = {}
+        self._stack = []
+        self._original_import = None
+
+    def install(self):
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def uninstall(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # Only the first absolute import of a module does any work worth timing
+        if level != 0 or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        self._stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += elapsed
+            if name not in self.imports:
+                self.imports[name] = (elapsed, elapsed - nested)
+
+    def mark(self, phase):
+        """End a startup phase, e.g. "imports" or "main window", at the current time"""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last_mark))
+        self.last_mark = now
+
+    def watch_first_paint(self, widget, on_painted=None):
+        """Mark "first paint" once widget has finished painting for the first time, then call on_painted"""
+        from PySide6.QtCore import QObject, QEvent, QTimer
+
+        profiler = self
+
+        class FirstPaintFilter(QObject):
+            def eventFilter(self, watched, event):
+                if event.type() == QEvent.Paint:
+                    watched.removeEventFilter(self)
+                    # Runs once the paint event itself has been handled
+                    QTimer.singleShot(0, finish)
+                return False
+
+        def finish():
+            profiler.mark("first paint")
+            if on_painted is not None:
+                on_painted()
+
+        # Keep the filter alive for as long as the widget
+        self._paint_filter = FirstPaintFilter(widget)
+        widget.installEventFilter(self._paint_filter)
+
+    def report(self):
+        total = time.perf_counter() - self.start_time
+        print("Startup profile")
+        print()
+        for phase, seconds in self.phases:
+            print(f"  {phase:<24} {seconds * 1000:8.1f} ms")
+        print(f"  {'total':<24} {total * 1000:8.1f} ms")
+        print()
+
+        slowest = sorted(self.imports.items(), key=lambda item: item[1][0], reverse=True)[:REPORT_IMPORT_COUNT]
+        print(f"  Slowest imports ({len(self.imports)} modules loaded)   total ms    self ms")
+        for name, (cumulative, own) in slowest:
+            print(f"  {name:<38} {cumulative * 1000:8.1f}   {own * 1000:8.1f}")
@@ -1,6 +1,5 @@
 import json
 import sys
-import pdb
 import StratColumn as sc
 import os
 
@@ -10,18 +9,25 @@ from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                                QPushButton, QLineEdit, QLabel, QComboBox, QSpinBox, 
                                QTableWidget, QTableWidgetItem, QColorDialog, QMessageBox,
                                QDoubleSpinBox, QCheckBox, QToolBar, QToolButton, QMenu, QFileDialog, QSpacerItem, QSizePolicy, QWidget, QDialog,
-                               QDialogButtonBox)
-from PySide6.QtCore import Qt, Signal, QPoint, QSize
-from PySide6.QtGui import QAction, QPainter, QPixmap, QRegion
-from PySide6.QtSvg import QSvgGenerator
+                               QDialogButtonBox, QProgressDialog, QInputDialog, QPlainTextEdit)
+from PySide6.QtCore import Qt, Signal, QThreadPool
+from PySide6.QtGui import QAction, QFontDatabase
 from functools import partial
-from app import ScalingMode
+from ScalingMode import ScalingMode
 from Layer import Layer
+from DisplayOptionsController import DisplayOptionsController
+from TimescaleWatcher import TimescaleWatcher
+from ColumnTasks import LoadColumnTask, SaveColumnTask
+import ColumnIO
 
 DEFAULT_THICKNESS = 1000
 DEFAULT_YOUNG_AGE = 0.0
 DEFAULT_OLD_AGE = 4567.0
 DEFAULT_FORMATION_TOP = 0
+DEFAULT_EXPORT_SCALE = 3.0
+MAX_EXPORT_DPI = 2400
+MAX_EXPORT_PAGES = 1000
+ALL_FORMATS_FILTER = "PNG, SVG and PDF (*.png *.svg *.pdf)"
 
 def populate_rock_type_combo(combo_box):
     """Populate QComboBox with rock types grouped by category"""
@@ -258,6 +264,14 @@ class StratColumnMaker(QMainWindow):
         self.setGeometry(100, 100, 1200, 800)
         self.showMaximized()
         self.strat_column = None
+        self.column_task = None
+        self.column_task_dialog = None
+        self.export_dpi = None
+        self.export_pages = 1
+        # Re-exporting an unchanged column copies the earlier result instead of rendering it again
+        self.render_cache = None
+        # Timescale version saved with the column, kept even when it isn't installed here
+        self.column_timescale = None
         
         # Create toolbar
         self.create_toolbar()
@@ -275,8 +289,26 @@ class StratColumnMaker(QMainWindow):
 
         # Stratigraphic column
         self.strat_column = sc.StratColumn()
+        self.strat_column.layer_selected.connect(self.on_column_layer_selected)
         layout.addWidget(self.strat_column, 2)
 
+        # Batches display option changes so each frame repaints the column once
+        self.display_controller = DisplayOptionsController(self.strat_column, self)
+
+        # The versions can only be listed once the column has loaded the default chart
+        chronomap = self.strat_column.chronomap
+        for version in chronomap.available_versions():
+            self.timescale_combo_box.addItem(version, None if version == chronomap.version else version)
+        # Only picks made by the user, including the default again, replace the column's saved version
+        self.timescale_combo_box.activated.connect(self.on_timescale_version_changed)
+
+        # Reloads the timescale data files when they are edited
+        self.timescale_watcher = TimescaleWatcher(self.strat_column.chronomap, self)
+        self.timescale_watcher.timescale_changed.connect(self.on_timescale_changed)
+        # Timescales whose gaps and overlaps have been reported
+        self.reported_timescales = set()
+        self.watch_column_timescale()
+
         # Set default scaling mode
         default_scaling_mode = ScalingMode.CHRONOLOGY
 
@@ -362,6 +394,42 @@ class StratColumnMaker(QMainWindow):
         help_button.setMenu(help_menu)
         self.toolbar.addWidget(help_button)
 
+        # Tools
+        tools_button = QToolButton()
+        tools_button.setText("Tools")
+        tools_button.setPopupMode(QToolButton.InstantPopup)
+
+        tools_menu = QMenu(self)
+
+        memory_action = QAction("Memory Report...", self)
+        memory_action.triggered.connect(self.show_memory_report)
+        tools_menu.addAction(memory_action)
+
+        tools_button.setMenu(tools_menu)
+        self.toolbar.addWidget(tools_button)
+
+    def show_memory_report(self):
+        """Show and print where memory goes: layers, table widgets, textures, Python allocations and Qt objects"""
+        from MemoryProfiler import memory_report
+
+        report = memory_report(self)
+        print(report)
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Memory Report")
+        dialog.resize(700, 500)
+        dialog_layout = QVBoxLayout(dialog)
+
+        report_view = QPlainTextEdit(report)
+        report_view.setReadOnly(True)
+        report_view.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        dialog_layout.addWidget(report_view)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Close)
+        buttons.rejected.connect(dialog.reject)
+        dialog_layout.addWidget(buttons)
+        dialog.exec()
+
     def sort_column(self):
         pass
 
@@ -371,87 +439,132 @@ class StratColumnMaker(QMainWindow):
     def new_column(self):
         for _ in range(0, len(self.strat_column.layers)):
             self.strat_column.remove_layer(len(self.strat_column.layers) - 1)
-        
+        # A new column starts on the default chart, not the version of the column opened before it
+        self.set_timescale_version(None)
+
         self.update_layer_table()
 
+    def start_column_task(self, task, label_text):
+        """Run a column file task on the thread pool behind a cancellable progress dialog"""
+        progress_dialog = QProgressDialog(label_text, "Cancel", 0, 100, self)
+        progress_dialog.setWindowTitle("Stratigraphic Column Maker")
+        progress_dialog.setWindowModality(Qt.WindowModal)
+        progress_dialog.setMinimumDuration(300)
+        progress_dialog.setAutoReset(False)
+        progress_dialog.setAutoClose(False)
+        progress_dialog.canceled.connect(task.cancel)
+
+        task.signals.progress.connect(self.on_column_task_progress)
+        task.signals.cancelled.connect(self.on_column_task_cancelled)
+
+        # Keep references until the task reports back on the GUI thread
+        self.column_task = task
+        self.column_task_dialog = progress_dialog
+        QThreadPool.globalInstance().start(task)
+
+    def finish_column_task(self):
+        """Close the progress dialog and release the finished task"""
+        task = self.column_task
+        if self.column_task_dialog is not None:
+            self.column_task_dialog.close()
+        self.column_task = None
+        self.column_task_dialog = None
+        return task
+
+    def on_column_task_progress(self, done, total):
+        if self.column_task_dialog is not None:
+            self.column_task_dialog.setMaximum(total)
+            self.column_task_dialog.setValue(done)
+
+    def on_column_task_cancelled(self):
+        self.finish_column_task()
+
     def open_column(self):
         """Open a column file, clearing current layers and updating file path"""
+        if self.column_task is not None:
+            return  # Another open or save is still running
+
         file_path, _ = QFileDialog.getOpenFileName(
             self,
             "Open Stratigraphic Column",
             "",
-            "JSON Files (*.json);;All Files (*)"
+            "Column Files (*.json *.stratcol);;JSON Files (*.json);;Binary Column Files (*.stratcol);;All Files (*)"
         )
         
         if not file_path:
             return  # User cancelled the dialog
         
-        try:
-            # Load the file data
-            with open(file_path, "r", encoding='utf-8') as f:
-                data = json.load(f)
-
-            # Extract layers and metadata separately
-            layers_data = data.get("layers", [])
-            metadata = data.get("metadata", {})
-            intrusion_from = data.get("intrusion_from_age", DEFAULT_YOUNG_AGE)
-            intrusion_to = data.get("intrusion_to_age", DEFAULT_YOUNG_AGE)
-
-            # Clear all current layers before adding new ones
-            for _ in range(len(self.strat_column.layers)):
-                self.strat_column.remove_layer(len(self.strat_column.layers) - 1)
-
-            # Convert each dict into a Layer and add to column
-            layers = [Layer.from_dict(layer_dict) for layer_dict in layers_data]
-            
-            for layer in layers:
-                self.strat_column.add_layer(layer)
+        # Load, parse and convert layers on a worker thread
+        task = LoadColumnTask(file_path)
+        task.signals.finished.connect(self.on_column_loaded)
+        task.signals.failed.connect(self.on_column_load_failed)
+        self.start_column_task(task, "Opening stratigraphic column...")
 
-            # Update the layer table display
-            self.update_layer_table()
+    def on_column_loaded(self, column):
+        """Receive the finished layer list from the load worker and swap it in at once"""
+        task = self.finish_column_task()
+        file_path = task.file_path
 
-            # Update the current file path to the opened file
-            self.current_file_path = file_path
+        layers = column["layers"]
+        intrusion_from_age = column["intrusion_from_age"]
+        intrusion_to_age = column["intrusion_to_age"]
 
-            # Reset input fields to defaults
-            self.reset_input_fields()
+        # Replace all current layers with the loaded ones
+        rejected_layers = self.strat_column.set_layers(layers)
+        self.set_timescale_version(column["timescale"])
 
-            # Restore intrusion age range from metadata (with defaults if not present)
-            intrusion_from_age = intrusion_from
-            intrusion_to_age = intrusion_to
+        # Update the layer table display
+        self.update_layer_table()
 
-            self.intrusion_from_age_input.setValue(intrusion_from_age)
-            self.intrusion_to_age_input.setValue(intrusion_to_age)
+        # Update the current file path to the opened file
+        self.current_file_path = file_path
 
-            # Emit the signal to update the visual display
-            self.intrusion_age_range_changed.emit(intrusion_from_age, intrusion_to_age)
-            
-            # Show success message
-            QMessageBox.information(
+        # Reset input fields to defaults
+        self.reset_input_fields()
+
+        # Restore intrusion age range from the file (with defaults if not present)
+        self.intrusion_from_age_input.setValue(intrusion_from_age)
+        self.intrusion_to_age_input.setValue(intrusion_to_age)
+
+        # Emit the signal to update the visual display
+        self.intrusion_age_range_changed.emit(intrusion_from_age, intrusion_to_age)
+
+        if rejected_layers:
+            rejected_names = ", ".join(layer.name for layer in rejected_layers)
+            QMessageBox.warning(
                 self,
-                "Open Successful",
-                f"Stratigraphic column loaded from:\n{os.path.abspath(file_path)}\n\nLoaded {len(layers)} layers."
+                "Layer Overlap Warning",
+                f"{len(rejected_layers)} layers overlap with other layers and were not added:\n{rejected_names}"
             )
-            
-        except FileNotFoundError:
+        
+        # Show success message
+        QMessageBox.information(
+            self,
+            "Open Successful",
+            f"Stratigraphic column loaded from:\n{os.path.abspath(file_path)}\n\nLoaded {len(layers)} layers."
+        )
+
+    def on_column_load_failed(self, error):
+        task = self.finish_column_task()
+
+        if isinstance(error, FileNotFoundError):
             QMessageBox.critical(
                 self,
                 "Open Error",
-                f"File not found:\n{file_path}"
+                f"File not found:\n{task.file_path}"
             )
-        except json.JSONDecodeError as e:
+        elif isinstance(error, json.JSONDecodeError):
             QMessageBox.critical(
                 self,
                 "Open Error",
-                f"Invalid JSON file format:\n{str(e)}"
+                f"Invalid JSON file format:\n{str(error)}"
             )
-        except Exception as e:
+        else:
             QMessageBox.critical(
                 self,
                 "Open Error",
-                f"Failed to open stratigraphic column:\n{str(e)}"
+                f"Failed to open stratigraphic column:\n{str(error)}"
             )
-        
 
     def save_column(self):
         """Save the current column - uses Save As if no file exists, otherwise overwrites"""
@@ -461,120 +574,101 @@ class StratColumnMaker(QMainWindow):
             self.save_as_column()
             return
         
-        try:
-            # We have a previous save location, so overwrite it
-            # Collect all layer data
-            column_data = {
-                "layers": [],
-                "intrusion_from_age": self.intrusion_from_age_input.value(),
-                "intrusion_to_age": self.intrusion_to_age_input.value(),
-                "metadata": {
-                    "version": "1.0",
-                    "created_with": "Stratigraphic Column Maker",
-                    "total_layers": len(self.strat_column.layers),
-                }
-            }
-            
-            # Convert each layer to dictionary format
-            for layer in self.strat_column.layers:
-                layer_dict = layer.to_dict()
-                column_data["layers"].append(layer_dict)
-            
-            # Save to the existing file path
-            with open(self.current_file_path, 'w', encoding='utf-8') as f:
-                json.dump(column_data, f, indent=2, ensure_ascii=False)
-            
-            # Show success message
-            QMessageBox.information(
-                self, 
-                "Save Successful", 
-                f"Stratigraphic column saved to:\n{os.path.abspath(self.current_file_path)}"
-            )
-            
-        except Exception as e:
-            # Handle any errors that occur during saving
-            QMessageBox.critical(
-                self, 
-                "Save Error", 
-                f"Failed to save stratigraphic column:\n{str(e)}"
-            )
+        # We have a previous save location, so overwrite it
+        self.start_save_task(self.current_file_path)
 
     def save_as_column(self):
         """Save the current column to a user-selected location"""
-        try:
-            # Get the save file path from user
-            file_path, _ = QFileDialog.getSaveFileName(
-                self,
-                "Save Stratigraphic Column As...",
-                os.path.expanduser("~/strat_column.json"),
-                "JSON files (*.json);;All files (*.*)"
-            )
-            
-            # If user cancelled the dialog
-            if not file_path:
-                return
-            
-            # Ensure the file has a .json extension if none provided
+        # Get the save file path from user
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self,
+            "Save Stratigraphic Column As...",
+            os.path.expanduser("~/strat_column.json"),
+            "JSON files (*.json);;Binary column files (*.stratcol);;All files (*.*)"
+        )
+        
+        # If user cancelled the dialog
+        if not file_path:
+            return
+        
+        # Ensure the file has an extension matching the selected format
+        if "Binary" in selected_filter:
+            if not ColumnIO.is_binary_column_file(file_path):
+                file_path += ColumnIO.BINARY_EXTENSION
+        elif "JSON" in selected_filter:
             if not file_path.lower().endswith('.json'):
                 file_path += '.json'
-            
-            # Collect all layer data
-            column_data = {
-                "layers": [],
-                "intrusion_from_age": self.intrusion_from_age_input.value(),
-                "intrusion_to_age": self.intrusion_to_age_input.value(),
-                "metadata": {
-                    "version": "1.0",
-                    "created_with": "Stratigraphic Column Maker",
-                    "total_layers": len(self.strat_column.layers),
-                }
-            }
-            
-            # Convert each layer to dictionary format
-            for layer in self.strat_column.layers:
-                layer_dict = layer.to_dict()
-                column_data["layers"].append(layer_dict)
-            
-            # Create directory if it doesn't exist
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
-            
-            # Save to JSON file with proper formatting
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(column_data, f, indent=2, ensure_ascii=False)
-            
-            # Show success message
-            QMessageBox.information(
-                self, 
-                "Save Successful", 
-                f"Stratigraphic column saved successfully to:\n{os.path.abspath(file_path)}"
-            )
-            
-            self.current_file_path = file_path
-            
-        except Exception as e:
-            # Handle any errors that occur during saving
-            QMessageBox.critical(
-                self, 
-                "Save Error", 
-                f"Failed to save stratigraphic column:\n{str(e)}"
-            )
+        elif not file_path.lower().endswith('.json') and not ColumnIO.is_binary_column_file(file_path):
+            file_path += '.json'
+        
+        self.start_save_task(file_path)
+
+    def start_save_task(self, file_path):
+        """Serialize and write the column on a worker thread"""
+        if self.column_task is not None:
+            return  # Another open or save is still running
+
+        task = SaveColumnTask(
+            file_path,
+            self.strat_column.layers,
+            self.intrusion_from_age_input.value(),
+            self.intrusion_to_age_input.value(),
+            self.column_timescale
+        )
+        task.signals.finished.connect(self.on_column_saved)
+        task.signals.failed.connect(self.on_column_save_failed)
+        self.start_column_task(task, "Saving stratigraphic column...")
+
+    def on_column_saved(self, file_path):
+        self.finish_column_task()
+
+        # Show success message
+        QMessageBox.information(
+            self, 
+            "Save Successful", 
+            f"Stratigraphic column saved to:\n{os.path.abspath(file_path)}"
+        )
+        
+        self.current_file_path = file_path
+
+    def on_column_save_failed(self, error):
+        self.finish_column_task()
+
+        # Handle any errors that occur during saving
+        QMessageBox.critical(
+            self, 
+            "Save Error", 
+            f"Failed to save stratigraphic column:\n{str(error)}"
+        )
+
+    def get_render_cache(self):
+        """Render cache for exports, opened on the first export so it stays off the startup path"""
+        if self.render_cache is None:
+            from RenderCache import RenderCache
+            self.render_cache = RenderCache()
+        return self.render_cache
 
     def export_image(self):
-        """Export column as high-resolution image with PNG and SVG options"""
+        """Export column as high-resolution PNG, SVG or PDF, or all three at once"""
         try:
             # Single file dialog with multiple format options
             file_path, selected_filter = QFileDialog.getSaveFileName(
                 self,
                 "Export Stratigraphic Column",
                 "strat_column",  # Default filename without extension
-                "High-Resolution PNG (*.png);;Vector SVG (*.svg);;All files (*.*)"
+                f"High-Resolution PNG (*.png);;Vector SVG (*.svg);;Multi-page PDF (*.pdf);;{ALL_FORMATS_FILTER};;All files (*.*)"
             )
             
             if not file_path:
                 return
             
             # Determine export format based on selected filter
-            if "PNG" in selected_filter:
+            if selected_filter == ALL_FORMATS_FILTER:
+                # One file per format next to each other, named after the chosen file
+                base_path = os.path.splitext(file_path)[0]
+                self._export_all_formats({fmt: f"{base_path}.{fmt}" for fmt in ('png', 'svg', 'pdf')})
+
+            elif "PNG" in selected_filter:
                 # Ensure PNG extension
                 if not file_path.lower().endswith('.png'):
                     file_path += '.png'
@@ -586,10 +680,18 @@ class StratColumnMaker(QMainWindow):
                     file_path += '.svg'
                 self._export_vector_svg(file_path)
                 
+            elif "PDF" in selected_filter:
+                # Ensure PDF extension
+                if not file_path.lower().endswith('.pdf'):
+                    file_path += '.pdf'
+                self._export_pdf(file_path)
+                
             else:
                 # Handle "All files" - determine by file extension
                 if file_path.lower().endswith('.svg'):
                     self._export_vector_svg(file_path)
+                elif file_path.lower().endswith('.pdf'):
+                    self._export_pdf(file_path)
                 elif file_path.lower().endswith('.png'):
                     self._export_high_res_png(file_path)
                 else:
@@ -601,106 +703,195 @@ class StratColumnMaker(QMainWindow):
             QMessageBox.critical(self, "Export Error", 
                                 f"Failed to export file:\n{str(e)}")
 
+    def _ask_export_dpi(self):
+        """Ask for the PNG resolution, where the screen DPI gives an image the same size as the column on screen"""
+        screen_dpi = self.strat_column.logicalDpiY()
+        if self.export_dpi is None:
+            self.export_dpi = round(screen_dpi * DEFAULT_EXPORT_SCALE)
+
+        dpi, ok = QInputDialog.getInt(
+            self,
+            "Export PNG",
+            f"Resolution in DPI (screen is {screen_dpi} DPI):",
+            self.export_dpi,
+            screen_dpi // 2,
+            MAX_EXPORT_DPI
+        )
+        if not ok:
+            return None
+        self.export_dpi = dpi
+        return dpi
+
     def _export_high_res_png(self, file_path):
         """Export as high-resolution PNG with customizable DPI"""
-        
-        try:
-            # Get DPI/scale factor from user
-            scale_factor = 3.0
-            
-            # Get original widget size
-            original_size = self.strat_column.size()
-            
-            # Calculate high-resolution dimensions
-            high_res_width = int(original_size.width() * scale_factor)
-            high_res_height = int(original_size.height() * scale_factor)
-            high_res_size = QSize(high_res_width, high_res_height)
-            
-            # Create high-resolution pixmap
-            pixmap = QPixmap(high_res_size)
-            pixmap.fill()
-            
-            # Create painter for high-resolution rendering
-            painter = QPainter(pixmap)
-            
-            # Enable high-quality rendering
-            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-            painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
-            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
-            
-            # Scale the painter for high-resolution output
-            painter.scale(scale_factor, scale_factor)
-            
-            # Render the widget to the high-resolution pixmap
-            self.strat_column.render(
-                painter, 
-                QPoint(), 
-                self.strat_column.rect(),
-                QWidget.RenderFlag.DrawWindowBackground | QWidget.RenderFlag.DrawChildren
-            )
-            
-            painter.end()
-            
-            # Save the pixmap as PNG
-            success = pixmap.save(file_path, "PNG", 95)
-            
-            if success:
-                # Show success message with file info
-                file_size = os.path.getsize(file_path)
-                file_size_mb = file_size / (1024 * 1024)
-                abs_path = os.path.abspath(file_path)
-                
-                QMessageBox.information(
-                    self, 
-                    "Export Successful", 
-                    f"High-resolution PNG saved successfully!\n\n"
-                    f"Path: {abs_path}\n"
-                    f"Resolution: {high_res_width} × {high_res_height} pixels\n"
-                    f"File size: {file_size_mb:.2f} MB"
-                )
-            else:
-                QMessageBox.warning(
-                    self, 
-                    "Export Warning", 
-                    "Failed to save PNG file. Please check file permissions and disk space."
-                )
-                
-        except Exception as e:
-            QMessageBox.critical(
-                self, 
-                "Export Error", 
-                f"Failed to export high-resolution PNG:\n{str(e)}"
-            )
-            raise
+        if self.column_task is not None:
+            return  # Another file operation is still running
+
+        dpi = self._ask_export_dpi()
+        if dpi is None:
+            return
+        scale_factor = dpi / self.strat_column.logicalDpiY()
+
+        # Export machinery is imported on first use to keep it off the startup path
+        from ExportTasks import ExportPngTask
+
+        # Render the column in strips on a worker thread and stream them into the PNG, using the
+        # widget's window color as the background like the on-screen column
+        original_size = self.strat_column.size()
+        task = ExportPngTask(
+            file_path,
+            self.strat_column.renderer,
+            original_size.width(),
+            original_size.height(),
+            scale_factor,
+            self.strat_column.palette().window().color(),
+            dpi,
+            self.get_render_cache()
+        )
+        task.signals.finished.connect(self.on_png_exported)
+        task.signals.failed.connect(self.on_png_export_failed)
+        self.start_column_task(task, "Exporting high-resolution PNG...")
+
+    def on_png_exported(self, image_size):
+        task = self.finish_column_task()
+
+        # Show success message with file info
+        high_res_width, high_res_height = image_size
+        file_size_mb = os.path.getsize(task.file_path) / (1024 * 1024)
+        abs_path = os.path.abspath(task.file_path)
+
+        QMessageBox.information(
+            self, 
+            "Export Successful", 
+            f"High-resolution PNG saved successfully!\n\n"
+            f"Path: {abs_path}\n"
+            f"Resolution: {high_res_width} × {high_res_height} pixels ({task.dpi} DPI)\n"
+            f"File size: {file_size_mb:.2f} MB"
+        )
+
+    def on_png_export_failed(self, error):
+        self.finish_column_task()
+
+        QMessageBox.critical(
+            self, 
+            "Export Error", 
+            f"Failed to export high-resolution PNG:\n{str(error)}"
+        )
 
     def _export_vector_svg(self, file_path):
         """Export as scalable vector graphics (SVG)"""
         
-        # Create SVG generator
-        generator = QSvgGenerator()
-        generator.setFileName(file_path)
-        generator.setSize(self.strat_column.size())
-        generator.setViewBox(self.strat_column.rect())
-        generator.setTitle("Stratigraphic Column")
-        generator.setDescription("Vector export of stratigraphic column")
-        
-        # Create painter and render
-        painter = QPainter()
-        if painter.begin(generator):
-            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-            painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
-            
-            # Render the widget to SVG
-            self.strat_column.render(painter, QPoint(), QRegion(), QWidget.RenderFlag.DrawWindowBackground | QWidget.RenderFlag.DrawChildren)
-            painter.end()
+        import ColumnExport
+
+        # Write the column straight from the renderer, storing each lithology pattern once
+        renderer = self.strat_column.renderer
+        width = self.strat_column.width()
+        height = self.strat_column.height()
+        background = self.strat_column.palette().window().color()
+        self.get_render_cache().export(
+            renderer,
+            file_path,
+            'svg',
+            {'width': width, 'height': height, 'background': background},
+            lambda path: ColumnExport.export_svg(renderer, path, width, height, background)
+        )
             
-            # Show success message
-            abs_path = os.path.abspath(file_path)
-            QMessageBox.information(self, "Export Successful", 
-                                f"Vector SVG saved to:\n{abs_path}")
-        else:
-            QMessageBox.warning(self, "Export Warning", 
-                            "Failed to initialize SVG painter.")
+        # Show success message
+        abs_path = os.path.abspath(file_path)
+        QMessageBox.information(self, "Export Successful", 
+                            f"Vector SVG saved to:\n{abs_path}")
+
+    def _export_pdf(self, file_path):
+        """Export as a vector PDF, splitting the column across pages at layer boundaries"""
+        if self.column_task is not None:
+            return  # Another file operation is still running
+
+        pages, ok = QInputDialog.getInt(
+            self,
+            "Export PDF",
+            "Column length in pages:",
+            self.export_pages,
+            1,
+            MAX_EXPORT_PAGES
+        )
+        if not ok:
+            return
+        self.export_pages = pages
+
+        from ExportTasks import ExportPdfTask
+
+        task = ExportPdfTask(file_path, self.strat_column.renderer, self.strat_column.width(), pages,
+                             self.get_render_cache())
+        task.signals.finished.connect(self.on_pdf_exported)
+        task.signals.failed.connect(self.on_pdf_export_failed)
+        self.start_column_task(task, "Exporting PDF...")
+
+    def on_pdf_exported(self, page_count):
+        task = self.finish_column_task()
+
+        abs_path = os.path.abspath(task.file_path)
+        QMessageBox.information(
+            self,
+            "Export Successful",
+            f"PDF saved to:\n{abs_path}\n\nPages: {page_count}"
+        )
+
+    def on_pdf_export_failed(self, error):
+        self.finish_column_task()
+
+        QMessageBox.critical(
+            self,
+            "Export Error",
+            f"Failed to export PDF:\n{str(error)}"
+        )
+
+    def _export_all_formats(self, file_paths):
+        """Export PNG, SVG and PDF together, laying the column out once for all three"""
+        if self.column_task is not None:
+            return  # Another file operation is still running
+
+        dpi = self._ask_export_dpi()
+        if dpi is None:
+            return
+
+        from ExportTasks import ExportFormatsTask
+
+        size = self.strat_column.size()
+        task = ExportFormatsTask(
+            file_paths,
+            self.strat_column.renderer,
+            size.width(),
+            size.height(),
+            dpi / self.strat_column.logicalDpiY(),
+            self.strat_column.palette().window().color(),
+            dpi,
+            self.get_render_cache()
+        )
+        task.signals.finished.connect(self.on_formats_exported)
+        task.signals.failed.connect(self.on_formats_export_failed)
+        self.start_column_task(task, "Exporting PNG, SVG and PDF...")
+
+    def on_formats_exported(self, results):
+        task = self.finish_column_task()
+
+        image_width, image_height = results['png']
+        paths = "\n".join(os.path.abspath(task.file_paths[fmt]) for fmt in ('png', 'svg', 'pdf'))
+        QMessageBox.information(
+            self,
+            "Export Successful",
+            f"Column exported to:\n{paths}\n\n"
+            f"PNG resolution: {image_width} × {image_height} pixels ({task.dpi} DPI)\n"
+            f"PDF pages: {results['pdf']}"
+        )
+
+    def on_formats_export_failed(self, error):
+        self.finish_column_task()
+
+        QMessageBox.critical(
+            self,
+            "Export Error",
+            f"Failed to export PNG, SVG and PDF:\n{str(error)}"
+        )
 
     def reset_input_fields(self):
         current_mode = self.scaling_mode_combo_box.currentData()
@@ -864,6 +1055,14 @@ class StratColumnMaker(QMainWindow):
         scaling_mode_layout.addWidget(self.scaling_mode_combo_box)
         layout.addLayout(scaling_mode_layout)
 
+        # Timescale version the column is drawn against, saved with the column
+        timescale_layout = QHBoxLayout()
+        timescale_layout.setSpacing(0)
+        timescale_layout.addWidget(QLabel("Timescale version:"))
+        self.timescale_combo_box = QComboBox()
+        timescale_layout.addWidget(self.timescale_combo_box)
+        layout.addLayout(timescale_layout)
+
         # Formation gap display mode
         formation_gap_layout = QHBoxLayout()
         formation_gap_label = QLabel("Show Formation Gaps")
@@ -1072,6 +1271,62 @@ class StratColumnMaker(QMainWindow):
         
         self.strat_column.update_scaling_mode(current_mode)
 
+    def on_timescale_version_changed(self, index):
+        self.column_timescale = self.timescale_combo_box.itemData(index)
+        self.strat_column.update_timescale_version(self.column_timescale)
+        self.watch_column_timescale()
+
+    def set_timescale_version(self, version):
+        """
+        Select a column's timescale version. One that isn't installed is shown against the default
+        chart with a warning, but stays the column's version when it is saved.
+        """
+        index = 0 if version is None else self.timescale_combo_box.findText(version)
+        if index < 0:
+            QMessageBox.warning(
+                self,
+                "Timescale Version Not Found",
+                f"This column uses timescale version {version}, which isn't installed.\n"
+                f"It is shown against {self.strat_column.chronomap.version} instead, "
+                f"and saving keeps version {version} unless you pick another one."
+            )
+            index = 0
+        self.timescale_combo_box.setCurrentIndex(index)
+        self.strat_column.update_timescale_version(self.timescale_combo_box.itemData(index))
+        self.watch_column_timescale()
+        self.column_timescale = version if version != self.strat_column.chronomap.version else None
+
+    def on_column_layer_selected(self, index):
+        """Select and reveal the table row of a layer clicked in the column"""
+        if index < 0:
+            self.layer_table.clearSelection()
+            return
+        self.layer_table.selectRow(index)
+        self.layer_table.scrollTo(self.layer_table.model().index(index, 0))
+
+    def watch_column_timescale(self):
+        """Reload the column's timescale when its files are edited, and report its gaps and overlaps once"""
+        mapper = self.strat_column.renderer.get_timescale()
+        self.timescale_watcher.watch(mapper)
+        if mapper not in self.reported_timescales:
+            self.reported_timescales.add(mapper)
+            self.report_tiling_issues(mapper)
+
+    @staticmethod
+    def report_tiling_issues(mapper):
+        for issue in mapper.tiling_issues:
+            print(f"Timescale {mapper.version}: {mapper.describe_tiling_issue(issue)}")
+
+    def on_timescale_changed(self, mapper, changes):
+        """Repaint the column if any of its layers span a unit that was edited in its timescale's data"""
+        # The edit may have fixed or introduced gaps, so they are reported again
+        self.report_tiling_issues(mapper)
+        if self.strat_column.renderer.get_timescale() is not mapper:
+            return
+        affected = self.strat_column.renderer.layers_affected_by(changes)
+        if affected:
+            self.strat_column.update()
+
     def update_layer_table(self):
         self.layer_table.setRowCount(len(self.strat_column.layers))
         
@@ -1130,6 +1385,8 @@ class StratColumnMaker(QMainWindow):
         dialog = LayerEditDialog(layer, self)
         
         if dialog.exec() == QDialog.Accepted:
+            # Edited ages and visibility feed the age index, so drop it before repainting
+            self.strat_column.invalidate_layer_cache()
             self.strat_column.update()
             self.update_layer_table()
         else:
@@ -0,0 +1,364 @@
+import base64
+import re
+from xml.sax.saxutils import escape, quoteattr
+
+from PySide6.QtGui import QPen, QBrush, QColor, QFont, QFontMetricsF, QTransform, QPainterPath, QGuiApplication
+from PySide6.QtCore import Qt, QRect, QRectF, QBuffer, QByteArray, QIODevice
+
+DEFAULT_DPI = 96.0
+POINTS_PER_INCH = 72.0
+
+# Dash patterns in units of pen width, matching Qt's own pen styles
+DASH_PATTERNS = {
+    Qt.DashLine: (4, 2),
+    Qt.DotLine: (1, 2),
+    Qt.DashDotLine: (4, 2, 1, 2),
+    Qt.DashDotDotLine: (4, 2, 1, 2, 1, 2)
+}
+
+# Characters XML 1.0 doesn't allow anywhere in a document, even escaped, e.g. a vertical tab pasted
+# into a layer name; the escapes below drop them so the file still parses
+INVALID_XML_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+
+def _escape(text):
+    return escape(INVALID_XML_CHARS.sub('', text))
+
+def _quoteattr(value):
+    return quoteattr(INVALID_XML_CHARS.sub('', value))
+
+def screen_dpi():
+    """
+    Dots per inch point sized fonts are converted at. It is the screen's, so text keeps its on-screen
+    size relative to the layout, which also makes it part of what an SVG export looks like.
+    """
+    screen = QGuiApplication.primaryScreen()
+    return screen.logicalDotsPerInchY() if screen is not None else DEFAULT_DPI
+
+def _num(value):
+    """Format a coordinate compactly, without trailing zeros"""
+    text = f"{value:.3f}".rstrip('0').rstrip('.')
+    return '0' if text in ('', '-0') else text
+
+def _flag_value(flags):
+    return flags.value if hasattr(flags, 'value') else int(flags)
+
+class SvgPainter:
+    """
+    Painter that writes SVG directly, for the subset of the QPainter API the column renderer uses.
+    Texture brushes become <pattern> elements in <defs>, written once per texture and referenced
+    by id from every shape that uses them, so the file grows with the number of shapes rather than
+    shapes times texture size.
+    """
+
+    def __init__(self, width, height, title="Stratigraphic Column", description=""):
+        self.width = width
+        self.height = height
+        self.title = title
+        self.description = description
+
+        self.dpi = screen_dpi()
+
+        self._pen = QPen(Qt.black, 1)
+        self._brush = QBrush(Qt.NoBrush)
+        self._font = QFont()
+        self._transform = QTransform()
+        self._state_stack = []
+
+        self.elements = []
+        self.patterns = {}
+        self.clip_paths = {}
+        self.defs = []
+
+    # State
+
+    def setRenderHint(self, hint, on=True):
+        pass
+
+    def pen(self):
+        return QPen(self._pen)
+
+    def setPen(self, pen):
+        # QPen converts colors and pen styles the same way QPainter.setPen does
+        self._pen = QPen(pen)
+
+    def brush(self):
+        return QBrush(self._brush)
+
+    def setBrush(self, brush):
+        self._brush = QBrush(brush)
+
+    def font(self):
+        return QFont(self._font)
+
+    def setFont(self, font):
+        self._font = QFont(font)
+
+    def save(self):
+        self._state_stack.append((QPen(self._pen), QBrush(self._brush), QFont(self._font), QTransform(self._transform)))
+
+    def restore(self):
+        if self._state_stack:
+            self._pen, self._brush, self._font, self._transform = self._state_stack.pop()
+
+    def worldTransform(self):
+        return QTransform(self._transform)
+
+    def setWorldTransform(self, transform, combine=False):
+        self._transform = QTransform(transform * self._transform if combine else transform)
+
+    def translate(self, dx, dy=None):
+        if dy is None:
+            dx, dy = dx.x(), dx.y()
+        self._transform.translate(dx, dy)
+
+    def rotate(self, angle):
+        self._transform.rotate(angle)
+
+    def scale(self, sx, sy):
+        self._transform.scale(sx, sy)
+
+    # Attributes
+
+    def _transform_attr(self):
+        t = self._transform
+        if t.isIdentity():
+            return ''
+        values = (t.m11(), t.m12(), t.m21(), t.m22(), t.dx(), t.dy())
+        return f' transform="matrix({",".join(_num(v) for v in values)})"'
+
+    def _color_attrs(self, name, color):
+        attrs = f' {name}="{color.name()}"'
+        if color.alpha() < 255:
+            attrs += f' {name}-opacity="{_num(color.alphaF())}"'
+        return attrs
+
+    def _stroke_attrs(self):
+        pen = self._pen
+        if pen.style() == Qt.NoPen:
+            return ' stroke="none"'
+
+        # Zero width pens are cosmetic hairlines, drawn one pixel wide like on screen
+        width = pen.widthF() or 1.0
+        attrs = self._color_attrs('stroke', pen.color())
+        if width != 1.0:
+            attrs += f' stroke-width="{_num(width)}"'
+
+        dashes = DASH_PATTERNS.get(pen.style())
+        if dashes:
+            attrs += f' stroke-dasharray="{",".join(_num(d * width) for d in dashes)}"'
+        return attrs
+
+    def _fill_attrs(self, brush=None):
+        brush = self._brush if brush is None else brush
+        style = brush.style()
+
+        if style == Qt.NoBrush:
+            return ' fill="none"'
+        if style == Qt.TexturePattern:
+            return f' fill="url(#{self._pattern_id(brush)})"'
+        return self._color_attrs('fill', brush.color())
+
+    def _pattern_id(self, brush):
+        """Id of the <pattern> for a texture brush, adding it to <defs> the first time it is used"""
+        image = brush.textureImage()
+        key = image.cacheKey()
+
+        pattern_id = self.patterns.get(key)
+        if pattern_id is None:
+            pattern_id = f"pattern{len(self.patterns)}"
+            self.patterns[key] = pattern_id
+
+            data = QByteArray()
+            buffer = QBuffer(data)
+            buffer.open(QIODevice.WriteOnly)
+            image.save(buffer, "PNG")
+            buffer.close()
+            encoded = base64.b64encode(bytes(data)).decode('ascii')
+
+            width, height = image.width(), image.height()
+            self.defs.append(
+                f'<pattern id="{pattern_id}" patternUnits="userSpaceOnUse" width="{width}" height="{height}">'
+                f'<image width="{width}" height="{height}" xlink:href="data:image/png;base64,{encoded}"/>'
+                f'</pattern>'
+            )
+        return pattern_id
+
+    def _font_attrs(self):
+        font = self._font
+        size = font.pixelSize() if font.pixelSize() > 0 else font.pointSizeF() * self.dpi / POINTS_PER_INCH
+        attrs = f' font-family={_quoteattr(font.family() + ", sans-serif")} font-size="{_num(size)}"'
+        if font.bold():
+            attrs += ' font-weight="bold"'
+        if font.italic():
+            attrs += ' font-style="italic"'
+        return attrs
+
+    # Drawing
+
+    def drawRect(self, *args):
+        rect = QRectF(*args) if len(args) == 4 else QRectF(args[0])
+        self.elements.append(
+            f'<rect x="{_num(rect.x())}" y="{_num(rect.y())}" width="{_num(rect.width())}" height="{_num(rect.height())}"'
+            f'{self._fill_attrs()}{self._stroke_attrs()}{self._transform_attr()}/>'
+        )
+
+    def fillRect(self, rect, color):
+        rect = QRectF(rect)
+        brush = color if isinstance(color, QBrush) else QBrush(QColor(color))
+        self.elements.append(
+            f'<rect x="{_num(rect.x())}" y="{_num(rect.y())}" width="{_num(rect.width())}" height="{_num(rect.height())}"'
+            f'{self._fill_attrs(brush)} stroke="none"{self._transform_attr()}/>'
+        )
+
+    def drawLine(self, *args):
+        if len(args) == 2:
+            x1, y1, x2, y2 = args[0].x(), args[0].y(), args[1].x(), args[1].y()
+        else:
+            x1, y1, x2, y2 = args
+        if self._pen.style() == Qt.NoPen:
+            return
+        self.elements.append(
+            f'<line x1="{_num(x1)}" y1="{_num(y1)}" x2="{_num(x2)}" y2="{_num(y2)}"'
+            f'{self._stroke_attrs()}{self._transform_attr()}/>'
+        )
+
+    def strokePath(self, path: QPainterPath, pen):
+        saved_pen = self._pen
+        self._pen = QPen(pen)
+        try:
+            self.elements.append(f'<path d="{self._path_data(path)}" fill="none"{self._stroke_attrs()}{self._transform_attr()}/>')
+        finally:
+            self._pen = saved_pen
+
+    def _path_data(self, path):
+        commands = []
+        i = 0
+        count = path.elementCount()
+        while i < count:
+            element = path.elementAt(i)
+            if element.isMoveTo():
+                commands.append(f"M{_num(element.x)},{_num(element.y)}")
+                i += 1
+            elif element.isLineTo():
+                commands.append(f"L{_num(element.x)},{_num(element.y)}")
+                i += 1
+            else:
+                # A curve is stored as its first control point followed by two CurveToData elements
+                c2, end = path.elementAt(i + 1), path.elementAt(i + 2)
+                commands.append(f"C{_num(element.x)},{_num(element.y)} {_num(c2.x)},{_num(c2.y)} {_num(end.x)},{_num(end.y)}")
+                i += 3
+        return ' '.join(commands)
+
+    def drawText(self, *args):
+        if len(args) == 3 and isinstance(args[0], (QRect, QRectF)):
+            self._draw_text_in_rect(QRectF(args[0]), _flag_value(args[1]), str(args[2]))
+        elif len(args) == 2:
+            point, text = args
+            self._add_text(point.x(), point.y(), str(text), 'start')
+        else:
+            x, y, text = args
+            self._add_text(x, y, str(text), 'start')
+
+    def _text_element(self, x, y, text, anchor, transform_attr=''):
+        anchor_attr = f' text-anchor="{anchor}"' if anchor != 'start' else ''
+        return (
+            f'<text x="{_num(x)}" y="{_num(y)}"{self._color_attrs("fill", self._pen.color())}'
+            f'{self._font_attrs()}{anchor_attr} xml:space="preserve"{transform_attr}>{_escape(text)}</text>'
+        )
+
+    def _add_text(self, x, y, text, anchor):
+        if self._pen.style() == Qt.NoPen or not text:
+            return
+        self.elements.append(self._text_element(x, y, text, anchor, self._transform_attr()))
+
+    def _wrap_lines(self, text, width, metrics, word_wrap):
+        """Break text into lines the way Qt.TextWordWrap does, only ever breaking between words"""
+        lines = []
+        for paragraph in text.split('\n'):
+            if not word_wrap:
+                lines.append(paragraph)
+                continue
+
+            line = ''
+            for word in paragraph.split(' '):
+                candidate = f"{line} {word}" if line else word
+                if line and metrics.horizontalAdvance(candidate) > width:
+                    lines.append(line)
+                    line = word
+                else:
+                    line = candidate
+            lines.append(line)
+        return lines
+
+    def _draw_text_in_rect(self, rect, flags, text):
+        metrics = QFontMetricsF(self._font)
+        lines = self._wrap_lines(text, rect.width(), metrics, flags & _flag_value(Qt.TextWordWrap))
+
+        block_height = (len(lines) - 1) * metrics.lineSpacing() + metrics.height()
+        if flags & _flag_value(Qt.AlignBottom):
+            top = rect.bottom() - block_height
+        elif flags & _flag_value(Qt.AlignVCenter):
+            top = rect.center().y() - block_height / 2
+        else:
+            top = rect.top()
+
+        if flags & _flag_value(Qt.AlignRight):
+            x, anchor = rect.right(), 'end'
+        elif flags & _flag_value(Qt.AlignHCenter):
+            x, anchor = rect.center().x(), 'middle'
+        else:
+            x, anchor = rect.left(), 'start'
+
+        if self._pen.style() == Qt.NoPen or not any(lines):
+            return
+
+        if flags & _flag_value(Qt.TextDontClip):
+            for i, line in enumerate(lines):
+                self._add_text(x, top + metrics.ascent() + i * metrics.lineSpacing(), line, anchor)
+            return
+
+        # Qt clips the text to its rectangle
+        text_elements = ''.join(
+            self._text_element(x, top + metrics.ascent() + i * metrics.lineSpacing(), line, anchor)
+            for i, line in enumerate(lines) if line
+        )
+        self.elements.append(
+            f'<g clip-path="url(#{self._clip_path_id(rect)})"{self._transform_attr()}>{text_elements}</g>'
+        )
+
+    def _clip_path_id(self, rect):
+        """Id of a rectangular <clipPath>, shared by every label clipped to the same rectangle"""
+        key = (rect.x(), rect.y(), rect.width(), rect.height())
+
+        clip_id = self.clip_paths.get(key)
+        if clip_id is None:
+            clip_id = f"clip{len(self.clip_paths)}"
+            self.clip_paths[key] = clip_id
+            self.defs.append(
+                f'<clipPath id="{clip_id}"><rect x="{_num(rect.x())}" y="{_num(rect.y())}"'
+                f' width="{_num(rect.width())}" height="{_num(rect.height())}"/></clipPath>'
+            )
+        return clip_id
+
+    # Output
+
+    def write(self, f):
+        """Write the finished SVG document to a text file object"""
+        f.write('<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n')
+        f.write(f'<svg width="{self.width}" height="{self.height}" viewBox="0 0 {self.width} {self.height}"'
+                f' xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" version="1.1">\n')
+        f.write(f'<title>{_escape(self.title)}</title>\n')
+        if self.description:
+            f.write(f'<desc>{_escape(self.description)}</desc>\n')
+
+        if self.defs:
+            f.write('<defs>\n')
+            for definition in self.defs:
+                f.write(definition + '\n')
+            f.write('</defs>\n')
+
+        # Qt's default square caps and bevel joins, so lines end where they do on screen
+        f.write('<g stroke-linecap="square" stroke-linejoin="bevel" fill-rule="evenodd">\n')
+        for element in self.elements:
+            f.write(element + '\n')
+        f.write('</g>\n</svg>\n')
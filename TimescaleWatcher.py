@@ -0,0 +1,86 @@
+import os
+
+from PySide6.QtCore import QObject, QTimer, QFileSystemWatcher, Signal
+
+from ChronostratigraphicMapper import LEVEL_FILES, METADATA_FILE
+from ResourcePack import get_resource_pack
+
+# Editors often save in several writes, or by replacing the file, so wait for them to settle
+RELOAD_DELAY_MS = 250
+
+class TimescaleWatcher(QObject):
+    """
+    Watches the timescale data files of a mapper, and of each version of it passed to watch(),
+    and reloads the ones that change on disk. Changes are collected while a single-shot timer
+    runs, then only those files are re-read and diffed by each mapper that reads them, and
+    timescale_changed reports the mapper with the units that were added, removed or changed.
+    A version reads the default chart's file for any level it doesn't define, so an edit there
+    reloads every such version. Does nothing in the built app, where the data comes from the
+    read-only resource pack.
+    """
+    # The reloaded mapper, and its list of change dicts from ChronostratigraphicMapper.reload_files()
+    timescale_changed = Signal(object, list)
+
+    def __init__(self, chronomap, parent=None):
+        super().__init__(parent)
+        self.chronomap = chronomap
+        self.pending_files = set()
+        self.waited_files = set()
+        # {absolute path: file name}, and the mappers that read each path
+        self.paths = {}
+        self.readers = {}
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.on_file_changed)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(RELOAD_DELAY_MS)
+        self.timer.timeout.connect(self.reload)
+
+        self.watch(chronomap)
+
+    def watch(self, mapper):
+        """Also reload the files a mapper reads, e.g. a timescale version once a column uses it"""
+        if get_resource_pack() is not None:
+            return
+        for filename in list(LEVEL_FILES) + [METADATA_FILE]:
+            path = os.path.abspath(mapper.data_file_path(filename))
+            self.paths[path] = filename
+            readers = self.readers.setdefault(path, [])
+            if mapper not in readers:
+                readers.append(mapper)
+        self.watch_files()
+
+    def watch_files(self):
+        """Watch every data file that exists and isn't watched yet"""
+        watched = set(self.watcher.files())
+        missing = [path for path in self.paths if path not in watched and os.path.exists(path)]
+        if missing:
+            self.watcher.addPaths(missing)
+
+    def on_file_changed(self, path):
+        path = os.path.abspath(path)
+        if path not in self.paths:
+            return
+        self.pending_files.add(path)
+        self.timer.start()
+
+    def reload(self):
+        # Replacing a file drops it from the watcher, so add it back
+        self.watch_files()
+        # A file being replaced may not be back yet, so give it one more delay before reading it
+        waiting = {path for path in self.pending_files if not os.path.exists(path)} - self.waited_files
+        paths = self.pending_files - waiting
+        self.pending_files = waiting
+        self.waited_files = waiting
+        if waiting:
+            self.timer.start()
+
+        for mapper in dict.fromkeys(mapper for path in sorted(paths) for mapper in self.readers[path]):
+            filenames = sorted(self.paths[path] for path in paths if mapper in self.readers[path])
+            changes = mapper.reload_files(filenames)
+            if changes:
+                print(f"Timescale {mapper.version} reloaded from {', '.join(filenames)}: "
+                      f"{len(changes)} units changed")
+                self.timescale_changed.emit(mapper, changes)
@@ -1,24 +1,63 @@
 import sys
-import StratColumnMaker as scm
 
-from PySide6.QtWidgets import QApplication
-from enum import Enum
-
-class ScalingMode(Enum):
-    FORMATION_TOP_THICKNESS = "Formation top & thickness"
-    THICKNESS = "Thickness"
-    CHRONOLOGY = "Chronology"
+PROFILE_STARTUP_FLAG = "--profile-startup"
+PROFILE_PAINT_FLAG = "--profile-paint"
 
 if __name__ == "__main__":
+    import MemoryProfiler
+    memory_profile = MemoryProfiler.enabled_by_environment()
+    if memory_profile:
+        # Trace allocations from the start so the memory report covers everything loaded
+        MemoryProfiler.start()
+
+    profiler = None
+    if PROFILE_STARTUP_FLAG in sys.argv:
+        sys.argv.remove(PROFILE_STARTUP_FLAG)
+        from StartupProfiler import StartupProfiler
+        profiler = StartupProfiler()
+        profiler.install()
+
+    paint_profiler = None
+    if PROFILE_PAINT_FLAG in sys.argv:
+        sys.argv.remove(PROFILE_PAINT_FLAG)
+        from PaintProfiler import PaintProfiler
+        # Overlay the phase times on the column and log every frame over budget
+        paint_profiler = PaintProfiler(log_slow_frames=True, show_overlay=True)
+
+    # Imported here rather than at the top so --profile-startup can time them
+    import StratColumnMaker as scm
+    from PySide6.QtWidgets import QApplication
+
+    if profiler:
+        profiler.mark("imports")
+
     app = QApplication(sys.argv)
+    if profiler:
+        profiler.mark("QApplication")
+
     window = scm.StratColumnMaker()
+    window.strat_column.paint_profiler = paint_profiler
 
-    # Connect class level signals
-    window.age_display_options_changed.connect(window.strat_column.update_age_display_options)
-    window.show_formation_gap_changed.connect(window.strat_column.update_formation_gap)
-    window.display_age_range_changed.connect(window.strat_column.update_display_age_range)
-    window.intrusion_age_range_changed.connect(window.strat_column.update_intrusion_age_range)
+    # Connect class level signals through the controller so changes within a frame are coalesced
+    window.age_display_options_changed.connect(window.display_controller.set_age_display_options)
+    window.show_formation_gap_changed.connect(window.display_controller.set_formation_gap)
+    window.display_age_range_changed.connect(window.display_controller.set_display_age_range)
+    window.intrusion_age_range_changed.connect(window.display_controller.set_intrusion_age_range)
+
+    if profiler:
+        profiler.mark("main window")
+        # Report and exit once the column is on screen, so the startup time can be tracked from scripts
+        profiler.watch_first_paint(window.strat_column, app.quit)
 
     # Display
     window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    exit_code = app.exec()
+
+    if profiler:
+        profiler.uninstall()
+        profiler.report()
+    if paint_profiler:
+        paint_profiler.report()
+    if memory_profile:
+        print(MemoryProfiler.memory_report(window))
+    sys.exit(exit_code)
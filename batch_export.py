@@ -0,0 +1,424 @@
+import argparse
+import glob
+import os
+import queue
+import sys
+import time
+import multiprocessing
+
+from ScalingMode import ScalingMode
+
+DEFAULT_FORMATS = ('png',)
+DEFAULT_SCALE = 3.0
+DEFAULT_TIMEOUT = 120.0
+DEFAULT_BACKGROUND = 'white'
+DEFAULT_CACHE_SIZE_MB = 512
+POLL_INTERVAL = 0.1
+
+SCALING_MODES = {
+    'chronology': ScalingMode.CHRONOLOGY,
+    'thickness': ScalingMode.THICKNESS,
+    'formation-top': ScalingMode.FORMATION_TOP_THICKNESS
+}
+
+def find_column_files(patterns):
+    """Expand the glob patterns ourselves so they also work in shells that don't, like cmd.exe"""
+    file_paths = []
+    seen = set()
+
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True) if glob.has_magic(pattern) else [pattern]
+        for file_path in sorted(matches):
+            key = os.path.abspath(file_path)
+            if key not in seen and os.path.isfile(file_path):
+                seen.add(key)
+                file_paths.append(file_path)
+
+    return file_paths
+
+def common_directory(file_paths):
+    """Deepest folder holding all the column files, None if there is none (e.g. different drives)"""
+    try:
+        return os.path.commonpath([os.path.dirname(os.path.abspath(file_path)) for file_path in file_paths])
+    except ValueError:
+        return None
+
+def get_output_paths(file_path, formats, output_dir=None, base_dir=None):
+    """
+    Output file next to the input for each format, or in output_dir at the input's place below
+    base_dir, so columns of the same name in different folders don't overwrite each other
+    """
+    base_name = os.path.splitext(os.path.basename(file_path))[0]
+    directory = os.path.dirname(file_path)
+    if output_dir:
+        source_dir = os.path.dirname(os.path.abspath(file_path))
+        directory = os.path.normpath(os.path.join(output_dir, os.path.relpath(source_dir, base_dir or source_dir)))
+    return [os.path.join(directory, f"{base_name}.{fmt}") for fmt in formats]
+
+def find_output_clashes(file_paths, output_paths):
+    """(output path, first column file, second column file) for each output two column files would write"""
+    writers = {}
+    clashes = []
+    for file_path, paths in zip(file_paths, output_paths):
+        for output_path in paths:
+            key = os.path.normcase(os.path.abspath(output_path))
+            if key in writers:
+                clashes.append((output_path, writers[key], file_path))
+            else:
+                writers[key] = file_path
+    return clashes
+
+def is_up_to_date(file_path, output_paths):
+    """True when every output exists and is newer than the column file"""
+    input_mtime = os.path.getmtime(file_path)
+    for output_path in output_paths:
+        if not os.path.exists(output_path) or os.path.getmtime(output_path) < input_mtime:
+            return False
+    return True
+
+def _init_worker_qt():
+    """Create the GUI application a worker needs for fonts and painting, headless unless told otherwise"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    from PySide6.QtGui import QGuiApplication
+    return QGuiApplication.instance() or QGuiApplication([sys.argv[0]])
+
+def _save_png(renderer, output_path, options, background):
+    from ColumnExport import export_png_tiled
+
+    # Streamed in strips and written through a temporary file, so a killed worker never leaves
+    # a truncated image that would look up to date on the next run
+    export_png_tiled(renderer, output_path, options['width'], options['height'], options['scale'], background)
+
+def _save_svg(renderer, output_path, options, background):
+    from ColumnExport import export_svg
+
+    export_svg(renderer, output_path, options['width'], options['height'], background)
+
+def _save_pdf(renderer, output_path, options, background):
+    from ColumnExport import export_pdf
+
+    export_pdf(renderer, output_path, options['width'], options['pages'])
+
+SAVERS = {
+    'png': _save_png,
+    'svg': _save_svg,
+    'pdf': _save_pdf
+}
+
+def _cache_params(fmt, options, background):
+    """Output parameters that go into the render cache key, named the same as for exports from the app"""
+    if fmt == 'png':
+        return {'width': options['width'], 'height': options['height'], 'scale_factor': options['scale'],
+                'background': background, 'dpi': None}
+    if fmt == 'svg':
+        from SvgPainter import screen_dpi
+        return {'width': options['width'], 'height': options['height'], 'background': background,
+                'dpi': screen_dpi()}
+
+    from ColumnExport import pdf_resolution
+    return {'width': options['width'], 'pages': options['pages'], 'resolution': pdf_resolution()}
+
+def export_column_file(file_path, output_paths, options, chronomap=None, texture_brushes=None, cache=None):
+    """
+    Load one column file and write each requested output, returning the number of rejected layers
+    and the number of outputs copied from the render cache
+    """
+    import ColumnIO
+    from PySide6.QtGui import QColor
+    from ColumnRenderer import ColumnRenderer
+
+    column = ColumnIO.read_column_file(file_path)
+
+    renderer = ColumnRenderer(chronomap, texture_brushes)
+    renderer.scaling_mode = SCALING_MODES[options['scaling_mode']]
+    rejected_layers = renderer.set_layers(column["layers"])
+    renderer.intrusion_age_range = (column["intrusion_from_age"], column["intrusion_to_age"])
+    renderer.timescale_version = column["timescale"]
+
+    background = QColor(options['background'])
+    cached = 0
+    for output_path in output_paths:
+        fmt = os.path.splitext(output_path)[1][1:].lower()
+        save = SAVERS[fmt]
+
+        if cache is None:
+            save(renderer, output_path, options, background)
+            continue
+
+        hits = cache.hits
+        cache.export(renderer, output_path, fmt, _cache_params(fmt, options, background),
+                     lambda path: save(renderer, path, options, background))
+        cached += cache.hits - hits
+
+    return len(rejected_layers), cached
+
+def worker_main(worker_id, task_queue, result_queue, options):
+    """Process entry point: render column files from the task queue until a None sentinel arrives"""
+    app = _init_worker_qt()
+
+    from ChronostratigraphicMapper import ChronostratigraphicMapper
+    from ColumnRenderer import load_texture_brushes
+    from RenderCache import RenderCache
+
+    # Build the age mapper and textures once per worker and share them across every file
+    chronomap = ChronostratigraphicMapper()
+    texture_brushes = load_texture_brushes()
+    # Workers share one cache folder; entries are replaced atomically so concurrent writers are safe
+    cache = RenderCache(options['cache_dir'], options['cache_size']) if options['cache'] else None
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+
+        index, file_path, output_paths = task
+        result_queue.put(('start', worker_id, index))
+        start_time = time.perf_counter()
+
+        try:
+            rejected, cached = export_column_file(file_path, output_paths, options, chronomap, texture_brushes, cache)
+        except Exception as e:
+            result_queue.put(('done', worker_id, index, False, f"{type(e).__name__}: {e}",
+                              time.perf_counter() - start_time))
+        else:
+            notes = []
+            if rejected:
+                notes.append(f"{rejected} overlapping layers skipped")
+            if cached:
+                notes.append(f"{cached} of {len(output_paths)} outputs from cache")
+            result_queue.put(('done', worker_id, index, True, ", ".join(notes), time.perf_counter() - start_time))
+
+    del app
+
+class BatchExporter:
+    """
+    Runs column exports on a pool of worker processes.
+    Workers are managed by hand rather than through multiprocessing.Pool so that a worker stuck
+    on one file can be terminated at its timeout and replaced without losing the rest of the batch.
+    """
+
+    def __init__(self, tasks, options, jobs, timeout):
+        self.tasks = tasks
+        self.options = options
+        self.jobs = max(1, min(jobs, len(tasks)))
+        self.timeout = timeout
+
+        # Spawn fresh interpreters on every platform; forking a process with Qt state is not safe
+        self.context = multiprocessing.get_context("spawn")
+        self.task_queue = self.context.Queue()
+        self.result_queue = self.context.Queue()
+
+        self.workers = {}
+        self.running = {}
+        self.next_worker_id = 0
+        self.results = {}
+
+    def start_worker(self):
+        worker_id = self.next_worker_id
+        self.next_worker_id += 1
+
+        process = self.context.Process(
+            target=worker_main,
+            args=(worker_id, self.task_queue, self.result_queue, self.options),
+            daemon=True
+        )
+        process.start()
+        self.workers[worker_id] = process
+
+    def replace_worker(self, worker_id, message):
+        """Stop a worker that timed out or died, fail its current file and start a new worker in its place"""
+        process = self.workers.pop(worker_id)
+        if process.is_alive():
+            process.terminate()
+        process.join()
+
+        index, start_time = self.running.pop(worker_id)
+        self.record_result(index, False, message, time.perf_counter() - start_time)
+
+        # The dead worker never took its sentinel, so the new one will
+        if len(self.results) < len(self.tasks):
+            self.start_worker()
+
+    def record_result(self, index, ok, message, elapsed):
+        self.results[index] = (ok, message, elapsed)
+
+        file_path = self.tasks[index][1]
+        status = "ok" if ok else "FAILED"
+        detail = f" - {message}" if message else ""
+        print(f"[{len(self.results)}/{len(self.tasks)}] {file_path}: {status} ({elapsed:.2f}s){detail}")
+
+    def handle_message(self, message):
+        kind, worker_id = message[0], message[1]
+        if kind == 'start':
+            self.running[worker_id] = (message[2], time.perf_counter())
+        elif kind == 'done':
+            _, _, index, ok, text, elapsed = message
+            self.running.pop(worker_id, None)
+            self.record_result(index, ok, text, elapsed)
+
+    def drain_messages(self, wait):
+        try:
+            self.handle_message(self.result_queue.get(timeout=wait))
+            while True:
+                self.handle_message(self.result_queue.get_nowait())
+        except queue.Empty:
+            pass
+
+    def check_workers(self):
+        now = time.perf_counter()
+        for worker_id in list(self.running):
+            index, start_time = self.running[worker_id]
+            process = self.workers[worker_id]
+
+            if self.timeout and now - start_time > self.timeout:
+                self.replace_worker(worker_id, f"timed out after {self.timeout:g}s")
+            elif not process.is_alive():
+                # Pick up a result the worker may have sent just before exiting
+                self.drain_messages(0)
+                if worker_id in self.running:
+                    self.replace_worker(worker_id, f"worker exited with code {process.exitcode}")
+
+    def run(self):
+        """Export every task and return {task index: (ok, message, seconds)}"""
+        for task in self.tasks:
+            self.task_queue.put(task)
+        for _ in range(self.jobs):
+            self.task_queue.put(None)
+
+        for _ in range(self.jobs):
+            self.start_worker()
+
+        try:
+            while len(self.results) < len(self.tasks):
+                self.drain_messages(POLL_INTERVAL)
+                self.check_workers()
+
+                if not any(process.is_alive() for process in self.workers.values()):
+                    # Every worker is gone (e.g. they all failed to start), so nothing else will finish
+                    self.drain_messages(0)
+                    for index in range(len(self.tasks)):
+                        if index not in self.results:
+                            self.record_result(index, False, "no worker available", 0.0)
+        finally:
+            for process in self.workers.values():
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+
+        return self.results
+
+def print_summary(total_files, skipped, results, elapsed):
+    failures = [(index, message) for index, (ok, message, _) in results.items() if not ok]
+    exported = len(results) - len(failures)
+
+    print()
+    print(f"Files matched:  {total_files}")
+    print(f"Up to date:     {skipped}")
+    print(f"Exported:       {exported}")
+    print(f"Failed:         {len(failures)}")
+    print(f"Elapsed:        {elapsed:.2f}s")
+    if results and elapsed > 0:
+        render_time = sum(seconds for _, _, seconds in results.values())
+        print(f"Throughput:     {len(results) / elapsed:.2f} files/s "
+              f"(average {render_time / len(results):.2f}s per file)")
+
+    return failures
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Export many stratigraphic column files to PNG/SVG/PDF in parallel.")
+    parser.add_argument("patterns", nargs="+",
+                        help="column files or glob patterns, e.g. \"basins/**/*.json\"")
+    parser.add_argument("-f", "--format", dest="formats", action="append", choices=sorted(SAVERS),
+                        help="output format, can be given more than once (default: png)")
+    parser.add_argument("-o", "--output-dir",
+                        help="directory for the exported files, keeping the folders below the one all the column files share (default: next to each column file)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="number of worker processes (default: number of CPUs)")
+    parser.add_argument("-t", "--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help=f"seconds allowed per file before its worker is killed, 0 to disable (default: {DEFAULT_TIMEOUT:g})")
+    parser.add_argument("--force", action="store_true",
+                        help="export even when the outputs are newer than the column file")
+    parser.add_argument("--width", type=int, default=500, help="column width in pixels (default: 500)")
+    parser.add_argument("--height", type=int, default=600, help="column height in pixels (default: 600)")
+    parser.add_argument("--scale", type=float, default=DEFAULT_SCALE,
+                        help=f"PNG scale factor (default: {DEFAULT_SCALE:g})")
+    parser.add_argument("--pages", type=int, default=1,
+                        help="PDF column length in pages (default: 1)")
+    parser.add_argument("--scaling-mode", choices=sorted(SCALING_MODES), default='chronology',
+                        help="layer scaling mode (default: chronology)")
+    parser.add_argument("--background", default=DEFAULT_BACKGROUND,
+                        help=f"background color name or #rrggbb (default: {DEFAULT_BACKGROUND})")
+    parser.add_argument("--no-cache", dest="cache", action="store_false",
+                        help="always render, without reading or filling the render cache")
+    parser.add_argument("--cache-dir",
+                        help="render cache folder (default: the per-user cache folder shared with the app)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE_MB,
+                        help=f"render cache size limit in MB (default: {DEFAULT_CACHE_SIZE_MB})")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    formats = args.formats or list(DEFAULT_FORMATS)
+    # Keep the order given on the command line but drop repeats
+    formats = list(dict.fromkeys(formats))
+
+    options = {
+        'width': args.width,
+        'height': args.height,
+        'scale': args.scale,
+        'pages': args.pages,
+        'scaling_mode': args.scaling_mode,
+        'background': args.background,
+        'cache': args.cache,
+        'cache_dir': args.cache_dir,
+        'cache_size': args.cache_size * 1024 * 1024
+    }
+
+    file_paths = find_column_files(args.patterns)
+    if not file_paths:
+        print("No column files matched")
+        return 1
+
+    base_dir = common_directory(file_paths)
+    all_output_paths = [get_output_paths(file_path, formats, args.output_dir, base_dir) for file_path in file_paths]
+    clashes = find_output_clashes(file_paths, all_output_paths)
+    if clashes:
+        for output_path, first, second in clashes:
+            print(f"Both {first} and {second} would be exported to {output_path}")
+        return 1
+
+    if args.output_dir:
+        for output_paths in all_output_paths:
+            os.makedirs(os.path.dirname(output_paths[0]), exist_ok=True)
+
+    start_time = time.perf_counter()
+
+    tasks = []
+    skipped = 0
+    for file_path, output_paths in zip(file_paths, all_output_paths):
+        if not args.force and is_up_to_date(file_path, output_paths):
+            skipped += 1
+            continue
+        tasks.append((len(tasks), file_path, output_paths))
+
+    print(f"Exporting {len(tasks)} of {len(file_paths)} column files ({skipped} up to date)")
+
+    results = {}
+    if tasks:
+        results = BatchExporter(tasks, options, args.jobs, args.timeout).run()
+
+    failures = print_summary(len(file_paths), skipped, results, time.perf_counter() - start_time)
+    if failures:
+        print()
+        print("Failures:")
+        for index, message in sorted(failures):
+            print(f"  {tasks[index][1]}: {message}")
+        return 1
+
+    return 0
+
+if __name__ == "__main__":
+    # Needed for worker processes in a frozen (pyinstaller) build on Windows
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,279 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from Deposition import DepositionalEnvironment
+from Layer import Layer
+from Lithology import RockType
+from ScalingMode import ScalingMode
+
+RESULTS_VERSION = 1
+DEFAULT_SIZES = (10, 100, 1000, 10000, 100000)
+DEFAULT_REPEAT = 3
+DEFAULT_SEED = 1
+# Slowdown, as a fraction of the baseline median, reported as a regression
+DEFAULT_THRESHOLD = 0.25
+# Differences below this many seconds are timer noise, whatever the ratio
+NOISE_FLOOR = 0.002
+WIDTH = 500
+HEIGHT = 600
+PNG_SCALE = 2.0
+# Oldest age the synthetic columns reach, in Ma
+COLUMN_AGE_SPAN = 4000.0
+GAP_PROBABILITY = 0.1
+
+def synthetic_layers(count, seed=DEFAULT_SEED):
+    """
+    Column of count layers with random lithologies, depositional environments, thicknesses,
+    age spans and occasional gaps, stacked without overlaps from the present down to ~4000 Ma
+    """
+    rng = random.Random(seed)
+    rock_types = list(RockType)
+    dep_envs = list(DepositionalEnvironment)
+    mean_span = COLUMN_AGE_SPAN / count / (1 + GAP_PROBABILITY)
+
+    layers = []
+    age = 0.0
+    formation_top = 0
+    for i in range(count):
+        if rng.random() < GAP_PROBABILITY:
+            age += rng.uniform(0.5, 2.0) * mean_span
+        span = rng.uniform(0.2, 1.8) * mean_span
+        thickness = rng.randint(1, 500)
+        min_thickness = max_thickness = None
+        if rng.random() < 0.3:
+            min_thickness = max(1, thickness - rng.randint(0, thickness))
+            max_thickness = thickness + rng.randint(0, thickness)
+
+        layers.append(Layer(f"Layer {i + 1}", thickness, rng.choice(rock_types), formation_top,
+                            round(age, 4), round(age + span, 4), rng.choice(dep_envs),
+                            min_thickness=min_thickness, max_thickness=max_thickness))
+        age += span
+        formation_top += thickness
+    return layers
+
+def _renderer(context, layers, scaling_mode=ScalingMode.CHRONOLOGY):
+    from ColumnRenderer import ColumnRenderer
+    renderer = ColumnRenderer(context['mapper'], context['textures'])
+    renderer.scaling_mode = scaling_mode
+    renderer.layers = layers
+    return renderer
+
+def bench_chrono_mapping(context, layers):
+    mapper = context['mapper']
+    def run():
+        # Time the tree queries, not hits on the ranges mapped by the previous run
+        mapper.clear_range_cache()
+        for layer in layers:
+            mapper.map_age_to_chronostratigraphy(layer.young_age, layer.old_age)
+    return run
+
+def _bench_paint(scaling_mode):
+    def bench(context, layers):
+        renderer = _renderer(context, layers, scaling_mode)
+        return lambda: renderer.render_image(WIDTH, HEIGHT)
+    return bench
+
+def bench_overlap_bulk_load(context, layers):
+    renderer = _renderer(context, [], ScalingMode.FORMATION_TOP_THICKNESS)
+    return lambda: renderer.set_layers(layers)
+
+def _bench_save(extension):
+    def bench(context, layers):
+        import ColumnIO
+        path = os.path.join(context['directory'], 'save' + extension)
+        return lambda: ColumnIO.write_column_file(path, layers, 0.0, 0.0)
+    return bench
+
+def _bench_open(extension):
+    def bench(context, layers):
+        import ColumnIO
+        path = os.path.join(context['directory'], 'open' + extension)
+        ColumnIO.write_column_file(path, layers, 0.0, 0.0)
+        return lambda: ColumnIO.read_column_file(path)
+    return bench
+
+def bench_export_png(context, layers):
+    from ColumnExport import export_png_tiled
+    renderer = _renderer(context, layers)
+    path = os.path.join(context['directory'], 'export.png')
+    return lambda: export_png_tiled(renderer, path, WIDTH, HEIGHT, PNG_SCALE)
+
+def bench_export_svg(context, layers):
+    from ColumnExport import export_svg
+    renderer = _renderer(context, layers)
+    path = os.path.join(context['directory'], 'export.svg')
+    return lambda: export_svg(renderer, path, WIDTH, HEIGHT)
+
+def bench_export_pdf(context, layers):
+    from ColumnExport import export_pdf
+    renderer = _renderer(context, layers)
+    path = os.path.join(context['directory'], 'export.pdf')
+    return lambda: export_pdf(renderer, path, WIDTH)
+
+# name: (setup returning the function to time, largest column it runs on by default)
+BENCHMARKS = {
+    'chrono_mapping': (bench_chrono_mapping, None),
+    'paint_mode_0': (_bench_paint(ScalingMode.FORMATION_TOP_THICKNESS), 10000),
+    'paint_mode_1': (_bench_paint(ScalingMode.CHRONOLOGY), 10000),
+    'paint_mode_2': (_bench_paint(ScalingMode.THICKNESS), 10000),
+    # Checks each layer against every layer accepted before it, so it grows with the square
+    'overlap_bulk_load': (bench_overlap_bulk_load, 10000),
+    'save_json': (_bench_save('.json'), None),
+    'open_json': (_bench_open('.json'), None),
+    'save_binary': (_bench_save('.stratcol'), None),
+    'open_binary': (_bench_open('.stratcol'), None),
+    'export_png': (bench_export_png, 1000),
+    'export_svg': (bench_export_svg, 1000),
+    'export_pdf': (bench_export_pdf, 1000),
+}
+
+def _init_qt():
+    """Offscreen GUI application for fonts and painting, plus the shared timescale and textures"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtGui import QGuiApplication
+    from ChronostratigraphicMapper import ChronostratigraphicMapper
+    from ColumnRenderer import load_texture_brushes
+
+    app = QGuiApplication.instance() or QGuiApplication([sys.argv[0]])
+    textures = load_texture_brushes()
+    # Decode every texture up front so the first paint isn't charged for it
+    with contextlib.redirect_stdout(io.StringIO()):
+        textures.preload()
+    context = {'app': app, 'mapper': ChronostratigraphicMapper(), 'textures': textures}
+
+    # Likewise for loading fonts, which happens on the first text drawn in the process
+    _renderer(context, synthetic_layers(10)).render_image(WIDTH, HEIGHT)
+    return context
+
+def environment():
+    import PySide6
+    return {
+        'python': platform.python_version(),
+        'pyside6': PySide6.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'qpa_platform': os.environ.get("QT_QPA_PLATFORM", "")
+    }
+
+def run_benchmarks(names, sizes, repeat=DEFAULT_REPEAT, seed=DEFAULT_SEED, full=False):
+    """Time each benchmark on each column size, returning {"<benchmark>/<layers>": result}"""
+    context = _init_qt()
+    results = {}
+
+    with tempfile.TemporaryDirectory(prefix="stratcol-bench-") as directory:
+        context['directory'] = directory
+        for size in sizes:
+            layers = synthetic_layers(size, seed)
+            for name in names:
+                setup, max_layers = BENCHMARKS[name]
+                key = f"{name}/{size}"
+                if not full and max_layers is not None and size > max_layers:
+                    print(f"  {key:<28} skipped (over {max_layers} layers, use --full)")
+                    continue
+
+                run = setup(context, layers)
+                times = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    run()
+                    times.append(time.perf_counter() - start)
+
+                results[key] = {
+                    'benchmark': name,
+                    'layers': size,
+                    'min': min(times),
+                    'median': statistics.median(times),
+                    'runs': times
+                }
+                print(f"  {key:<28} {statistics.median(times) * 1000:10.2f} ms")
+
+    return results
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Print each benchmark's median against the baseline, returning the keys that regressed"""
+    regressions = []
+    print()
+    print(f"  {'benchmark':<28} {'baseline ms':>12} {'now ms':>10} {'change':>8}")
+    for key, result in results.items():
+        before = baseline.get(key)
+        if before is None:
+            print(f"  {key:<28} {'-':>12} {result['median'] * 1000:10.2f}      new")
+            continue
+
+        change = result['median'] / before['median'] - 1 if before['median'] > 0 else 0.0
+        regressed = change > threshold and result['median'] - before['median'] > NOISE_FLOOR
+        if regressed:
+            regressions.append(key)
+        print(f"  {key:<28} {before['median'] * 1000:12.2f} {result['median'] * 1000:10.2f} "
+              f"{change:+7.0%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Time layout, chrono mapping, overlap checks, column I/O, painting and exports on synthetic columns.")
+    parser.add_argument("-o", "--output",
+                        help="write the results as JSON to this file")
+    parser.add_argument("--baseline",
+                        help="results JSON from an earlier run to compare against; exits with 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"slowdown counted as a regression, as a fraction (default: {DEFAULT_THRESHOLD:g})")
+    parser.add_argument("-b", "--benchmark", dest="benchmarks", action="append", choices=list(BENCHMARKS),
+                        help="benchmark to run, can be given more than once (default: all)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help=f"column sizes in layers (default: {' '.join(str(size) for size in DEFAULT_SIZES)})")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help=f"timed runs of each benchmark, the median is reported (default: {DEFAULT_REPEAT})")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED,
+                        help=f"random seed for the synthetic columns (default: {DEFAULT_SEED})")
+    parser.add_argument("--full", action="store_true",
+                        help="also run the slow benchmarks on the largest columns")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    names = list(dict.fromkeys(args.benchmarks or BENCHMARKS))
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('seed') != args.seed:
+            print(f"Warning: baseline used seed {baseline.get('seed')}, this run uses {args.seed}")
+
+    print(f"Running {len(names)} benchmarks on {', '.join(str(size) for size in args.sizes)} layers")
+    results = run_benchmarks(names, args.sizes, args.repeat, args.seed, args.full)
+
+    if args.output:
+        data = {
+            'version': RESULTS_VERSION,
+            'created': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            'environment': environment(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'results': results
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline['results'], args.threshold)
+        if regressions:
+            print()
+            print(f"{len(regressions)} benchmarks regressed by more than {args.threshold:.0%}")
+            return 1
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
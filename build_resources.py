@@ -0,0 +1,26 @@
+import argparse
+import os
+import sys
+
+from ResourcePack import PACKED_DIRECTORIES, build_resource_pack
+
+DEFAULT_OUTPUT = os.path.join("build", "resources.pack")
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Pack the textures and timescale data into one resource file for the PyInstaller build.")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT,
+                        help=f"resource pack to write (default: {DEFAULT_OUTPUT})")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    source_dir = os.path.dirname(os.path.abspath(__file__))
+
+    sizes = build_resource_pack(source_dir, args.output)
+    print(f"Packed {len(sizes)} files from {', '.join(PACKED_DIRECTORIES)} "
+          f"({sum(sizes.values()) / (1024 * 1024):.1f} MB) into {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,392 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import urlsplit, parse_qs
+
+from batch_export import SCALING_MODES
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_WIDTH = 500
+DEFAULT_HEIGHT = 600
+DEFAULT_BACKGROUND = 'white'
+MAX_BODY_MB = 64
+# Largest image a single request may ask for, so one request can't exhaust a worker's memory
+MAX_IMAGE_PIXELS = 100_000_000
+MAX_HEADER_LINES = 100
+# Seconds a client has to send its whole request, so idle connections don't stay open
+READ_TIMEOUT = 60.0
+WARM_UP_HOLD = 0.5
+
+# Paths counted in the metrics by name; anything else a client asks for is counted as "other"
+ROUTES = ('/render', '/metrics', '/health')
+
+CONTENT_TYPES = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml'
+}
+
+REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    408: 'Request Timeout',
+    411: 'Length Required',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error'
+}
+
+class RequestError(Exception):
+    """Raised while handling a request to answer it with an HTTP error status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def _label_value(value):
+    """Escape a Prometheus label value"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+# Render workers
+
+def _init_worker():
+    """Worker process setup: headless Qt, then the timescale and textures every render shares"""
+    import stratcol
+    from ColumnRenderer import load_texture_brushes
+
+    stratcol.create_renderer([])
+    # Textures otherwise decode on first use; a long running worker may as well pay for that up front
+    load_texture_brushes().preload()
+
+def _warm_up():
+    # Hold the worker briefly so each warm-up call lands on a different process
+    time.sleep(WARM_UP_HOLD)
+    return os.getpid()
+
+def render_column(body, params):
+    """Render column JSON in a worker process and return the encoded image bytes"""
+    import ColumnIO
+    import stratcol
+
+    column = ColumnIO.parse_column_json(body)
+    if column["timescale"] is not None and column["timescale"] not in stratcol.get_mapper().available_versions():
+        raise ValueError(f"Unknown timescale version: {column['timescale']}")
+    return stratcol.render_column(column["layers"], {
+        'format': params['format'],
+        'width': params['width'],
+        'height': params['height'],
+        'scale': params['scale'],
+        'background': params['background'],
+        'scaling_mode': SCALING_MODES[params['scaling_mode']],
+        'intrusion_age_range': (column["intrusion_from_age"], column["intrusion_to_age"]),
+        'timescale_version': column["timescale"]
+    })
+
+# Server
+
+class RenderMetrics:
+    """Counters for the /metrics endpoint, in the Prometheus text format"""
+
+    def __init__(self):
+        self.requests = {}
+        self.renders = {}
+        self.render_errors = 0
+        self.coalesced = 0
+        self.render_seconds = 0.0
+        self.in_flight = 0
+        self.started = time.time()
+
+    def count_request(self, path, status):
+        # Client supplied paths would otherwise add a series each, kept for the life of the service
+        key = (path if path in ROUTES else 'other', status)
+        self.requests[key] = self.requests.get(key, 0) + 1
+
+    def format(self, workers):
+        lines = [
+            "# HELP stratcol_requests_total HTTP requests by path and status.",
+            "# TYPE stratcol_requests_total counter"
+        ]
+        for (path, status), count in sorted(self.requests.items()):
+            lines.append(f'stratcol_requests_total{{path="{_label_value(path)}",status="{status}"}} {count}')
+
+        lines += [
+            "# HELP stratcol_renders_total Columns rendered by a worker, by format.",
+            "# TYPE stratcol_renders_total counter"
+        ]
+        for fmt, count in sorted(self.renders.items()):
+            lines.append(f'stratcol_renders_total{{format="{fmt}"}} {count}')
+
+        lines += [
+            "# HELP stratcol_render_errors_total Renders that failed.",
+            "# TYPE stratcol_render_errors_total counter",
+            f"stratcol_render_errors_total {self.render_errors}",
+            "# HELP stratcol_coalesced_requests_total Requests answered by a render already in progress.",
+            "# TYPE stratcol_coalesced_requests_total counter",
+            f"stratcol_coalesced_requests_total {self.coalesced}",
+            "# HELP stratcol_render_seconds_total Time spent rendering, including waiting for a free worker.",
+            "# TYPE stratcol_render_seconds_total counter",
+            f"stratcol_render_seconds_total {self.render_seconds:.6f}",
+            "# HELP stratcol_renders_in_flight Renders queued or running.",
+            "# TYPE stratcol_renders_in_flight gauge",
+            f"stratcol_renders_in_flight {self.in_flight}",
+            "# HELP stratcol_workers Render worker processes.",
+            "# TYPE stratcol_workers gauge",
+            f"stratcol_workers {workers}",
+            "# HELP stratcol_uptime_seconds Seconds since the service started.",
+            "# TYPE stratcol_uptime_seconds gauge",
+            f"stratcol_uptime_seconds {time.time() - self.started:.3f}"
+        ]
+        return "\n".join(lines) + "\n"
+
+class RenderService:
+    """
+    Minimal HTTP/1.1 server on asyncio streams that renders columns on a pool of worker processes.
+    Workers are started and warmed up before the first request, and identical requests arriving
+    while one is being rendered wait for that render instead of starting another.
+    """
+
+    def __init__(self, jobs, max_body_bytes):
+        self.jobs = jobs
+        self.max_body_bytes = max_body_bytes
+        self.metrics = RenderMetrics()
+        self.pool = None
+        self.pending = {}
+        # Warm-up of a pool started to replace a broken one, kept so the task isn't dropped
+        self.restart = None
+
+    def start_pool(self):
+        # Spawn fresh interpreters on every platform; forking a process with Qt state is not safe
+        self.pool = ProcessPoolExecutor(self.jobs, mp_context=multiprocessing.get_context("spawn"),
+                                        initializer=_init_worker)
+
+    async def warm_up(self):
+        """Start every worker and load its textures and timescale now rather than on the first request"""
+        loop = asyncio.get_running_loop()
+        pool = self.pool
+        pids = await asyncio.gather(*(loop.run_in_executor(pool, _warm_up) for _ in range(self.jobs)))
+        return len(set(pids))
+
+    def replace_pool(self, broken_pool):
+        """
+        Start a fresh pool in place of a broken one, unless another request that saw it break
+        already has, and warm it up in the background
+        """
+        if self.pool is not broken_pool:
+            return
+        broken_pool.shutdown(wait=False)
+        self.start_pool()
+        self.restart = asyncio.ensure_future(self.warm_up_restarted())
+
+    async def warm_up_restarted(self):
+        try:
+            workers = await self.warm_up()
+        except BrokenProcessPool:
+            # The next request to fail on it replaces it again
+            print("Render workers failed to restart")
+        else:
+            print(f"Restarted {workers} render workers")
+
+    async def render(self, body, params):
+        loop = asyncio.get_running_loop()
+        self.metrics.in_flight += 1
+        start_time = time.perf_counter()
+        pool = self.pool
+        try:
+            data = await loop.run_in_executor(pool, render_column, body, params)
+        except BrokenProcessPool:
+            # A worker died, e.g. killed by the OS; later requests get a fresh pool
+            self.metrics.render_errors += 1
+            self.replace_pool(pool)
+            raise RequestError(500, "Render worker exited unexpectedly")
+        except (ValueError, KeyError, TypeError) as e:
+            # Bad column JSON, e.g. a missing field or an unknown rock type
+            self.metrics.render_errors += 1
+            raise RequestError(400, f"Invalid column: {type(e).__name__}: {e}")
+        except Exception as e:
+            self.metrics.render_errors += 1
+            raise RequestError(500, f"Render failed: {type(e).__name__}: {e}")
+        finally:
+            self.metrics.in_flight -= 1
+            self.metrics.render_seconds += time.perf_counter() - start_time
+
+        self.metrics.renders[params['format']] = self.metrics.renders.get(params['format'], 0) + 1
+        return data
+
+    async def render_coalesced(self, body, params):
+        """Render, or join the render of an identical request that is already in progress"""
+        key = hashlib.sha256(json.dumps(params, sort_keys=True).encode('utf-8') + b'\0' + body).hexdigest()
+
+        task = self.pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self.render(body, params))
+            self.pending[key] = task
+            task.add_done_callback(lambda _: self.pending.pop(key, None))
+        else:
+            self.metrics.coalesced += 1
+
+        # Shielded, so one client disconnecting doesn't cancel the render for the others
+        return await asyncio.shield(task)
+
+    def parse_render_params(self, query):
+        values = {name: items[-1] for name, items in parse_qs(query).items()}
+        try:
+            params = {
+                'format': values.get('format', 'png').lower(),
+                'width': int(values.get('width', DEFAULT_WIDTH)),
+                'height': int(values.get('height', DEFAULT_HEIGHT)),
+                'scale': float(values.get('scale', 1.0)),
+                'scaling_mode': values.get('scaling_mode', 'chronology'),
+                'background': values.get('background', DEFAULT_BACKGROUND)
+            }
+        except ValueError as e:
+            raise RequestError(400, f"Invalid parameter: {e}")
+
+        if params['format'] not in CONTENT_TYPES:
+            raise RequestError(400, f"format must be one of: {', '.join(sorted(CONTENT_TYPES))}")
+        if params['scaling_mode'] not in SCALING_MODES:
+            raise RequestError(400, f"scaling_mode must be one of: {', '.join(sorted(SCALING_MODES))}")
+        if params['width'] <= 0 or params['height'] <= 0 or params['scale'] <= 0:
+            raise RequestError(400, "width, height and scale must be positive")
+        pixels = params['width'] * params['height'] * params['scale'] ** 2
+        if params['format'] == 'png' and pixels > MAX_IMAGE_PIXELS:
+            raise RequestError(400, f"Image would be larger than {MAX_IMAGE_PIXELS} pixels")
+        return params
+
+    @staticmethod
+    async def read_line(reader):
+        try:
+            line = await reader.readline()
+        except ValueError:
+            # Longer than the stream's buffer limit
+            raise RequestError(400, "Request line or header too long")
+        return line.decode('latin-1').strip()
+
+    async def read_request(self, reader):
+        request_line = await self.read_line(reader)
+        if not request_line:
+            return None
+
+        parts = request_line.split()
+        if len(parts) != 3:
+            raise RequestError(400, "Malformed request line")
+        method, target, _ = parts
+
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = await self.read_line(reader)
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise RequestError(400, "Too many headers")
+
+        body = b''
+        if method == 'POST':
+            if 'content-length' not in headers:
+                raise RequestError(411, "Content-Length is required")
+            try:
+                length = int(headers['content-length'])
+            except ValueError:
+                raise RequestError(400, "Invalid Content-Length")
+            if length > self.max_body_bytes:
+                raise RequestError(413, f"Column JSON is larger than {self.max_body_bytes // (1024 * 1024)} MB")
+            body = await reader.readexactly(length)
+
+        return method, target, body
+
+    async def dispatch(self, method, target, body):
+        """Return (status, content type, body bytes) for a request"""
+        url = urlsplit(target)
+
+        if url.path == '/render':
+            if method != 'POST':
+                raise RequestError(405, "Use POST with the column JSON as the request body")
+            params = self.parse_render_params(url.query)
+            return 200, CONTENT_TYPES[params['format']], await self.render_coalesced(body, params)
+
+        if url.path == '/metrics':
+            text = self.metrics.format(self.jobs)
+            return 200, 'text/plain; version=0.0.4', text.encode('utf-8')
+
+        if url.path == '/health':
+            return 200, 'text/plain', b'ok\n'
+
+        raise RequestError(404, f"No such path: {url.path}")
+
+    async def handle_connection(self, reader, writer):
+        path = '-'
+        try:
+            try:
+                try:
+                    request = await asyncio.wait_for(self.read_request(reader), READ_TIMEOUT)
+                except asyncio.TimeoutError:
+                    raise RequestError(408, f"Request not received within {READ_TIMEOUT:g} seconds")
+                if request is None:
+                    return
+                method, target, body = request
+                path = urlsplit(target).path
+                status, content_type, data = await self.dispatch(method, target, body)
+            except RequestError as e:
+                status, content_type, data = e.status, 'text/plain', f"{e}\n".encode('utf-8')
+
+            self.metrics.count_request(path, status)
+            writer.write(
+                f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: close\r\n\r\n".encode('latin-1')
+            )
+            writer.write(data)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # Client went away
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        self.start_pool()
+        try:
+            workers = await self.warm_up()
+            server = await asyncio.start_server(self.handle_connection, host, port)
+            print(f"Rendering columns on http://{host}:{port}/render with {workers} workers")
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Serve stratigraphic column renders over HTTP. "
+                                                 "POST column JSON (as saved by the app) to /render, metrics are at /metrics.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"address to listen on (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="number of render worker processes (default: number of CPUs)")
+    parser.add_argument("--max-body", type=int, default=MAX_BODY_MB,
+                        help=f"largest accepted column JSON in MB (default: {MAX_BODY_MB})")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    service = RenderService(max(1, args.jobs), args.max_body * 1024 * 1024)
+    # Exit through the normal shutdown path on kill/systemd stop, so the workers are stopped too
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    # Needed for worker processes in a frozen (pyinstaller) build on Windows
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Library interface to the column renderer, for notebooks, scripts and pipelines.
+
+Renders without StratColumnMaker or any window: only QtCore and QtGui are imported, never
+QtWidgets or QtSvg, and a headless QGuiApplication is created on first use when none exists.
+The timescale and textures are loaded once and shared by every call, so rendering many
+columns in a loop only pays for layout and painting.
+
+    import stratcol
+    column = stratcol.load_column("basin.json")
+    image = stratcol.render_column(column["layers"], {"width": 500, "height": 800})
+    png = stratcol.render_column(column["layers"], {"format": "png", "scale": 2.0})
+    periods = stratcol.map_ages([1.0, 70.5, 300.0])
+"""
+import io
+import os
+import sys
+from typing import Dict, Iterable, List, Optional
+
+from PySide6.QtGui import QGuiApplication, QColor
+from PySide6.QtCore import QBuffer, QByteArray, QIODevice
+
+import ColumnIO
+from ChronostratigraphicMapper import ChronostratigraphicMapper
+from ColumnExport import write_svg
+from ColumnRenderer import ColumnRenderer, load_texture_brushes
+from Deposition import DepositionalEnvironment
+from Layer import Layer
+from Lithology import RockType
+from ScalingMode import ScalingMode
+
+__all__ = [
+    'Layer', 'RockType', 'DepositionalEnvironment', 'ScalingMode', 'ChronostratigraphicMapper',
+    'DEFAULT_OPTIONS', 'load_column', 'create_renderer', 'render_column', 'map_ages', 'get_mapper'
+]
+
+DEFAULT_OPTIONS = {
+    'width': 500,
+    'height': 600,
+    'scale': 1.0,
+    'format': 'image',  # 'image' for a QImage, or 'png' / 'svg' for encoded bytes
+    'background': 'white',
+    'scaling_mode': ScalingMode.CHRONOLOGY,
+    'display_options': None,  # e.g. {'show_eras': True, 'show_periods': True, 'show_epochs': False, 'show_ages': False}
+    'show_formation_gap': True,
+    'display_age_range': None,  # (young, old) in Ma, everything by default
+    'intrusion_age_range': None,
+    'timescale_version': None  # e.g. '2023.09' from data/timescales, the default chart otherwise
+}
+
+_shared = {}
+
+def _ensure_app():
+    """Painting text needs a QGuiApplication; start a headless one unless the host already has one"""
+    app = QGuiApplication.instance()
+    if app is None:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        app = QGuiApplication([sys.argv[0] if sys.argv and sys.argv[0] else "stratcol"])
+        _shared['app'] = app
+    return app
+
+def get_mapper() -> ChronostratigraphicMapper:
+    """Timescale shared by every render in this process"""
+    if 'mapper' not in _shared:
+        _shared['mapper'] = ChronostratigraphicMapper()
+    return _shared['mapper']
+
+def load_column(file_path: str) -> Dict:
+    """Read a JSON or binary column file into {'layers': [Layer, ...], 'intrusion_from_age': ..., ...}"""
+    return ColumnIO.read_column_file(file_path)
+
+def _merge_options(options):
+    merged = dict(DEFAULT_OPTIONS)
+    if options:
+        unknown = set(options) - set(DEFAULT_OPTIONS)
+        if unknown:
+            raise ValueError(f"Unknown render options: {', '.join(sorted(unknown))}")
+        merged.update(options)
+    return merged
+
+def create_renderer(layers: Iterable, options: Optional[Dict] = None) -> ColumnRenderer:
+    """Renderer holding the layers (Layer objects or layer dicts) with the display settings from options"""
+    options = _merge_options(options)
+    _ensure_app()
+
+    renderer = ColumnRenderer(get_mapper(), load_texture_brushes())
+    renderer.scaling_mode = options['scaling_mode']
+    renderer.show_formation_gap = options['show_formation_gap']
+    if options['display_options'] is not None:
+        renderer.display_options.update(options['display_options'])
+    if options['display_age_range'] is not None:
+        renderer.display_age_range = tuple(options['display_age_range'])
+    if options['intrusion_age_range'] is not None:
+        renderer.intrusion_age_range = tuple(options['intrusion_age_range'])
+    renderer.timescale_version = options['timescale_version']
+
+    renderer.set_layers([layer if isinstance(layer, Layer) else Layer.from_dict(layer) for layer in layers])
+    return renderer
+
+def render_column(layers: Iterable, options: Optional[Dict] = None):
+    """
+    Render a column and return a QImage, or PNG / SVG bytes when options['format'] asks for them.
+    See DEFAULT_OPTIONS for the available options.
+    """
+    options = _merge_options(options)
+    if options['format'] not in ('image', 'png', 'svg'):
+        raise ValueError(f"Unknown render format: {options['format']}")
+
+    renderer = create_renderer(layers, options)
+    width, height = options['width'], options['height']
+    background = QColor(options['background'])
+
+    if options['format'] == 'svg':
+        f = io.StringIO()
+        write_svg(renderer, f, width, height, background)
+        return f.getvalue().encode('utf-8')
+
+    image = renderer.render_image(width, height, options['scale'], background)
+    if options['format'] == 'image':
+        return image
+
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.WriteOnly)
+    image.save(buffer, "PNG")
+    buffer.close()
+    return bytes(data)
+
+def map_ages(ages: Iterable[float], level: str = 'periods', version: Optional[str] = None) -> List[Optional[str]]:
+    """
+    Name of the unit at each age (Ma) for 'eras', 'periods', 'epochs' or 'ages', None outside the timescale.
+    Uses the default chart unless a timescale version is named.
+    """
+    return get_mapper().get_version(version).map_ages(ages, level)